@@ -1,16 +1,280 @@
+import asyncio
 import azure.functions as func
+import contextvars
+import functools
+import gzip
+import hashlib
 import json
 import logging
 import os
-from typing import Dict, Any, List, Optional
+import random
+import re
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote, urlparse
 from azure.devops.connection import Connection
 from msrest.authentication import BasicAuthentication
 from azure.devops.v7_0.work_item_tracking.models import Wiql
 
+from .metrics import MetricsRegistry, endpoint_label
+from .tracing import tracer_from_env
+
+# Optional accelerators: orjson for serialization, brotli for br responses (stdlib json/gzip otherwise)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bounded pool for the blocking azure-devops SDK calls so they never stall the worker's event loop
+SDK_MAX_WORKERS = int(os.environ.get('AZURE_DEVOPS_SDK_WORKERS', '8'))
+_sdk_executor = ThreadPoolExecutor(max_workers=SDK_MAX_WORKERS, thread_name_prefix='azdo-sdk')
+
+# _apis/wit/$batch accepts at most 200 operations per request
+WIT_BATCH_MAX_SIZE = 200
+BULK_CHUNK_SIZE = max(1, min(int(os.environ.get('AZURE_DEVOPS_BULK_CHUNK_SIZE', '50')), WIT_BATCH_MAX_SIZE))
+
+# Default field projections: only fetch what the tool actually returns
+LIST_DEFAULT_FIELDS = [
+    'System.Title', 'System.State', 'System.AssignedTo', 'System.WorkItemType'
+]
+GET_DEFAULT_FIELDS = [
+    'System.Title', 'System.Description', 'System.State', 'System.AssignedTo',
+    'System.WorkItemType', 'Microsoft.VSTS.Common.Priority', 'System.CreatedDate',
+    'System.ChangedDate'
+]
+
+# Tool result format: pretty (indented JSON text), compact (JSON text) or structured (structuredContent + compact text)
+RESULT_FORMAT = os.environ.get('MCP_RESULT_FORMAT', 'pretty').lower()
+
+# Response bodies at least this large are compressed when the client sends Accept-Encoding
+COMPRESS_MIN_BYTES = int(os.environ.get('MCP_COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON, with orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0))
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+
+def json_result(data: Any, key: str) -> Dict[str, Any]:
+    """MCP tool result carrying JSON data in the configured RESULT_FORMAT"""
+    text = dumps(data, pretty=RESULT_FORMAT == 'pretty').decode()
+    result = {"content": [{"type": "text", "text": text}]}
+    if RESULT_FORMAT == 'structured':
+        # structuredContent must be an object; the compact text copy keeps text-only clients working
+        result["structuredContent"] = data if isinstance(data, dict) else {key: data}
+    return result
+
+
+# Process-wide metrics, exposed on GET /api/mcp/metrics
+_registry = MetricsRegistry('azure_devops_function')
+_tool_duration = _registry.histogram('tool_duration_seconds', 'MCP tool execution time', ('tool', 'outcome'))
+_tools_in_flight = _registry.gauge('tools_in_flight', 'MCP tool calls in flight', ('tool',))
+_tool_bytes_in = _registry.counter('tool_request_bytes_total', 'Size of tool arguments (JSON)', ('tool',))
+_tool_bytes_out = _registry.counter('tool_response_bytes_total', 'Size of tool results', ('tool',))
+_sdk_in_flight = _registry.gauge('sdk_calls_in_flight', 'Blocking SDK calls running in the thread pool')
+_upstream_duration = _registry.histogram(
+    'upstream_duration_seconds', 'Azure DevOps REST time to response headers', ('method', 'endpoint', 'status')
+)
+_upstream_bytes_out = _registry.counter('upstream_request_bytes_total', 'Body bytes sent to Azure DevOps', ('endpoint',))
+_upstream_bytes_in = _registry.counter('upstream_response_bytes_total', 'Body bytes received from Azure DevOps', ('endpoint',))
+_upstream_throttled = _registry.counter(
+    'upstream_throttled_total', '429/503 responses from Azure DevOps', ('endpoint', 'status')
+)
+_http_bytes_out = _registry.counter('http_response_bytes_total', 'Response body bytes sent to MCP clients', ('encoding',))
+
+
+# Process-wide tracer (OTEL_TRACES_EXPORTER, disabled by default)
+_tracer = tracer_from_env('azure-devops-function')
+
+
+class ThrottledError(Exception):
+    """Azure DevOps rejected the request because of rate limiting"""
+    
+    def __init__(self, status: int, retry_after: Optional[float]):
+        wait = f", retry after {retry_after:.0f}s" if retry_after else ""
+        super().__init__(f"Azure DevOps is throttling requests (HTTP {status}){wait}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimitScheduler:
+    """Token bucket per organization with write priority, Retry-After handling and retries after throttling"""
+    # Counterpart of RateLimitScheduler in mcp-servers/azure-devops/azure-devops-mcp.py - change header handling in both
+    
+    THROTTLE_STATUSES = (429, 503)
+    
+    def __init__(self, rate: float = 20.0, burst: int = 40, write_reserve: float = 0.25,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.rate = rate
+        self.burst = burst
+        # Reads never take the bucket below this level, leaving headroom for writes
+        self.read_floor = burst * write_reserve
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets: Dict[str, List[float]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._headers: Dict[str, Dict[str, str]] = {}
+        self._local = threading.local()
+        self.throttled = 0
+        self.delayed = 0
+        self.retries = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+    
+    @staticmethod
+    def org_key(url: str) -> str:
+        parsed = urlparse(url)
+        segments = [p for p in parsed.path.split('/') if p]
+        if parsed.netloc.endswith('dev.azure.com') and segments:
+            return f"{parsed.netloc}/{segments[0]}"
+        return parsed.netloc
+    
+    def _take(self, org: str, is_write: bool) -> float:
+        now = time.monotonic()
+        blocked = self._blocked_until.get(org, 0) - now
+        if blocked > 0:
+            return blocked
+        bucket = self._buckets.setdefault(org, [float(self.burst), now])
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        floor = 0.0 if is_write else self.read_floor
+        if bucket[0] - 1 >= floor:
+            bucket[0] -= 1
+            return 0.0
+        return (floor + 1 - bucket[0]) / self.rate
+    
+    async def acquire(self, org: str, is_write: bool):
+        while True:
+            delay = self._take(org, is_write)
+            if delay <= 0:
+                return
+            self.waits += 1
+            self.wait_seconds += delay
+            await asyncio.sleep(delay)
+    
+    def response_hook(self, response, *args, **kwargs):
+        """requests response hook registered on the SDK clients (runs in the worker thread)"""
+        org = self.org_key(response.url)
+        headers = response.headers
+        self._headers[org] = {
+            name: headers[name]
+            for name in ('Retry-After', 'X-RateLimit-Remaining', 'X-RateLimit-Limit',
+                         'X-RateLimit-Delay', 'X-RateLimit-Reset', 'X-RateLimit-Resource')
+            if name in headers
+        }
+        
+        delay = None
+        try:
+            if headers.get('Retry-After'):
+                delay = float(headers['Retry-After'])
+            elif headers.get('X-RateLimit-Remaining') == '0' and headers.get('X-RateLimit-Reset'):
+                delay = max(0.0, float(headers['X-RateLimit-Reset']) - time.time())
+        except ValueError:
+            delay = None
+        
+        if delay:
+            self._blocked_until[org] = max(self._blocked_until.get(org, 0), time.monotonic() + delay)
+        
+        # X-RateLimit-Delay: Azure DevOps is already slowing our requests down (the signal before 429),
+        # so pause the organization for as long instead of queueing more work on the server side
+        try:
+            server_delay = min(float(headers.get('X-RateLimit-Delay') or 0), self.backoff_max)
+        except ValueError:
+            server_delay = 0.0
+        if server_delay > 0:
+            self.delayed += 1
+            self._blocked_until[org] = max(self._blocked_until.get(org, 0), time.monotonic() + server_delay)
+        
+        endpoint = endpoint_label(response.url)
+        _upstream_duration.observe(
+            response.elapsed.total_seconds(), method=response.request.method, endpoint=endpoint, status=response.status_code
+        )
+        _upstream_bytes_out.inc(len(response.request.body or b''), endpoint=endpoint)
+        _upstream_bytes_in.inc(len(response.content), endpoint=endpoint)
+        if response.status_code in self.THROTTLE_STATUSES:
+            self.throttled += 1
+            self._local.throttle = (response.status_code, delay)
+            _upstream_throttled.inc(endpoint=endpoint, status=response.status_code)
+        
+        # The hook sees the finished response, so the HTTP span is recorded after the fact
+        end_ns = time.time_ns()
+        _tracer.record(
+            f"HTTP {response.request.method} {endpoint}",
+            end_ns - int(response.elapsed.total_seconds() * 1e9), end_ns,
+            kind='client',
+            error=f"HTTP {response.status_code}" if response.status_code >= 400 else None,
+            **{
+                "http.request.method": response.request.method,
+                "http.response.status_code": response.status_code,
+                "server.address": urlparse(response.url).hostname if _tracer.enabled else None
+            }
+        )
+        return response
+    
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn in the current thread, turning throttled SDK failures into ThrottledError"""
+        self._local.throttle = None
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            throttle = getattr(self._local, 'throttle', None)
+            if throttle:
+                raise ThrottledError(*throttle) from e
+            raise
+    
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "throttled": self.throttled,
+            "delayed": self.delayed,
+            "retries": self.retries,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "orgs": {
+                org: {
+                    "tokens": round(min(self.burst, bucket[0] + (now - bucket[1]) * self.rate), 2),
+                    "blocked_for": round(max(0.0, self._blocked_until.get(org, 0) - now), 3),
+                    "headers": self._headers.get(org, {})
+                }
+                for org, bucket in self._buckets.items()
+            }
+        }
+
+
+# One scheduler per worker process so every server instance shares the org's rate budget
+_scheduler = RateLimitScheduler(
+    rate=float(os.environ.get('AZURE_DEVOPS_RATE_LIMIT', '20')),
+    burst=int(os.environ.get('AZURE_DEVOPS_RATE_BURST', '40')),
+    write_reserve=float(os.environ.get('AZURE_DEVOPS_WRITE_RESERVE', '0.25')),
+    max_retries=int(os.environ.get('AZURE_DEVOPS_MAX_RETRIES', '3'))
+)
+
+
 class AzureDevOpsMCPServer:
     """Azure DevOps MCP Server for Azure Function"""
     
@@ -22,11 +286,87 @@ class AzureDevOpsMCPServer:
         if not all([self.org_url, self.pat]):
             raise ValueError("Missing Azure DevOps configuration")
         
-        # Initialize connection
-        credentials = BasicAuthentication('', self.pat)
-        self.connection = Connection(base_url=self.org_url, creds=credentials)
+        # Connection and SDK clients are created lazily and reused across invocations
+        self._connection: Optional[Connection] = None
+        self._wit_client = None
+        self._build_client = None
+        self._http: Optional[requests.Session] = None
+        self._lock = threading.Lock()
     
-    def list_tools(self) -> Dict[str, Any]:
+    @property
+    def connection(self) -> Connection:
+        """Shared msrest connection, created on first use"""
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    credentials = BasicAuthentication('', self.pat)
+                    self._connection = Connection(base_url=self.org_url, creds=credentials)
+        return self._connection
+    
+    def get_wit_client(self):
+        """Cached work item tracking client"""
+        if self._wit_client is None:
+            client = self.connection.clients.get_work_item_tracking_client()
+            client.config.hooks.append(_scheduler.response_hook)
+            self._wit_client = client
+        return self._wit_client
+    
+    def get_build_client(self):
+        """Cached build client"""
+        if self._build_client is None:
+            client = self.connection.clients.get_build_client()
+            client.config.hooks.append(_scheduler.response_hook)
+            self._build_client = client
+        return self._build_client
+    
+    def get_http_session(self) -> requests.Session:
+        """Pooled requests session for REST endpoints the SDK does not wrap (e.g. $batch)"""
+        if self._http is None:
+            session = requests.Session()
+            session.auth = ('', self.pat)
+            session.hooks['response'].append(_scheduler.response_hook)
+            self._http = session
+        return self._http
+    
+    def close(self):
+        """Release pooled connections (requests session and SDK service clients)"""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        # In-flight calls on the old clients still finish; closing only drops idle keep-alive connections
+        for client in (self._wit_client, self._build_client, self._connection):
+            service_client = getattr(client, '_client', None)
+            if service_client is not None:
+                service_client.close()
+    
+    async def _run_sync(self, fn: Callable, *args, is_write: bool = False, **kwargs) -> Any:
+        """Run a blocking SDK call in the bounded thread pool through the rate-limit scheduler"""
+        loop = asyncio.get_running_loop()
+        org = RateLimitScheduler.org_key(self.org_url)
+        attempt = 0
+        with _tracer.span(f"sdk.{getattr(fn, '__name__', 'call')}") as span:
+            while True:
+                await _scheduler.acquire(org, is_write)
+                try:
+                    with _sdk_in_flight.track():
+                        # Copy the context so HTTP spans recorded in the worker thread keep their parent
+                        return await loop.run_in_executor(
+                            _sdk_executor,
+                            functools.partial(contextvars.copy_context().run, _scheduler.call, fn, *args, **kwargs)
+                        )
+                except ThrottledError as e:
+                    # A 429 was rejected before it ran, so writes retry it too; a 503 is retried only for reads
+                    if (is_write and e.status != 429) or attempt >= _scheduler.max_retries:
+                        raise
+                    attempt += 1
+                    _scheduler.retries += 1
+                    span.set_attribute('retries', attempt)
+                    wait = e.retry_after if e.retry_after is not None else _scheduler.backoff(attempt)
+                    logger.warning(f"Azure DevOps throttled ({e.status}), retry {attempt}/{_scheduler.max_retries} in {wait:.1f}s")
+                    await asyncio.sleep(wait)
+    
+    @staticmethod
+    def list_tools() -> Dict[str, Any]:
         """List available MCP tools"""
         return {
             "tools": [
@@ -38,7 +378,8 @@ class AzureDevOpsMCPServer:
                         "properties": {
                             "project": {"type": "string", "description": "Project name"},
                             "query": {"type": "string", "description": "WIQL query (optional)"},
-                            "limit": {"type": "integer", "description": "Max items to return", "default": 10}
+                            "limit": {"type": "integer", "description": "Max items to return", "default": 10},
+                            "fields": {"type": "array", "items": {"type": "string"}, "description": "Fields to fetch (optional)"}
                         },
                         "required": ["project"]
                     }
@@ -49,7 +390,8 @@ class AzureDevOpsMCPServer:
                     "inputSchema": {
                         "type": "object",
                         "properties": {
-                            "id": {"type": "integer", "description": "Work item ID"}
+                            "id": {"type": "integer", "description": "Work item ID"},
+                            "fields": {"type": "array", "items": {"type": "string"}, "description": "Fields to fetch (optional)"}
                         },
                         "required": ["id"]
                     }
@@ -85,6 +427,57 @@ class AzureDevOpsMCPServer:
                         "required": ["id"]
                     }
                 },
+                {
+                    "name": "bulk_create_work_items",
+                    "description": "Create many work items in one call (uses the $batch endpoint)",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "project": {"type": "string", "description": "Project name"},
+                            "items": {
+                                "type": "array",
+                                "description": "Work items to create (same fields as create_work_item)",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "type": {"type": "string", "description": "Work item type (Task, Bug, User Story)"},
+                                        "title": {"type": "string", "description": "Work item title"},
+                                        "description": {"type": "string", "description": "Work item description"},
+                                        "assigned_to": {"type": "string", "description": "Assigned to (email)"},
+                                        "priority": {"type": "integer", "description": "Priority (1-4)"}
+                                    },
+                                    "required": ["type", "title"]
+                                }
+                            }
+                        },
+                        "required": ["project", "items"]
+                    }
+                },
+                {
+                    "name": "bulk_update_work_items",
+                    "description": "Update many work items in one call (uses the $batch endpoint)",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "items": {
+                                "type": "array",
+                                "description": "Changes to apply (same fields as update_work_item)",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "id": {"type": "integer", "description": "Work item ID"},
+                                        "title": {"type": "string", "description": "New title"},
+                                        "state": {"type": "string", "description": "New state"},
+                                        "assigned_to": {"type": "string", "description": "New assignee"},
+                                        "priority": {"type": "integer", "description": "New priority"}
+                                    },
+                                    "required": ["id"]
+                                }
+                            }
+                        },
+                        "required": ["items"]
+                    }
+                },
                 {
                     "name": "run_pipeline",
                     "description": "Run a build pipeline",
@@ -115,7 +508,27 @@ class AzureDevOpsMCPServer:
         }
     
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute a tool and return results"""
+        """Execute a tool and return results, recording latency and payload sizes"""
+        started = time.perf_counter()
+        result: Dict[str, Any] = {}
+        _tool_bytes_in.inc(len(json.dumps(arguments, default=str)), tool=tool_name)
+        try:
+            with _tracer.span(f"tools/call {tool_name}", **{"mcp.tool.name": tool_name}) as span, \
+                    _tools_in_flight.track(tool=tool_name):
+                result = await self._call_tool(tool_name, arguments)
+                if result.get('isError'):
+                    span.set_error(result['content'][0]['text'])
+            return result
+        finally:
+            outcome = 'error' if result.get('isError', not result) else 'ok'
+            _tool_duration.observe(time.perf_counter() - started, tool=tool_name, outcome=outcome)
+            _tool_bytes_out.inc(
+                sum(len(content.get('text', '').encode()) for content in result.get('content', [])),
+                tool=tool_name
+            )
+    
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch to the tool implementation, turning failures into an isError result"""
         try:
             if tool_name == "list_work_items":
                 return await self._list_work_items(arguments)
@@ -125,6 +538,10 @@ class AzureDevOpsMCPServer:
                 return await self._create_work_item(arguments)
             elif tool_name == "update_work_item":
                 return await self._update_work_item(arguments)
+            elif tool_name == "bulk_create_work_items":
+                return await self._bulk_create_work_items(arguments)
+            elif tool_name == "bulk_update_work_items":
+                return await self._bulk_update_work_items(arguments)
             elif tool_name == "run_pipeline":
                 return await self._run_pipeline(arguments)
             elif tool_name == "get_pipeline_status":
@@ -137,12 +554,13 @@ class AzureDevOpsMCPServer:
                 "content": [{
                     "type": "text",
                     "text": f"Error: {str(e)}"
-                }]
+                }],
+                "isError": True
             }
     
     async def _list_work_items(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """List work items from project"""
-        wit_client = self.connection.clients.get_work_item_tracking_client()
+        wit_client = self.get_wit_client()
         project = args.get('project', self.project)
         query = args.get('query')
         limit = args.get('limit', 10)
@@ -151,36 +569,40 @@ class AzureDevOpsMCPServer:
             query = f"SELECT [System.Id], [System.Title], [System.State], [System.AssignedTo] FROM WorkItems WHERE [System.TeamProject] = '{project}' ORDER BY [System.ChangedDate] DESC"
         
         wiql = Wiql(query=query)
-        query_result = wit_client.query_by_wiql(wiql, top=limit)
+        query_result = await self._run_sync(wit_client.query_by_wiql, wiql, top=limit)
         
         work_items = []
         if query_result.work_items:
             ids = [wi.id for wi in query_result.work_items[:limit]]
-            items = wit_client.get_work_items(ids=ids)
+            items = await self._run_sync(
+                wit_client.get_work_items,
+                ids=ids,
+                fields=args.get('fields') or LIST_DEFAULT_FIELDS
+            )
             
-            for item in items:
-                work_items.append({
-                    'id': item.id,
-                    'title': item.fields.get('System.Title', ''),
-                    'state': item.fields.get('System.State', ''),
-                    'assigned_to': item.fields.get('System.AssignedTo', {}).get('displayName', 'Unassigned'),
-                    'type': item.fields.get('System.WorkItemType', ''),
-                    'url': item.url
-                })
+            with _tracer.span('format', **{"work_items": len(items)}):
+                for item in items:
+                    work_items.append({
+                        'id': item.id,
+                        'title': item.fields.get('System.Title', ''),
+                        'state': item.fields.get('System.State', ''),
+                        'assigned_to': item.fields.get('System.AssignedTo', {}).get('displayName', 'Unassigned'),
+                        'type': item.fields.get('System.WorkItemType', ''),
+                        'url': item.url
+                    })
         
-        return {
-            "content": [{
-                "type": "text",
-                "text": json.dumps(work_items, indent=2)
-            }]
-        }
+        return json_result(work_items, 'work_items')
     
     async def _get_work_item(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Get specific work item details"""
-        wit_client = self.connection.clients.get_work_item_tracking_client()
+        wit_client = self.get_wit_client()
         work_item_id = args['id']
         
-        item = wit_client.get_work_item(work_item_id)
+        item = await self._run_sync(
+            wit_client.get_work_item,
+            work_item_id,
+            fields=args.get('fields') or GET_DEFAULT_FIELDS
+        )
         
         result = {
             'id': item.id,
@@ -195,18 +617,11 @@ class AzureDevOpsMCPServer:
             'url': item.url
         }
         
-        return {
-            "content": [{
-                "type": "text",
-                "text": json.dumps(result, indent=2)
-            }]
-        }
+        return json_result(result, 'work_item')
     
-    async def _create_work_item(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new work item"""
-        wit_client = self.connection.clients.get_work_item_tracking_client()
-        project = args.get('project', self.project)
-        
+    @staticmethod
+    def _create_document(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """JSON Patch document for a new work item"""
         document = []
         
         # Add title
@@ -238,24 +653,11 @@ class AzureDevOpsMCPServer:
                 "value": args['priority']
             })
         
-        work_item = wit_client.create_work_item(
-            document=document,
-            project=project,
-            type=args['type']
-        )
-        
-        return {
-            "content": [{
-                "type": "text",
-                "text": f"Created work item #{work_item.id}: {work_item.fields['System.Title']}"
-            }]
-        }
+        return document
     
-    async def _update_work_item(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an existing work item"""
-        wit_client = self.connection.clients.get_work_item_tracking_client()
-        work_item_id = args['id']
-        
+    @staticmethod
+    def _update_document(args: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """JSON Patch document for a work item update"""
         document = []
         
         # Update fields if provided
@@ -274,8 +676,130 @@ class AzureDevOpsMCPServer:
                     "value": args[field]
                 })
         
+        return document
+    
+    async def _bulk_create_work_items(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Create many work items through the $batch endpoint"""
+        project = args.get('project', self.project)
+        items = args.get('items', [])
+        
+        operations = [
+            {
+                "method": "PATCH",
+                "uri": f"/{quote(project)}/_apis/wit/workitems/${quote(item['type'])}?api-version=7.0",
+                "headers": {"Content-Type": "application/json-patch+json"},
+                "body": self._create_document(item)
+            }
+            for item in items
+        ]
+        return await self._bulk_result(operations, items)
+    
+    async def _bulk_update_work_items(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Update many work items through the $batch endpoint"""
+        items = args.get('items', [])
+        
+        operations = []
+        for item in items:
+            if 'id' not in item:
+                raise ValueError("Work item id is required for every update")
+            document = self._update_document(item)
+            if not document:
+                raise ValueError(f"No fields to update for work item #{item['id']}")
+            operations.append({
+                "method": "PATCH",
+                "uri": f"/_apis/wit/workitems/{item['id']}?api-version=7.0",
+                "headers": {"Content-Type": "application/json-patch+json"},
+                "body": document
+            })
+        return await self._bulk_result(operations, items)
+    
+    async def _bulk_result(self, operations: List[Dict[str, Any]], items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send operations in concurrent $batch chunks and report per-item success/failure"""
+        if not operations:
+            raise ValueError("No work items to process")
+        
+        chunks = [operations[i:i + BULK_CHUNK_SIZE] for i in range(0, len(operations), BULK_CHUNK_SIZE)]
+        responses = await asyncio.gather(
+            *(self._run_sync(self._send_wit_batch, chunk, is_write=True) for chunk in chunks),
+            return_exceptions=True
+        )
+        
+        results = []
+        for chunk, response in zip(chunks, responses):
+            if isinstance(response, Exception):
+                entries = [{"code": None, "body": str(response)}] * len(chunk)
+            else:
+                entries = response + [{"code": None, "body": "Missing $batch response"}] * (len(chunk) - len(response))
+            for entry in entries:
+                body = entry.get('body')
+                if isinstance(body, str):
+                    try:
+                        body = json.loads(body)
+                    except ValueError:
+                        pass
+                index = len(results)
+                item = items[index]
+                # Echo the input position and title so failed creates (no id yet) can be matched to their input
+                row = {"index": index, "id": item.get('id')}
+                if 'title' in item:
+                    row["title"] = item['title']
+                if entry.get('code') in (200, 201):
+                    if isinstance(body, dict) and body.get('id') is not None:
+                        row["id"] = body['id']
+                    row["success"] = True
+                else:
+                    error = body
+                    if isinstance(body, dict):
+                        error = (body.get('value') or {}).get('Message') or body.get('message') or body
+                    row.update(success=False, error=str(error))
+                results.append(row)
+        
+        succeeded = sum(1 for r in results if r['success'])
+        return json_result({"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}, 'results')
+    
+    def _send_wit_batch(self, operations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """POST one chunk to _apis/wit/$batch (blocking, runs in the SDK pool)"""
+        response = self.get_http_session().post(
+            f"{self.org_url.rstrip('/')}/_apis/wit/$batch?api-version=7.0",
+            json=operations,
+            timeout=60
+        )
+        response.raise_for_status()
+        return response.json().get('value', [])
+    
+    async def _create_work_item(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new work item"""
+        wit_client = self.get_wit_client()
+        project = args.get('project', self.project)
+        
+        document = self._create_document(args)
+        
+        work_item = await self._run_sync(
+            wit_client.create_work_item,
+            is_write=True,
+            document=document,
+            project=project,
+            type=args['type']
+        )
+        
+        return {
+            "content": [{
+                "type": "text",
+                "text": f"Created work item #{work_item.id}: {work_item.fields['System.Title']}"
+            }]
+        }
+    
+    async def _update_work_item(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an existing work item"""
+        wit_client = self.get_wit_client()
+        work_item_id = args['id']
+        
+        document = self._update_document(args)
+        
         if document:
-            work_item = wit_client.update_work_item(
+            work_item = await self._run_sync(
+                wit_client.update_work_item,
+                is_write=True,
                 document=document,
                 id=work_item_id
             )
@@ -296,7 +820,7 @@ class AzureDevOpsMCPServer:
     
     async def _run_pipeline(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Run a build pipeline"""
-        build_client = self.connection.clients.get_build_client()
+        build_client = self.get_build_client()
         project = args.get('project', self.project)
         pipeline_id = args['pipeline_id']
         branch = args.get('branch', 'main')
@@ -306,7 +830,9 @@ class AzureDevOpsMCPServer:
             'sourceBranch': f'refs/heads/{branch}'
         }
         
-        queued_build = build_client.queue_build(
+        queued_build = await self._run_sync(
+            build_client.queue_build,
+            is_write=True,
             build=build,
             project=project
         )
@@ -320,39 +846,273 @@ class AzureDevOpsMCPServer:
     
     async def _get_pipeline_status(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Get status of recent pipeline runs"""
-        build_client = self.connection.clients.get_build_client()
+        build_client = self.get_build_client()
         project = args.get('project', self.project)
         pipeline_id = args['pipeline_id']
         limit = args.get('limit', 5)
         
-        builds = build_client.get_builds(
+        builds = await self._run_sync(
+            build_client.get_builds,
             project=project,
             definitions=[pipeline_id],
             top=limit
         )
         
         results = []
-        for build in builds:
-            results.append({
-                'id': build.id,
-                'status': build.status,
-                'result': build.result,
-                'branch': build.source_branch,
-                'started': str(build.start_time) if build.start_time else None,
-                'finished': str(build.finish_time) if build.finish_time else None
-            })
+        with _tracer.span('format', **{"builds": len(builds)}):
+            for build in builds:
+                results.append({
+                    'id': build.id,
+                    'status': build.status,
+                    'result': build.result,
+                    'branch': build.source_branch,
+                    'started': str(build.start_time) if build.start_time else None,
+                    'finished': str(build.finish_time) if build.finish_time else None
+                })
         
-        return {
-            "content": [{
-                "type": "text",
-                "text": json.dumps(results, indent=2)
-            }]
-        }
+        return json_result(results, 'runs')
+
+
+# Warm-instance cache: one server per worker process, rebuilt when configuration changes
+_server: Optional[AzureDevOpsMCPServer] = None
+_server_config: Optional[tuple] = None
+_server_lock = threading.Lock()
+_metrics: Dict[str, Any] = {
+    "cold_start_ms": None,
+    "server_builds": 0,
+    "invocations": 0,
+    "tools_list_not_modified": 0
+}
+_registry.register_stats('function', lambda: _metrics)
+_registry.register_stats('scheduler', _scheduler.stats)
+_registry.register_stats('tracing', _tracer.stats)
+
+
+def _current_config() -> tuple:
+    return (
+        os.environ.get('AZURE_DEVOPS_ORG_URL'),
+        os.environ.get('AZURE_DEVOPS_PAT'),
+        os.environ.get('AZURE_DEVOPS_PROJECT')
+    )
+
+
+def get_server() -> AzureDevOpsMCPServer:
+    """Return the cached server, creating it on first use or after a config change"""
+    global _server, _server_config
+    config = _current_config()
+    if _server is not None and _server_config == config:
+        return _server
+    
+    with _server_lock:
+        if _server is None or _server_config != config:
+            started = time.perf_counter()
+            with _tracer.span('azure_devops.connect', **{"faas.coldstart": _server is None}):
+                server = AzureDevOpsMCPServer()
+                # Build the connection and clients up front so later requests only pay for the API call
+                server.get_wit_client()
+                server.get_build_client()
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 2)
+            
+            if _server is not None:
+                logger.info("Azure DevOps configuration changed, rebuilding server")
+                _server.close()
+            _server, _server_config = server, config
+            _metrics["cold_start_ms"] = elapsed_ms
+            _metrics["server_builds"] += 1
+            logger.info(f"Azure DevOps MCP Server initialized in {elapsed_ms} ms")
+    return _server
+
+
+# Tool catalog built and serialized once per worker process; clients revalidate it with If-None-Match
+TOOLS_LIST = AzureDevOpsMCPServer.list_tools()
+TOOLS_LIST_JSON = dumps(TOOLS_LIST)
+# Weak validator: the same catalog may be sent with different Content-Encodings
+TOOLS_LIST_ETAG = 'W/"' + hashlib.sha256(TOOLS_LIST_JSON).hexdigest()[:32] + '"'
+TOOLS_LIST_MAX_AGE = int(os.environ.get('MCP_TOOLS_LIST_MAX_AGE', '300'))
+
+
+def _etag_matches(req: func.HttpRequest, etag: str) -> bool:
+    """Weak comparison against If-None-Match (RFC 9110), including the * wildcard"""
+    header = req.headers.get('If-None-Match')
+    if not header:
+        return False
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == (etag[2:] if etag.startswith('W/') else etag):
+            return True
+    return False
+
+
+def _negotiate_encoding(accept: Optional[str]) -> Optional[str]:
+    """Best supported Content-Encoding for an Accept-Encoding header, br preferred on equal q"""
+    if not accept:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept.split(','):
+        coding, _, params = part.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip().lower()] = q
+    
+    best, best_q = None, 0.0
+    for coding in ('br', 'gzip') if brotli is not None else ('gzip',):
+        q = weights.get(coding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _encode_body(req: func.HttpRequest, body: bytes, headers: Dict[str, str]) -> bytes:
+    """Compress the body per Accept-Encoding above COMPRESS_MIN_BYTES, updating the headers"""
+    encoding = None
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = _negotiate_encoding(req.headers.get('Accept-Encoding'))
+    if encoding == 'br':
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    headers["Vary"] = "Accept-Encoding"
+    _http_bytes_out.inc(len(body), encoding=encoding or 'identity')
+    return body
+
+
+def _json_response(req: func.HttpRequest, payload: Any, headers: Dict[str, str]) -> func.HttpResponse:
+    """200 JSON response serialized with dumps() and compressed when worthwhile"""
+    headers = {"Content-Type": "application/json", **headers}
+    return func.HttpResponse(_encode_body(req, dumps(payload), headers), status_code=200, headers=headers)
+
+
+def _tools_list_response(req: func.HttpRequest, envelope: Optional[Dict[str, Any]] = None) -> func.HttpResponse:
+    """Serve the precomputed catalog with ETag/Cache-Control; GET answers 304 when the client copy is current"""
+    headers = {
+        "ETag": TOOLS_LIST_ETAG,
+        "Cache-Control": f"private, max-age={TOOLS_LIST_MAX_AGE}",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Expose-Headers": "ETag"
+    }
+    # POST (JSON-RPC) always gets a full reply: RFC 9110 maps a matching If-None-Match on POST to 412
+    if envelope is None and _etag_matches(req, TOOLS_LIST_ETAG):
+        _metrics["tools_list_not_modified"] += 1
+        return func.HttpResponse(status_code=304, headers=headers)
+    
+    # Splice the cached JSON into the envelope instead of re-serializing the catalog
+    if envelope is None:
+        body = TOOLS_LIST_JSON
+    elif 'id' in envelope:
+        body = b'{"jsonrpc":"2.0","id":' + dumps(envelope['id']) + b',"result":' + TOOLS_LIST_JSON + b'}'
+    else:
+        body = b'{"result":' + TOOLS_LIST_JSON + b'}'
+    headers["Content-Type"] = "application/json"
+    return func.HttpResponse(_encode_body(req, body, headers), status_code=200, headers=headers)
+
+
+# JSON-RPC 2.0 batch settings
+BATCH_MAX_SIZE = int(os.environ.get('MCP_BATCH_MAX_SIZE', '50'))
+BATCH_MAX_CONCURRENCY = int(os.environ.get('MCP_BATCH_CONCURRENCY', '4'))
+
+JSONRPC_INVALID_REQUEST = -32600
+JSONRPC_METHOD_NOT_FOUND = -32601
+JSONRPC_INTERNAL_ERROR = -32603
+
+
+async def dispatch(method: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Execute a single MCP method, raising LookupError for unknown methods"""
+    if method == 'tools/list':
+        return TOOLS_LIST
+    elif method == 'tools/call':
+        # First build may hit the network (client resource areas), keep it off the event loop
+        server = await asyncio.get_running_loop().run_in_executor(
+            _sdk_executor, contextvars.copy_context().run, get_server
+        )
+        tool_name = params.get('name')
+        arguments = params.get('arguments', {})
+        return await server.call_tool(tool_name, arguments)
+    raise LookupError(f"Unknown method: {method}")
+
+
+def _rpc_error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message}
+    }
+
+
+async def _dispatch_batch_entry(entry: Any, semaphore: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    """Run one element of a JSON-RPC batch; notifications (no id) produce no response"""
+    if not isinstance(entry, dict) or not isinstance(entry.get('method'), str):
+        return _rpc_error(None, JSONRPC_INVALID_REQUEST, "Invalid Request")
+    
+    request_id = entry.get('id')
+    is_notification = 'id' not in entry
+    
+    async with semaphore:
+        try:
+            result = await dispatch(entry['method'], entry.get('params') or {})
+        except LookupError as e:
+            response = _rpc_error(request_id, JSONRPC_METHOD_NOT_FOUND, str(e))
+        except Exception as e:
+            logger.error(f"Error processing batch call {entry['method']} (id={request_id}): {str(e)}")
+            response = _rpc_error(request_id, JSONRPC_INTERNAL_ERROR, str(e))
+        else:
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+    
+    return None if is_notification else response
+
+
+async def dispatch_batch(entries: List[Any]) -> List[Dict[str, Any]]:
+    """Dispatch a JSON-RPC 2.0 batch concurrently, bounded by BATCH_MAX_CONCURRENCY"""
+    if not entries:
+        return [_rpc_error(None, JSONRPC_INVALID_REQUEST, "Invalid Request: empty batch")]
+    if len(entries) > BATCH_MAX_SIZE:
+        return [_rpc_error(None, JSONRPC_INVALID_REQUEST, f"Batch too large: {len(entries)} > {BATCH_MAX_SIZE}")]
+    
+    semaphore = asyncio.Semaphore(max(1, BATCH_MAX_CONCURRENCY))
+    responses = await asyncio.gather(*(_dispatch_batch_entry(entry, semaphore) for entry in entries))
+    return [response for response in responses if response is not None]
 
 
 # Azure Function entry point
 async def main(req: func.HttpRequest) -> func.HttpResponse:
     logger.info('Azure DevOps MCP Server function triggered')
+    _metrics["invocations"] += 1
+    
+    # Continue the caller's trace (Copilot Studio / API Management send a W3C traceparent header)
+    with _tracer.span(f"{req.method} /api/mcp", kind='server', traceparent=req.headers.get('traceparent'), **{
+        "http.request.method": req.method,
+        "faas.trigger": "http",
+        "faas.coldstart": _server is None
+    }) as span:
+        response = await _handle_request(req)
+        span.set_attribute('http.response.status_code', response.status_code)
+        if response.status_code >= 500:
+            span.set_error(f"HTTP {response.status_code}")
+        return response
+
+
+async def _handle_request(req: func.HttpRequest) -> func.HttpResponse:
+    """Route the HTTP request: metrics, health check, CORS preflight or JSON-RPC"""
+    # Prometheus scrape endpoint
+    if req.method == 'GET' and req.route_params.get('path') == 'metrics':
+        return func.HttpResponse(
+            _registry.render(),
+            status_code=200,
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+    
+    # Tool catalog for clients that poll it with conditional GETs
+    if req.method == 'GET' and req.route_params.get('path') == 'tools':
+        return _tools_list_response(req)
     
     # Handle GET request for testing
     if req.method == 'GET':
@@ -360,7 +1120,10 @@ async def main(req: func.HttpRequest) -> func.HttpResponse:
             json.dumps({
                 "status": "ok",
                 "message": "Azure DevOps MCP Server is running",
-                "version": "1.0.0"
+                "version": "1.0.0",
+                "warm": _server is not None,
+                "metrics": _metrics,
+                "throttle": _scheduler.stats()
             }),
             status_code=200,
             headers={
@@ -377,7 +1140,7 @@ async def main(req: func.HttpRequest) -> func.HttpResponse:
             headers={
                 "Access-Control-Allow-Origin": "*",
                 "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type, x-functions-key",
+                "Access-Control-Allow-Headers": "Content-Type, If-None-Match, x-functions-key",
                 "Access-Control-Max-Age": "3600"
             }
         )
@@ -385,38 +1148,46 @@ async def main(req: func.HttpRequest) -> func.HttpResponse:
     try:
         # Parse request
         req_body = req.get_json()
+        
+        # JSON-RPC 2.0 batch: one HTTP round-trip for several MCP calls
+        if isinstance(req_body, list):
+            responses = await dispatch_batch(req_body)
+            headers = {
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "POST, OPTIONS",
+                "Access-Control-Allow-Headers": "Content-Type"
+            }
+            if not responses:
+                return func.HttpResponse("", status_code=204, headers=headers)
+            return _json_response(req, responses, headers)
+        
         method = req_body.get('method')
         params = req_body.get('params', {})
         
-        # Initialize server
-        server = AzureDevOpsMCPServer()
+        if method == 'tools/list':
+            return _tools_list_response(req, req_body)
         
         # Handle different MCP methods
-        if method == 'tools/list':
-            result = server.list_tools()
-        elif method == 'tools/call':
-            tool_name = params.get('name')
-            arguments = params.get('arguments', {})
-            result = await server.call_tool(tool_name, arguments)
-        else:
+        try:
+            result = await dispatch(method, params)
+        except LookupError as e:
             return func.HttpResponse(
-                json.dumps({"error": f"Unknown method: {method}"}),
+                json.dumps({"error": str(e)}),
                 status_code=400,
                 headers={"Content-Type": "application/json"}
             )
         
-        # Return successful response
-        return func.HttpResponse(
-            json.dumps({"result": result}),
-            status_code=200,
-            headers={
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Methods": "POST, OPTIONS",
-                "Access-Control-Allow-Headers": "Content-Type"
-            }
-        )
+        response_body = {"result": result}
+        if 'id' in req_body:
+            response_body = {"jsonrpc": "2.0", "id": req_body['id'], "result": result}
         
+        # Return successful response
+        return _json_response(req, response_body, {
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type"
+        })
+    
     except ValueError as e:
         logger.error(f"JSON parsing error: {str(e)}")
         return func.HttpResponse(
@@ -0,0 +1,205 @@
+"""
+Prometheus text-format metrics for the Azure Function
+Labelled counters, gauges and histograms plus export of component stats() dictionaries.
+Self-contained so the Function app deploys without the stdio server sources.
+"""
+
+import bisect
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Latency histogram bucket bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Path segments replaced by {id} so numbers and GUIDs never become label values
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$")
+NAME_INVALID = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def endpoint_label(url: str) -> str:
+    """REST endpoint template without org, project and ids, e.g. wit/workitems/{id}"""
+    _, found, rest = urlparse(url).path.partition('/_apis/')
+    if not found:
+        return 'other'
+    segments: List[str] = []
+    for segment in rest.split('/'):
+        if not segment:
+            continue
+        if ID_SEGMENT.match(segment):
+            segment = '{id}'
+        elif segment.startswith('$') and segments and segments[-1] == 'workitems':
+            segment = '${type}'
+        segments.append(segment.lower())
+    return '/'.join(segments)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    """Series sharing one metric name and label set"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+    
+    def _labels(self, key: Tuple[str, ...], *extra: Tuple[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key)) + extra
+    
+    def samples(self) -> Iterator[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            yield '', self._labels(key), value
+
+
+class Counter(_Family):
+    kind = 'counter'
+    
+    def inc(self, value: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+    
+    def dec(self, value: float = 1.0, **labels: Any):
+        self.inc(-value, **labels)
+    
+    @contextmanager
+    def track(self, **labels: Any):
+        """Raise the gauge for the duration of the block (e.g. calls in flight)"""
+        self.inc(1, **labels)
+        try:
+            yield
+        finally:
+            self.dec(1, **labels)
+
+
+class Histogram(_Family):
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [per-bucket counts (last one is above the largest bound), sum, count]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def samples(self) -> Iterator[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        with self._lock:
+            series = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                yield '_bucket', self._labels(key, ('le', _format_value(bound))), cumulative
+            yield '_sum', self._labels(key), total
+            yield '_count', self._labels(key), count
+
+
+class MetricsRegistry:
+    """Metrics registry rendered in the Prometheus text exposition format"""
+    
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._families: Dict[str, _Family] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+    
+    def _register(self, family: _Family) -> Any:
+        return self._families.setdefault(family.name, family)
+    
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+    
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+    
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self._register(Histogram(name, help, labelnames))
+    
+    def register_stats(self, subsystem: str, collect: Callable[[], Dict[str, Any]]):
+        """Export the numbers of a component's stats() dict as <namespace>_<subsystem>_<key>"""
+        self._collectors.append((subsystem, collect))
+    
+    @staticmethod
+    def _flatten(stats: Dict[str, Any]) -> Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]]:
+        """Numeric values; nested per-object dicts (e.g. orgs -> org) become labels"""
+        flat: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]] = {}
+        for key, value in stats.items():
+            name = NAME_INVALID.sub('_', key)
+            if isinstance(value, (bool, int, float)):
+                flat.setdefault(name, []).append(((), float(value)))
+            elif isinstance(value, dict):
+                label = name[:-1] if name.endswith('s') else name
+                for item, nested in value.items():
+                    if not isinstance(nested, dict):
+                        continue
+                    for nested_key, nested_value in nested.items():
+                        if isinstance(nested_value, (bool, int, float)):
+                            flat.setdefault(NAME_INVALID.sub('_', nested_key), []).append(
+                                (((label, str(item)),), float(nested_value))
+                            )
+        return flat
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            full_name = f"{self.namespace}_{family.name}"
+            lines.append(f"# HELP {full_name} {family.help}")
+            lines.append(f"# TYPE {full_name} {family.kind}")
+            for suffix, labels, value in family.samples():
+                lines.append(f"{full_name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        
+        for subsystem, collect in self._collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.warning(f"Could not collect {subsystem} stats: {str(e)}")
+                continue
+            for name, samples in self._flatten(stats).items():
+                full_name = f"{self.namespace}_{subsystem}_{name}"
+                lines.append(f"# TYPE {full_name} untyped")
+                for labels, value in samples:
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
@@ -8,13 +8,23 @@ Warsztat: Copilot 365 MCP Integration
 import asyncio
 import aiohttp
 import base64
+import hashlib
 import json
 import logging
 import os
+import random
 import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-from urllib.parse import quote
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+from metrics import MetricsRegistry, endpoint_label
+from pipeline_watcher import RUN_URI_PREFIX, RunWatcher, run_uri
+from tracing import Tracer, tracer_from_env
+from work_item_mirror import WorkItemMirror
 
 # Import MCP SDK
 try:
@@ -33,6 +43,764 @@ logging.basicConfig(
 )
 logger = logging.getLogger('AzureDevOpsMCP')
 
+# Endpoint workitemsbatch przyjmuje maksymalnie 200 ID w jednym żądaniu
+WORK_ITEMS_BATCH_SIZE = 200
+QUERY_MAX_PAGE_SIZE = 1000
+
+# Endpoint _apis/wit/$batch przyjmuje maksymalnie 200 operacji w jednym żądaniu
+WIT_BATCH_MAX_SIZE = 200
+
+# Domyślne projekcje pól - pobieramy tylko to, co jest wyświetlane
+QUERY_DEFAULT_FIELDS = [
+    "System.Id", "System.Title", "System.State", "System.WorkItemType", "System.AssignedTo"
+]
+WORK_ITEM_DEFAULT_FIELDS = [
+    "System.Title", "System.State", "System.WorkItemType", "System.CreatedDate",
+    "System.ChangedDate", "System.CreatedBy", "System.AssignedTo", "System.Description",
+    "System.Tags"
+]
+
+# Zasób z metrykami serwera (format tekstowy Prometheus)
+METRICS_URI = "azuredevops://metrics"
+
+# Narzędzia tylko do odczytu - bezpieczne do współdzielenia jednego żądania (single-flight)
+READ_ONLY_TOOLS = {
+    "query_work_items", "get_work_item", "get_repositories", "get_pipeline_runs", "get_build_artifacts"
+}
+
+# Domyślne TTL (w sekundach) dla narzędzi i zasobów tylko do odczytu
+DEFAULT_CACHE_TTLS = {
+    "get_work_item": 60,
+    "get_repositories": 300,
+    "get_pipeline_runs": 15,
+    "get_build_artifacts": 300,
+    "azuredevops://projects": 300,
+    "azuredevops://pipelines": 300,
+    "azuredevops://work-items/active": 30,
+    "azuredevops://repositories": 300
+}
+
+def request_key(name: str, args: Dict[str, Any], project: str) -> Tuple[str, str, str]:
+    """Klucz żądania: (narzędzie, znormalizowane argumenty, projekt)"""
+    normalized = {k: v for k, v in args.items() if k != "project" and v is not None}
+    return (name, json.dumps(normalized, sort_keys=True, default=str), project or "")
+
+class SingleFlight:
+    """Współbieżne identyczne odczyty dzielą jedno żądanie i jego wynik"""
+    
+    def __init__(self):
+        self._inflight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self.executed = 0
+        self.deduplicated = 0
+    
+    async def do(self, key: Tuple[str, str, str], fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.executed += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # oznacz jako odebrany, jeśli nikt nie czekał
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "deduplicated": self.deduplicated
+        }
+
+class ResponseCache:
+    """Cache TTL + LRU dla odpowiedzi narzędzi tylko do odczytu"""
+    
+    def __init__(self, ttls: Dict[str, float], max_size: int = 512):
+        self.ttls = ttls
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Any, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _normalize(args: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in args.items() if k != "project" and v is not None}
+    
+    def _key(self, name: str, args: Dict[str, Any], project: str) -> Tuple[str, str, str]:
+        return request_key(name, args, project)
+    
+    def is_cacheable(self, name: str) -> bool:
+        return self.max_size > 0 and self.ttls.get(name, 0) > 0
+    
+    def get(self, name: str, args: Dict[str, Any], project: str) -> Optional[Any]:
+        if not self.is_cacheable(name):
+            return None
+        key = self._key(name, args, project)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, name: str, args: Dict[str, Any], project: str, value: Any):
+        if not self.is_cacheable(name):
+            return
+        key = self._key(name, args, project)
+        self._entries[key] = (time.monotonic() + self.ttls[name], value, self._normalize(args))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, name: str, project: Optional[str] = None, **match: Any) -> int:
+        """Usuń wpisy narzędzia, opcjonalnie tylko dla projektu i pasujących argumentów"""
+        stale = [
+            key for key, (_, _, args) in self._entries.items()
+            if key[0] == name
+            and (project is None or key[2] == project)
+            and all(str(args.get(k)) == str(v) for k, v in match.items())
+        ]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+    
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0
+        }
+
+class AzureDevOpsAPIError(Exception):
+    """Błąd odpowiedzi REST API Azure DevOps"""
+    
+    def __init__(self, label: str, status: int, text: str):
+        super().__init__(f"{label} {status}: {text}")
+        self.status = status
+        self.text = text
+
+class ThrottledError(AzureDevOpsAPIError):
+    """Azure DevOps odrzucił żądanie z powodu limitów (429/503) także po ponowieniach"""
+    
+    def __init__(self, status: int, text: str, retry_after: Optional[float]):
+        wait = f", ponów za {retry_after:.0f}s" if retry_after else ""
+        Exception.__init__(self, f"Azure DevOps ogranicza liczbę żądań (HTTP {status}){wait}")
+        self.status = status
+        self.text = text
+        self.retry_after = retry_after
+
+class RateLimitScheduler:
+    """Harmonogram żądań: token bucket per organizacja, priorytet zapisów i obsługa Retry-After"""
+    # Odpowiednik w azure-devops-function/McpServer/__init__.py - zmiany w obsłudze nagłówków wprowadzać w obu
+    
+    THROTTLE_STATUSES = (429, 503)
+    
+    def __init__(self, rate: float = 20.0, burst: int = 40, write_reserve: float = 0.25,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 metrics: Optional[MetricsRegistry] = None, tracer: Optional[Tracer] = None):
+        self.rate = rate
+        self.burst = burst
+        # Odczyty nie schodzą poniżej tej liczby tokenów - zostawiamy zapas dla zapisów
+        self.read_floor = burst * write_reserve
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets: Dict[str, List[float]] = {}
+        self._blocked_until: Dict[str, float] = {}
+        self._headers: Dict[str, Dict[str, str]] = {}
+        self.throttled = 0
+        self.delayed = 0
+        self.retries = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        
+        # Tracer bez eksportera nie tworzy spanów
+        self.tracer = tracer or Tracer("azure-devops-mcp")
+        self.metrics = metrics
+        if metrics is not None:
+            labels = ("method", "endpoint", "status")
+            self.upstream_duration = metrics.histogram(
+                "upstream_duration_seconds", "Czas żądania REST Azure DevOps (do zwolnienia odpowiedzi)", labels
+            )
+            self.upstream_in_flight = metrics.gauge("upstream_in_flight", "Żądania REST w toku", ("endpoint",))
+            self.upstream_retries = metrics.counter("upstream_retries_total", "Ponowienia po 429/503", ("endpoint",))
+            self.upstream_throttled = metrics.counter(
+                "upstream_throttled_total", "Odpowiedzi 429/503 od Azure DevOps", ("endpoint", "status")
+            )
+    
+    @staticmethod
+    def org_key(url: str) -> str:
+        parsed = urlparse(url)
+        segments = [p for p in parsed.path.split("/") if p]
+        if parsed.netloc.endswith("dev.azure.com") and segments:
+            return f"{parsed.netloc}/{segments[0]}"
+        return parsed.netloc
+    
+    def _take(self, org: str, is_write: bool) -> float:
+        """Pobierz token; zwraca czas oczekiwania (0 jeśli token został pobrany)"""
+        now = time.monotonic()
+        blocked = self._blocked_until.get(org, 0) - now
+        if blocked > 0:
+            return blocked
+        bucket = self._buckets.setdefault(org, [float(self.burst), now])
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        floor = 0.0 if is_write else self.read_floor
+        if bucket[0] - 1 >= floor:
+            bucket[0] -= 1
+            return 0.0
+        return (floor + 1 - bucket[0]) / self.rate
+    
+    async def acquire(self, org: str, is_write: bool):
+        while True:
+            delay = self._take(org, is_write)
+            if delay <= 0:
+                return
+            self.waits += 1
+            self.wait_seconds += delay
+            await asyncio.sleep(delay)
+    
+    def observe(self, org: str, status: int, headers) -> Optional[float]:
+        """Zapisz nagłówki limitów; zwraca opóźnienie z Retry-After (jeśli jest)"""
+        self._headers[org] = {
+            name: headers[name]
+            for name in ("Retry-After", "X-RateLimit-Remaining", "X-RateLimit-Limit",
+                         "X-RateLimit-Delay", "X-RateLimit-Reset", "X-RateLimit-Resource")
+            if name in headers
+        }
+        if status in self.THROTTLE_STATUSES:
+            self.throttled += 1
+        
+        delay = None
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+        elif headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            try:
+                delay = max(0.0, float(headers["X-RateLimit-Reset"]) - time.time())
+            except ValueError:
+                delay = None
+        
+        if delay:
+            self._blocked_until[org] = max(self._blocked_until.get(org, 0), time.monotonic() + delay)
+        
+        # X-RateLimit-Delay: Azure DevOps już spowalnia nasze żądania (sygnał przed 429) - wstrzymaj organizację
+        # na tyle samo, zamiast dokładać kolejne żądania do kolejki po stronie serwera
+        try:
+            server_delay = min(float(headers.get("X-RateLimit-Delay") or 0), self.backoff_max)
+        except ValueError:
+            server_delay = 0.0
+        if server_delay > 0:
+            self.delayed += 1
+            self._blocked_until[org] = max(self._blocked_until.get(org, 0), time.monotonic() + server_delay)
+        return delay
+    
+    def backoff(self, attempt: int) -> float:
+        """Wykładniczy backoff z pełnym jitterem"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    @asynccontextmanager
+    async def request(self, session: aiohttp.ClientSession, method: str, url: str,
+                      read: Optional[bool] = None, **kwargs):
+        """Wykonaj żądanie przez harmonogram; ponowienia po 429 (odczyty także po 503), potem ThrottledError"""
+        org = self.org_key(url)
+        is_read = method.upper() in ("GET", "HEAD", "OPTIONS") if read is None else read
+        endpoint = endpoint_label(url) if self.metrics is not None or self.tracer.enabled else ""
+        attempt = 0
+        with self.tracer.span(f"HTTP {method.upper()} {endpoint}", kind="client") as span:
+            if span.sampled:
+                parsed = urlparse(url)
+                span.set_attribute("http.request.method", method.upper())
+                span.set_attribute("server.address", parsed.hostname)
+                span.set_attribute("url.path", parsed.path)
+            if span.traceparent:
+                # Propagacja kontekstu do Azure DevOps (W3C Trace Context)
+                kwargs["headers"] = {**kwargs.get("headers", {}), "traceparent": span.traceparent}
+            while True:
+                await self.acquire(org, is_write=not is_read)
+                started = self._request_started(endpoint)
+                try:
+                    response = await session.request(method, url, **kwargs)
+                except BaseException:
+                    self._request_finished(method, endpoint, "error", started)
+                    raise
+                delay = self.observe(org, response.status, response.headers)
+                span.set_attribute("http.response.status_code", response.status)
+                # 503 po zapisie mógł zostać częściowo wykonany - ponawiamy tylko 429 (odrzucony przed wykonaniem)
+                retryable = response.status == 429 or (response.status in self.THROTTLE_STATUSES and is_read)
+                if retryable and attempt < self.max_retries:
+                    response.release()
+                    self._request_finished(method, endpoint, response.status, started)
+                    attempt += 1
+                    self.retries += 1
+                    span.set_attribute("http.request.resend_count", attempt)
+                    if self.metrics is not None:
+                        self.upstream_retries.inc(endpoint=endpoint)
+                    wait = delay if delay is not None else self.backoff(attempt)
+                    logger.warning(f"Azure DevOps throttling ({response.status}), ponowienie {attempt}/{self.max_retries} za {wait:.1f}s")
+                    await asyncio.sleep(wait)
+                    continue
+                if response.status >= 400:
+                    span.set_error(f"HTTP {response.status}")
+                if response.status in self.THROTTLE_STATUSES:
+                    text = await response.text()
+                    response.release()
+                    self._request_finished(method, endpoint, response.status, started)
+                    raise ThrottledError(response.status, text, delay)
+                try:
+                    yield response
+                finally:
+                    response.release()
+                    self._request_finished(method, endpoint, response.status, started)
+                return
+    
+    def _request_started(self, endpoint: str) -> float:
+        if self.metrics is not None:
+            self.upstream_in_flight.inc(endpoint=endpoint)
+        return time.perf_counter()
+    
+    def _request_finished(self, method: str, endpoint: str, status: Any, started: float):
+        if self.metrics is None:
+            return
+        self.upstream_in_flight.dec(endpoint=endpoint)
+        self.upstream_duration.observe(time.perf_counter() - started, method=method.upper(), endpoint=endpoint, status=status)
+        if status in self.THROTTLE_STATUSES:
+            self.upstream_throttled.inc(endpoint=endpoint, status=status)
+    
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "throttled": self.throttled,
+            "delayed": self.delayed,
+            "retries": self.retries,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "orgs": {
+                org: {
+                    "tokens": round(min(self.burst, bucket[0] + (now - bucket[1]) * self.rate), 2),
+                    "blocked_for": round(max(0.0, self._blocked_until.get(org, 0) - now), 3),
+                    "headers": self._headers.get(org, {})
+                }
+                for org, bucket in self._buckets.items()
+            }
+        }
+
+class ConditionalStore:
+    """Walidatory (ETag / rev) i gotowe odpowiedzi dla warunkowych GET"""
+    
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.not_modified = 0
+        self.rev_unchanged = 0
+        self.full_fetches = 0
+    
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+    
+    def put(self, url: str, etag: Optional[str], rev: Optional[Any], rendered: Any):
+        if self.max_size <= 0 or (etag is None and rev is None):
+            return
+        self._entries[url] = {"etag": etag, "rev": rev, "rendered": rendered}
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "not_modified": self.not_modified,
+            "rev_unchanged": self.rev_unchanged,
+            "full_fetches": self.full_fetches
+        }
+
+
+# Katalog narzędzi budowany raz przy imporcie - tools/list nie tworzy obiektów przy każdym wywołaniu
+TOOLS: List[types.Tool] = [
+    types.Tool(
+        name="create_work_item",
+        description="Utwórz nowe zadanie w Azure DevOps",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "title": {
+                    "type": "string",
+                    "description": "Tytuł zadania"
+                },
+                "description": {
+                    "type": "string",
+                    "description": "Opis zadania (opcjonalny)"
+                },
+                "type": {
+                    "type": "string",
+                    "enum": ["Bug", "Task", "Feature", "User Story", "Epic"],
+                    "description": "Typ zadania",
+                    "default": "Task"
+                },
+                "assignee": {
+                    "type": "string",
+                    "description": "Email osoby przypisanej (opcjonalny)"
+                },
+                "priority": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 4,
+                    "description": "Priorytet (1=Najwyższy, 4=Najniższy)",
+                    "default": 2
+                },
+                "area_path": {
+                    "type": "string",
+                    "description": "Ścieżka obszaru (opcjonalna)"
+                },
+                "iteration_path": {
+                    "type": "string",
+                    "description": "Ścieżka iteracji (opcjonalna)"
+                },
+                "tags": {
+                    "type": "string",
+                    "description": "Tagi oddzielone średnikami (opcjonalne)"
+                }
+            },
+            "required": ["title", "type"]
+        }
+    ),
+    types.Tool(
+        name="query_work_items",
+        description="Wyszukaj zadania w Azure DevOps",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Zapytanie WIQL lub tekst do wyszukania"
+                },
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna, użyje domyślnego)"
+                },
+                "top": {
+                    "type": "integer",
+                    "description": "Liczba wyników na stronę",
+                    "default": 20,
+                    "maximum": QUERY_MAX_PAGE_SIZE
+                },
+                "fields": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Pola do pobrania, np. System.Title (opcjonalne, domyślnie tylko wyświetlane pola)"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Token następnej strony z poprzedniego wyniku (opcjonalny)"
+                }
+            },
+            "required": ["query"]
+        }
+    ),
+    types.Tool(
+        name="get_work_item",
+        description="Pobierz szczegóły zadania po ID",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "id": {
+                    "type": "integer",
+                    "description": "ID zadania"
+                },
+                "fields": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Pola do pobrania, np. System.Title (opcjonalne, domyślnie tylko wyświetlane pola)"
+                },
+                "expand": {
+                    "type": "string",
+                    "enum": ["none", "relations", "fields", "links", "all"],
+                    "description": "Dodatkowe informacje do pobrania (relations/links/all pobierają wszystkie pola)",
+                    "default": "fields"
+                }
+            },
+            "required": ["id"]
+        }
+    ),
+    types.Tool(
+        name="update_work_item",
+        description="Aktualizuj istniejące zadanie",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "id": {
+                    "type": "integer",
+                    "description": "ID zadania do aktualizacji"
+                },
+                "title": {
+                    "type": "string",
+                    "description": "Nowy tytuł (opcjonalny)"
+                },
+                "description": {
+                    "type": "string",
+                    "description": "Nowy opis (opcjonalny)"
+                },
+                "state": {
+                    "type": "string",
+                    "enum": ["New", "Active", "Resolved", "Closed", "Removed"],
+                    "description": "Nowy status (opcjonalny)"
+                },
+                "assignee": {
+                    "type": "string",
+                    "description": "Nowa osoba przypisana (opcjonalna)"
+                },
+                "comment": {
+                    "type": "string",
+                    "description": "Komentarz do zmiany (opcjonalny)"
+                }
+            },
+            "required": ["id"]
+        }
+    ),
+    types.Tool(
+        name="bulk_create_work_items",
+        description="Utwórz wiele zadań naraz (endpoint $batch)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna, użyje domyślnego)"
+                },
+                "items": {
+                    "type": "array",
+                    "description": "Zadania do utworzenia (pola jak w create_work_item)",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "title": {"type": "string"},
+                            "type": {
+                                "type": "string",
+                                "enum": ["Bug", "Task", "Feature", "User Story", "Epic"]
+                            },
+                            "description": {"type": "string"},
+                            "assignee": {"type": "string"},
+                            "priority": {"type": "integer", "minimum": 1, "maximum": 4},
+                            "area_path": {"type": "string"},
+                            "iteration_path": {"type": "string"},
+                            "tags": {"type": "string"}
+                        },
+                        "required": ["title", "type"]
+                    }
+                }
+            },
+            "required": ["items"]
+        }
+    ),
+    types.Tool(
+        name="bulk_update_work_items",
+        description="Aktualizuj wiele zadań naraz (endpoint $batch)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "description": "Zmiany do zastosowania (pola jak w update_work_item)",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "integer"},
+                            "title": {"type": "string"},
+                            "description": {"type": "string"},
+                            "state": {
+                                "type": "string",
+                                "enum": ["New", "Active", "Resolved", "Closed", "Removed"]
+                            },
+                            "assignee": {"type": "string"},
+                            "comment": {"type": "string"}
+                        },
+                        "required": ["id"]
+                    }
+                }
+            },
+            "required": ["items"]
+        }
+    ),
+    types.Tool(
+        name="run_pipeline",
+        description="Uruchom pipeline CI/CD",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "pipeline_id": {
+                    "type": "integer",
+                    "description": "ID pipeline do uruchomienia"
+                },
+                "branch": {
+                    "type": "string",
+                    "description": "Nazwa branch (domyślnie main)",
+                    "default": "main"
+                },
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna)"
+                },
+                "parameters": {
+                    "type": "object",
+                    "description": "Parametry pipeline (opcjonalne)"
+                }
+            },
+            "required": ["pipeline_id"]
+        }
+    ),
+    types.Tool(
+        name="get_pipeline_runs",
+        description="Pobierz uruchomienia pipeline",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "pipeline_id": {
+                    "type": "integer",
+                    "description": "ID pipeline (opcjonalne, wszystkie jeśli brak)"
+                },
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna)"
+                },
+                "status": {
+                    "type": "string",
+                    "enum": ["inProgress", "completed", "cancelling", "postponed"],
+                    "description": "Filtr statusu (opcjonalny)"
+                },
+                "top": {
+                    "type": "integer",
+                    "description": "Maksymalna liczba wyników",
+                    "default": 10,
+                    "maximum": 50
+                }
+            }
+        }
+    ),
+    types.Tool(
+        name="get_repositories",
+        description="Pobierz listę repozytoriów",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna)"
+                }
+            }
+        }
+    ),
+    types.Tool(
+        name="create_pull_request",
+        description="Utwórz pull request",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "repository_id": {
+                    "type": "string",
+                    "description": "ID repozytorium"
+                },
+                "title": {
+                    "type": "string",
+                    "description": "Tytuł pull requesta"
+                },
+                "description": {
+                    "type": "string",
+                    "description": "Opis pull requesta"
+                },
+                "source_branch": {
+                    "type": "string",
+                    "description": "Branch źródłowy"
+                },
+                "target_branch": {
+                    "type": "string",
+                    "description": "Branch docelowy",
+                    "default": "main"
+                },
+                "reviewers": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Lista reviewerów (email)"
+                },
+                "work_items": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "Lista ID zadań do połączenia"
+                }
+            },
+            "required": ["repository_id", "title", "source_branch"]
+        }
+    ),
+    types.Tool(
+        name="wait_for_run",
+        description="Poczekaj na zakończenie uruchomienia pipeline (bez wielokrotnego odpytywania)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "run_id": {
+                    "type": "integer",
+                    "description": "ID uruchomienia (zwrócone przez run_pipeline)"
+                },
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna)"
+                },
+                "timeout": {
+                    "type": "integer",
+                    "description": "Maks. czas oczekiwania w sekundach",
+                    "default": 300
+                }
+            },
+            "required": ["run_id"]
+        }
+    ),
+    types.Tool(
+        name="get_build_artifacts",
+        description="Pobierz artefakty z buildu",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "build_id": {
+                    "type": "integer",
+                    "description": "ID buildu"
+                },
+                "project": {
+                    "type": "string",
+                    "description": "Nazwa projektu (opcjonalna)"
+                }
+            },
+            "required": ["build_id"]
+        }
+    )
+]
+
+
 class AzureDevOpsMCPServer:
     """Serwer MCP dla integracji z Azure DevOps"""
     
@@ -50,11 +818,102 @@ class AzureDevOpsMCPServer:
         # Przygotuj nagłówki autoryzacji
         self.headers = self._prepare_headers()
         
+        # Śledzenie spanów (OTEL_TRACES_EXPORTER, domyślnie wyłączone)
+        self.tracer = tracer_from_env("azure-devops-mcp")
+        
+        # Metryki (zasób azuredevops://metrics w formacie Prometheus)
+        self.metrics = MetricsRegistry("azure_devops_mcp")
+        self.tool_duration = self.metrics.histogram(
+            "tool_duration_seconds", "Czas wykonania narzędzia MCP", ("tool", "outcome")
+        )
+        self.tools_in_flight = self.metrics.gauge("tools_in_flight", "Wywołania narzędzi w toku", ("tool",))
+        self.tool_bytes_in = self.metrics.counter("tool_request_bytes_total", "Rozmiar argumentów narzędzi (JSON)", ("tool",))
+        self.tool_bytes_out = self.metrics.counter("tool_response_bytes_total", "Rozmiar odpowiedzi narzędzi", ("tool",))
+        self.resource_duration = self.metrics.histogram(
+            "resource_duration_seconds", "Czas odczytu zasobu MCP", ("resource", "outcome")
+        )
+        self.upstream_bytes_out = self.metrics.counter(
+            "upstream_request_bytes_total", "Bajty treści wysłane do Azure DevOps", ("endpoint",)
+        )
+        self.upstream_bytes_in = self.metrics.counter(
+            "upstream_response_bytes_total", "Bajty treści odebrane z Azure DevOps", ("endpoint",)
+        )
+        
+        # Ustawienia puli połączeń HTTP (jedna sesja na cały czas życia serwera)
+        self.api_timeout = float(os.getenv("API_TIMEOUT", "30"))
+        self.pool_limit = int(os.getenv("AZURE_DEVOPS_POOL_LIMIT", "100"))
+        self.pool_limit_per_host = int(os.getenv("AZURE_DEVOPS_POOL_LIMIT_PER_HOST", "20"))
+        self.dns_cache_ttl = int(os.getenv("AZURE_DEVOPS_DNS_TTL", "300"))
+        self.keepalive_timeout = float(os.getenv("AZURE_DEVOPS_KEEPALIVE_TIMEOUT", "60"))
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Cache odpowiedzi narzędzi tylko do odczytu (AZURE_DEVOPS_CACHE_SIZE=0 wyłącza)
+        cache_ttls = {
+            name: float(os.getenv(self._cache_ttl_env_name(name), ttl))
+            for name, ttl in DEFAULT_CACHE_TTLS.items()
+        }
+        self.cache = ResponseCache(cache_ttls, max_size=int(os.getenv("AZURE_DEVOPS_CACHE_SIZE", "512")))
+        
+        # Łączenie identycznych, równoległych odczytów w jedno żądanie
+        self.single_flight = SingleFlight()
+        
+        # Opcjonalna lokalna kopia work items w SQLite (AZURE_DEVOPS_MIRROR_PATH włącza)
+        mirror_path = os.getenv("AZURE_DEVOPS_MIRROR_PATH")
+        self.mirror: Optional[WorkItemMirror] = None
+        if mirror_path:
+            self.mirror = WorkItemMirror(mirror_path, max_age=float(os.getenv("AZURE_DEVOPS_MIRROR_MAX_AGE", "300")))
+        self.mirror_sync_interval = float(os.getenv("AZURE_DEVOPS_MIRROR_SYNC_INTERVAL", "120"))
+        self._mirror_tasks: Dict[str, asyncio.Task] = {}
+        
+        # Obserwator uruchomień pipeline - jedna pętla odpytywania na projekt, powiadomienia o zasobach runs
+        self.watcher = RunWatcher(
+            self._fetch_json, self._notify_resource_updated,
+            min_interval=float(os.getenv("AZURE_DEVOPS_WATCH_MIN_INTERVAL", "5")),
+            max_interval=float(os.getenv("AZURE_DEVOPS_WATCH_MAX_INTERVAL", "60"))
+        )
+        self.max_wait_timeout = float(os.getenv("AZURE_DEVOPS_MAX_WAIT_TIMEOUT", "3600"))
+        # Subskrypcje zasobów (resources/subscribe) i sesja MCP do wysyłania powiadomień
+        self._subscriptions: set = set()
+        self._notify_session = None
+        
+        # Walidatory dla warunkowych GET (If-None-Match) - ponowne użycie sformatowanych odpowiedzi
+        self.conditional = ConditionalStore(max_size=int(os.getenv("AZURE_DEVOPS_ETAG_STORE_SIZE", "256")))
+        
+        # Wspólny harmonogram dla wszystkich żądań REST (limity Azure DevOps)
+        self.scheduler = RateLimitScheduler(
+            rate=float(os.getenv("AZURE_DEVOPS_RATE_LIMIT", "20")),
+            burst=int(os.getenv("AZURE_DEVOPS_RATE_BURST", "40")),
+            write_reserve=float(os.getenv("AZURE_DEVOPS_WRITE_RESERVE", "0.25")),
+            max_retries=int(os.getenv("AZURE_DEVOPS_MAX_RETRIES", "3")),
+            metrics=self.metrics,
+            tracer=self.tracer
+        )
+        
+        self.metrics.register_stats("cache", self.cache.stats)
+        self.metrics.register_stats("conditional", self.conditional.stats)
+        self.metrics.register_stats("scheduler", self.scheduler.stats)
+        self.metrics.register_stats("single_flight", self.single_flight.stats)
+        self.metrics.register_stats("watcher", self.watcher.stats)
+        self.metrics.register_stats("tracing", self.tracer.stats)
+        if self.mirror is not None:
+            self.metrics.register_stats("mirror", self.mirror.stats)
+        
+        # Liczba równoległych żądań workitemsbatch przy stronicowaniu wyników WIQL
+        self.batch_concurrency = int(os.getenv("AZURE_DEVOPS_BATCH_CONCURRENCY", "4"))
+        # Rozmiar paczki dla operacji zbiorczych ($batch, maks. 200)
+        self.bulk_chunk_size = max(1, min(int(os.getenv("AZURE_DEVOPS_BULK_CHUNK_SIZE", "50")), WIT_BATCH_MAX_SIZE))
+        
         # Konfiguruj handlery
         self.setup_handlers()
         
         logger.info(f"Azure DevOps MCP Server zainicjalizowany dla: {self.org_url}")
     
+    @staticmethod
+    def _cache_ttl_env_name(name: str) -> str:
+        """Nazwa zmiennej TTL, np. get_work_item -> AZURE_DEVOPS_CACHE_TTL_GET_WORK_ITEM"""
+        suffix = name.split("://")[-1].replace("-", "_").replace("/", "_").upper()
+        return f"AZURE_DEVOPS_CACHE_TTL_{suffix}"
+    
     def _prepare_headers(self) -> Dict[str, str]:
         """Przygotuj nagłówki HTTP z autoryzacją"""
         headers = {
@@ -70,299 +929,80 @@ class AzureDevOpsMCPServer:
         
         return headers
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Zwróć współdzieloną sesję HTTP (tworzoną leniwie w pętli zdarzeń)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                ttl_dns_cache=self.dns_cache_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+                force_close=False,
+                enable_cleanup_closed=True
+            )
+            # Liczenie bajtów treści żądań i odpowiedzi per endpoint
+            trace = aiohttp.TraceConfig()
+            trace.on_request_chunk_sent.append(self._on_request_chunk_sent)
+            trace.on_response_chunk_received.append(self._on_response_chunk_received)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.api_timeout),
+                headers={"Connection": "keep-alive"},
+                version=aiohttp.HttpVersion11,
+                trace_configs=[trace]
+            )
+            logger.info(
+                f"Utworzono pulę połączeń HTTP (limit={self.pool_limit}, "
+                f"na host={self.pool_limit_per_host}, DNS TTL={self.dns_cache_ttl}s)"
+            )
+        return self._session
+    
+    async def _on_request_chunk_sent(self, session, context, params):
+        self.upstream_bytes_out.inc(len(params.chunk), endpoint=endpoint_label(str(params.url)))
+    
+    async def _on_response_chunk_received(self, session, context, params):
+        self.upstream_bytes_in.inc(len(params.chunk), endpoint=endpoint_label(str(params.url)))
+    
+    async def close(self):
+        """Zamknij współdzieloną sesję HTTP, obserwatora i lokalną kopię"""
+        for task in self._mirror_tasks.values():
+            task.cancel()
+        await self.watcher.close()
+        if self.mirror is not None:
+            self.mirror.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self.tracer.shutdown()
+    
     def setup_handlers(self):
         """Konfiguracja handlerów MCP"""
         
         @self.server.list_tools()
         async def handle_list_tools() -> List[types.Tool]:
-            return [
-                types.Tool(
-                    name="create_work_item",
-                    description="Utwórz nowe zadanie w Azure DevOps",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "title": {
-                                "type": "string",
-                                "description": "Tytuł zadania"
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "Opis zadania (opcjonalny)"
-                            },
-                            "type": {
-                                "type": "string",
-                                "enum": ["Bug", "Task", "Feature", "User Story", "Epic"],
-                                "description": "Typ zadania",
-                                "default": "Task"
-                            },
-                            "assignee": {
-                                "type": "string",
-                                "description": "Email osoby przypisanej (opcjonalny)"
-                            },
-                            "priority": {
-                                "type": "integer",
-                                "minimum": 1,
-                                "maximum": 4,
-                                "description": "Priorytet (1=Najwyższy, 4=Najniższy)",
-                                "default": 2
-                            },
-                            "area_path": {
-                                "type": "string",
-                                "description": "Ścieżka obszaru (opcjonalna)"
-                            },
-                            "iteration_path": {
-                                "type": "string",
-                                "description": "Ścieżka iteracji (opcjonalna)"
-                            },
-                            "tags": {
-                                "type": "string",
-                                "description": "Tagi oddzielone średnikami (opcjonalne)"
-                            }
-                        },
-                        "required": ["title", "type"]
-                    }
-                ),
-                types.Tool(
-                    name="query_work_items",
-                    description="Wyszukaj zadania w Azure DevOps",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "Zapytanie WIQL lub tekst do wyszukania"
-                            },
-                            "project": {
-                                "type": "string",
-                                "description": "Nazwa projektu (opcjonalna, użyje domyślnego)"
-                            },
-                            "top": {
-                                "type": "integer",
-                                "description": "Maksymalna liczba wyników",
-                                "default": 20,
-                                "maximum": 100
-                            }
-                        },
-                        "required": ["query"]
-                    }
-                ),
-                types.Tool(
-                    name="get_work_item",
-                    description="Pobierz szczegóły zadania po ID",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "id": {
-                                "type": "integer",
-                                "description": "ID zadania"
-                            },
-                            "expand": {
-                                "type": "string",
-                                "enum": ["none", "relations", "fields", "links", "all"],
-                                "description": "Dodatkowe informacje do pobrania",
-                                "default": "fields"
-                            }
-                        },
-                        "required": ["id"]
-                    }
-                ),
-                types.Tool(
-                    name="update_work_item",
-                    description="Aktualizuj istniejące zadanie",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "id": {
-                                "type": "integer",
-                                "description": "ID zadania do aktualizacji"
-                            },
-                            "title": {
-                                "type": "string",
-                                "description": "Nowy tytuł (opcjonalny)"
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "Nowy opis (opcjonalny)"
-                            },
-                            "state": {
-                                "type": "string",
-                                "enum": ["New", "Active", "Resolved", "Closed", "Removed"],
-                                "description": "Nowy status (opcjonalny)"
-                            },
-                            "assignee": {
-                                "type": "string",
-                                "description": "Nowa osoba przypisana (opcjonalna)"
-                            },
-                            "comment": {
-                                "type": "string",
-                                "description": "Komentarz do zmiany (opcjonalny)"
-                            }
-                        },
-                        "required": ["id"]
-                    }
-                ),
-                types.Tool(
-                    name="run_pipeline",
-                    description="Uruchom pipeline CI/CD",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "pipeline_id": {
-                                "type": "integer",
-                                "description": "ID pipeline do uruchomienia"
-                            },
-                            "branch": {
-                                "type": "string",
-                                "description": "Nazwa branch (domyślnie main)",
-                                "default": "main"
-                            },
-                            "project": {
-                                "type": "string",
-                                "description": "Nazwa projektu (opcjonalna)"
-                            },
-                            "parameters": {
-                                "type": "object",
-                                "description": "Parametry pipeline (opcjonalne)"
-                            }
-                        },
-                        "required": ["pipeline_id"]
-                    }
-                ),
-                types.Tool(
-                    name="get_pipeline_runs",
-                    description="Pobierz uruchomienia pipeline",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "pipeline_id": {
-                                "type": "integer",
-                                "description": "ID pipeline (opcjonalne, wszystkie jeśli brak)"
-                            },
-                            "project": {
-                                "type": "string",
-                                "description": "Nazwa projektu (opcjonalna)"
-                            },
-                            "status": {
-                                "type": "string",
-                                "enum": ["inProgress", "completed", "cancelling", "postponed"],
-                                "description": "Filtr statusu (opcjonalny)"
-                            },
-                            "top": {
-                                "type": "integer",
-                                "description": "Maksymalna liczba wyników",
-                                "default": 10,
-                                "maximum": 50
-                            }
-                        }
-                    }
-                ),
-                types.Tool(
-                    name="get_repositories",
-                    description="Pobierz listę repozytoriów",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "project": {
-                                "type": "string",
-                                "description": "Nazwa projektu (opcjonalna)"
-                            }
-                        }
-                    }
-                ),
-                types.Tool(
-                    name="create_pull_request",
-                    description="Utwórz pull request",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "repository_id": {
-                                "type": "string",
-                                "description": "ID repozytorium"
-                            },
-                            "title": {
-                                "type": "string",
-                                "description": "Tytuł pull requesta"
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "Opis pull requesta"
-                            },
-                            "source_branch": {
-                                "type": "string",
-                                "description": "Branch źródłowy"
-                            },
-                            "target_branch": {
-                                "type": "string",
-                                "description": "Branch docelowy",
-                                "default": "main"
-                            },
-                            "reviewers": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "Lista reviewerów (email)"
-                            },
-                            "work_items": {
-                                "type": "array",
-                                "items": {"type": "integer"},
-                                "description": "Lista ID zadań do połączenia"
-                            }
-                        },
-                        "required": ["repository_id", "title", "source_branch"]
-                    }
-                ),
-                types.Tool(
-                    name="get_build_artifacts",
-                    description="Pobierz artefakty z buildu",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "build_id": {
-                                "type": "integer",
-                                "description": "ID buildu"
-                            },
-                            "project": {
-                                "type": "string",
-                                "description": "Nazwa projektu (opcjonalna)"
-                            }
-                        },
-                        "required": ["build_id"]
-                    }
-                )
-            ]
+            return TOOLS
         
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> List[types.TextContent]:
             logger.info(f"Wywołanie narzędzia: {name} z argumentami: {arguments}")
+            started = time.perf_counter()
+            outcome = "error"
+            result: List[types.TextContent] = []
+            self.tool_bytes_in.inc(len(json.dumps(arguments, default=str)), tool=name)
             
             try:
-                async with aiohttp.ClientSession() as session:
-                    if name == "create_work_item":
-                        return await self.create_work_item(session, arguments)
-                    elif name == "query_work_items":
-                        return await self.query_work_items(session, arguments)
-                    elif name == "get_work_item":
-                        return await self.get_work_item(session, arguments)
-                    elif name == "update_work_item":
-                        return await self.update_work_item(session, arguments)
-                    elif name == "run_pipeline":
-                        return await self.run_pipeline(session, arguments)
-                    elif name == "get_pipeline_runs":
-                        return await self.get_pipeline_runs(session, arguments)
-                    elif name == "get_repositories":
-                        return await self.get_repositories(session, arguments)
-                    elif name == "create_pull_request":
-                        return await self.create_pull_request(session, arguments)
-                    elif name == "get_build_artifacts":
-                        return await self.get_build_artifacts(session, arguments)
-                    else:
-                        raise ValueError(f"Nieznane narzędzie: {name}")
-            except Exception as e:
-                logger.error(f"Błąd wykonania narzędzia {name}: {e}")
-                return [types.TextContent(
-                    type="text",
-                    text=f"❌ Błąd wykonania narzędzia {name}: {str(e)}"
-                )]
+                with self.tracer.span(f"tools/call {name}", kind="server", traceparent=self._request_traceparent(),
+                                      **{"mcp.tool.name": name}) as span, self.tools_in_flight.track(tool=name):
+                    result, outcome = await self._call_tool(name, arguments)
+                    span.set_attribute("mcp.outcome", outcome)
+                    if outcome == "error":
+                        span.set_error(result[0].text if result else "")
+                return result
+            finally:
+                self.tool_duration.observe(time.perf_counter() - started, tool=name, outcome=outcome)
+                self.tool_bytes_out.inc(sum(len(content.text.encode()) for content in result), tool=name)
+        
         
         @self.server.list_resources()
         async def handle_list_resources() -> List[types.Resource]:
@@ -386,30 +1026,302 @@ class AzureDevOpsMCPServer:
                     uri="azuredevops://repositories",
                     name="Git Repositories",
                     description="Lista repozytoriów Git"
+                ),
+                types.Resource(
+                    uri=METRICS_URI,
+                    name="Server Metrics",
+                    description="Metryki serwera w formacie Prometheus (narzędzia, REST, cache, throttling)",
+                    mimeType="text/plain"
+                )
+            ]
+        
+        @self.server.list_resource_templates()
+        async def handle_list_resource_templates() -> List[types.ResourceTemplate]:
+            return [
+                types.ResourceTemplate(
+                    uriTemplate=f"{RUN_URI_PREFIX}{{id}}",
+                    name="Pipeline Run",
+                    description="Status uruchomienia pipeline (obsługuje subskrypcję zmian)"
                 )
             ]
         
+        @self.server.subscribe_resource()
+        async def handle_subscribe_resource(uri) -> None:
+            self._capture_notify_session()
+            self._subscriptions.add(str(uri))
+            if str(uri).startswith(RUN_URI_PREFIX) and self.project:
+                self.watcher.watch(self.org_url, self.project, self._parse_run_uri(str(uri)))
+        
+        @self.server.unsubscribe_resource()
+        async def handle_unsubscribe_resource(uri) -> None:
+            self._subscriptions.discard(str(uri))
+        
         @self.server.read_resource()
         async def handle_read_resource(uri: str) -> str:
-            async with aiohttp.ClientSession() as session:
-                if uri == "azuredevops://projects":
-                    return await self.get_projects_resource(session)
-                elif uri == "azuredevops://pipelines":
-                    return await self.get_pipelines_resource(session)
-                elif uri == "azuredevops://work-items/active":
-                    return await self.get_active_work_items_resource(session)
-                elif uri == "azuredevops://repositories":
-                    return await self.get_repositories_resource(session)
-                else:
-                    raise ValueError(f"Nieznany zasób: {uri}")
+            uri = str(uri)
+            if uri == METRICS_URI:
+                return self.metrics.render()
+            
+            # Uruchomienia pipeline jako jedna etykieta - identyfikatory nie trafiają do metryk
+            resource = f"{RUN_URI_PREFIX}{{id}}" if uri.startswith(RUN_URI_PREFIX) else uri
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                with self.tracer.span("resources/read", kind="server", traceparent=self._request_traceparent(),
+                                      **{"mcp.resource.uri": resource}) as span:
+                    cached = self.cache.get(uri, {}, self.project)
+                    if cached is not None:
+                        outcome = "cache_hit"
+                        span.set_attribute("mcp.outcome", outcome)
+                        return cached
+                    
+                    session = await self._get_session()
+                    result = await self.single_flight.do(
+                        request_key(uri, {}, self.project),
+                        lambda: self._read_resource(session, uri)
+                    )
+                    # Zasoby zwracają błędy jako tekst - takich odpowiedzi nie cache'ujemy
+                    if not result.startswith(("❌", "⚠️")):
+                        self.cache.put(uri, {}, self.project, result)
+                        outcome = "ok"
+                    else:
+                        span.set_error(result)
+                    span.set_attribute("mcp.outcome", outcome)
+                    return result
+            finally:
+                self.resource_duration.observe(time.perf_counter() - started, resource=resource, outcome=outcome)
+    
+    async def _call_tool(self, name: str, arguments: dict) -> Tuple[List[types.TextContent], str]:
+        """Wykonaj narzędzie (cache, single-flight, unieważnienia); zwraca wynik i rodzaj wyniku dla metryk"""
+        try:
+            project = arguments.get("project", self.project)
+            cached = self.cache.get(name, arguments, project)
+            if cached is not None:
+                logger.debug(f"Cache hit: {name}")
+                return cached, "cache_hit"
+            
+            if name in ("run_pipeline", "wait_for_run"):
+                self._capture_notify_session()
+            
+            session = await self._get_session()
+            if name in READ_ONLY_TOOLS:
+                result = await self.single_flight.do(
+                    request_key(name, arguments, project),
+                    lambda: self._execute_tool(session, name, arguments)
+                )
+            else:
+                result = await self._execute_tool(session, name, arguments)
+            self.cache.put(name, arguments, project, result)
+            self._invalidate_after_write(name, arguments)
+            failed = any(content.text.startswith("❌") for content in result)
+            return result, "error" if failed else "ok"
+        except Exception as e:
+            logger.error(f"Błąd wykonania narzędzia {name}: {e}")
+            return [types.TextContent(
+                type="text",
+                text=f"❌ Błąd wykonania narzędzia {name}: {str(e)}"
+            )], "error"
+    
+    async def _execute_tool(self, session: aiohttp.ClientSession, name: str, arguments: dict) -> List[types.TextContent]:
+        """Wywołaj implementację narzędzia"""
+        if name == "create_work_item":
+            return await self.create_work_item(session, arguments)
+        elif name == "query_work_items":
+            return await self.query_work_items(session, arguments)
+        elif name == "get_work_item":
+            return await self.get_work_item(session, arguments)
+        elif name == "update_work_item":
+            return await self.update_work_item(session, arguments)
+        elif name == "bulk_create_work_items":
+            return await self.bulk_create_work_items(session, arguments)
+        elif name == "bulk_update_work_items":
+            return await self.bulk_update_work_items(session, arguments)
+        elif name == "run_pipeline":
+            return await self.run_pipeline(session, arguments)
+        elif name == "get_pipeline_runs":
+            return await self.get_pipeline_runs(session, arguments)
+        elif name == "get_repositories":
+            return await self.get_repositories(session, arguments)
+        elif name == "create_pull_request":
+            return await self.create_pull_request(session, arguments)
+        elif name == "wait_for_run":
+            return await self.wait_for_run(session, arguments)
+        elif name == "get_build_artifacts":
+            return await self.get_build_artifacts(session, arguments)
+        else:
+            raise ValueError(f"Nieznane narzędzie: {name}")
+    
+    async def _read_resource(self, session: aiohttp.ClientSession, uri: str) -> str:
+        """Odczytaj zasób azuredevops://"""
+        if uri == "azuredevops://projects":
+            return await self.get_projects_resource(session)
+        elif uri == "azuredevops://pipelines":
+            return await self.get_pipelines_resource(session)
+        elif uri == "azuredevops://work-items/active":
+            return await self.get_active_work_items_resource(session)
+        elif uri == "azuredevops://repositories":
+            return await self.get_repositories_resource(session)
+        elif uri.startswith(RUN_URI_PREFIX):
+            return await self.get_run_resource(session, self._parse_run_uri(uri))
+        else:
+            raise ValueError(f"Nieznany zasób: {uri}")
+    
+    def _invalidate_after_write(self, name: str, arguments: dict):
+        """Usuń z cache wpisy, które mogły się zmienić po operacji zapisu"""
+        project = arguments.get("project", self.project)
+        if self.mirror is not None and project and name in (
+            "create_work_item", "update_work_item", "bulk_create_work_items", "bulk_update_work_items"
+        ):
+            self.mirror.mark_stale(project)
+            self._schedule_mirror_sync(project)
+        if name == "create_work_item":
+            self.cache.invalidate("azuredevops://work-items/active")
+        elif name == "update_work_item":
+            self.cache.invalidate("get_work_item", id=arguments.get("id"))
+            self.cache.invalidate("azuredevops://work-items/active")
+        elif name == "bulk_create_work_items":
+            self.cache.invalidate("azuredevops://work-items/active")
+        elif name == "bulk_update_work_items":
+            for item in arguments.get("items", []):
+                self.cache.invalidate("get_work_item", id=item.get("id"))
+            self.cache.invalidate("azuredevops://work-items/active")
+        elif name == "run_pipeline":
+            self.cache.invalidate("get_pipeline_runs", project=project)
+        elif name == "create_pull_request":
+            for wi_id in arguments.get("work_items", []):
+                self.cache.invalidate("get_work_item", id=wi_id)
+    
+    def _request_traceparent(self) -> Optional[str]:
+        """traceparent przekazany przez klienta w params._meta bieżącego żądania MCP"""
+        try:
+            meta = self.server.request_context.meta
+        except LookupError:
+            return None
+        return getattr(meta, "traceparent", None) if meta is not None else None
+    
+    def _capture_notify_session(self):
+        """Zapamiętaj sesję MCP bieżącego żądania - powiadomienia wysyłane są poza kontekstem żądania"""
+        try:
+            self._notify_session = self.server.request_context.session
+        except LookupError:
+            pass
+    
+    async def _notify_resource_updated(self, uri: str):
+        """Wywoływane przez obserwatora przy zmianie statusu uruchomienia"""
+        self.cache.invalidate("get_pipeline_runs")
+        if uri not in self._subscriptions or self._notify_session is None:
+            return
+        try:
+            await self._notify_session.send_resource_updated(uri)
+        except Exception as e:
+            logger.warning(f"Nie udało się wysłać powiadomienia dla {uri}: {e}")
+    
+    @staticmethod
+    def _parse_run_uri(uri: str) -> int:
+        try:
+            return int(uri[len(RUN_URI_PREFIX):].strip("/"))
+        except ValueError:
+            raise ValueError(f"Nieprawidłowy zasób uruchomienia: {uri}")
+    
+    async def _fetch_json(self, url: str) -> Dict[str, Any]:
+        """GET przez harmonogram; zwraca sparsowany JSON"""
+        session = await self._get_session()
+        async with self.scheduler.request(session, "GET", url, headers=self.headers) as response:
+            if response.status != 200:
+                raise AzureDevOpsAPIError("API Error", response.status, await response.text())
+            return await response.json()
+    
+    def _mirror_ready(self, project: Optional[str]) -> bool:
+        """Czy można odpowiedzieć z lokalnej kopii; nieaktualna kopia uruchamia synchronizację w tle"""
+        if self.mirror is None or not project:
+            return False
+        if self.mirror.is_fresh(project):
+            return True
+        self._schedule_mirror_sync(project)
+        return False
+    
+    def _schedule_mirror_sync(self, project: str):
+        task = self._mirror_tasks.get(project)
+        if task is None or task.done():
+            self._mirror_tasks[project] = asyncio.create_task(self._sync_mirror(project))
+    
+    async def _sync_mirror(self, project: str):
+        try:
+            await self.mirror.sync(self.org_url, project, self._fetch_json)
+        except Exception as e:
+            logger.warning(f"Synchronizacja mirror dla {project} nie powiodła się: {e}")
+    
+    async def _mirror_sync_loop(self):
+        """Okresowa synchronizacja przyrostowa domyślnego projektu"""
+        while True:
+            await self._sync_mirror(self.project)
+            await asyncio.sleep(self.mirror_sync_interval)
+    
+    async def _get_revalidated(self, session: aiohttp.ClientSession, url: str,
+                               render: Callable[[Any], Any], error_label: str) -> Any:
+        """GET z rewalidacją: 304 lub niezmieniony `rev` zwraca wcześniej sformatowany wynik"""
+        entry = self.conditional.get(url)
+        headers = self.headers
+        if entry and entry["etag"]:
+            headers = {**self.headers, "If-None-Match": entry["etag"]}
+        
+        async with self.scheduler.request(session, "GET", url, headers=headers) as response:
+            if response.status == 304 and entry:
+                self.conditional.not_modified += 1
+                return entry["rendered"]
+            if response.status != 200:
+                raise AzureDevOpsAPIError(error_label, response.status, await response.text())
+            
+            data = await response.json()
+            rev = data.get("rev") if isinstance(data, dict) else None
+            if entry and rev is not None and entry["rev"] == rev:
+                self.conditional.rev_unchanged += 1
+                rendered = entry["rendered"]
+            else:
+                self.conditional.full_fetches += 1
+                rendered = render(data)
+            self.conditional.put(url, response.headers.get("ETag"), rev, rendered)
+            return rendered
+    
+    # Work Items implementation
+    async def create_work_item(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        project = args.get("project", self.project)
+        if not project:
+            raise ValueError("Projekt nie jest skonfigurowany")
+        
+        work_item_type = args["type"]
+        assignee = args.get("assignee")
+        
+        url = f"{self.org_url}/{project}/_apis/wit/workitems/${work_item_type}?api-version=7.1"
+        
+        operations = self._create_operations(args)
+        
+        headers = {**self.headers, "Content-Type": "application/json-patch+json"}
+        
+        async with self.scheduler.request(session, "POST", url, json=operations, headers=headers) as response:
+            if response.status in [200, 201]:
+                data = await response.json()
+                work_item_id = data['id']
+                work_item_title = data['fields']['System.Title']
+                work_item_url = data['_links']['html']['href']
+                
+                result = f"✅ **Zadanie utworzone pomyślnie!**\n\n"
+                result += f"🆔 **ID:** #{work_item_id}\n"
+                result += f"📋 **Typ:** {work_item_type}\n"
+                result += f"📝 **Tytuł:** {work_item_title}\n"
+                result += f"👤 **Projekt:** {project}\n"
+                if assignee:
+                    result += f"👨‍💼 **Przypisane do:** {assignee}\n"
+                result += f"🔗 **Link:** [Otwórz w Azure DevOps]({work_item_url})\n"
+                
+                return [types.TextContent(type="text", text=result)]
+            else:
+                error_text = await response.text()
+                raise Exception(f"API Error {response.status}: {error_text}")
     
-    # Work Items implementation
-    async def create_work_item(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
-        project = args.get("project", self.project)
-        if not project:
-            raise ValueError("Projekt nie jest skonfigurowany")
-        
-        work_item_type = args["type"]
+    @staticmethod
+    def _create_operations(args: dict) -> List[Dict[str, Any]]:
+        """Operacje JSON Patch dla nowego work item"""
         title = args["title"]
         description = args.get("description", "")
         assignee = args.get("assignee")
@@ -418,8 +1330,6 @@ class AzureDevOpsMCPServer:
         iteration_path = args.get("iteration_path")
         tags = args.get("tags")
         
-        url = f"{self.org_url}/{project}/_apis/wit/workitems/${work_item_type}?api-version=7.1"
-        
         # Przygotuj operacje PATCH
         operations = [
             {
@@ -472,146 +1382,11 @@ class AzureDevOpsMCPServer:
                 "value": tags
             })
         
-        headers = {**self.headers, "Content-Type": "application/json-patch+json"}
-        
-        async with session.post(url, json=operations, headers=headers) as response:
-            if response.status in [200, 201]:
-                data = await response.json()
-                work_item_id = data['id']
-                work_item_title = data['fields']['System.Title']
-                work_item_url = data['_links']['html']['href']
-                
-                result = f"✅ **Zadanie utworzone pomyślnie!**\n\n"
-                result += f"🆔 **ID:** #{work_item_id}\n"
-                result += f"📋 **Typ:** {work_item_type}\n"
-                result += f"📝 **Tytuł:** {work_item_title}\n"
-                result += f"👤 **Projekt:** {project}\n"
-                if assignee:
-                    result += f"👨‍💼 **Przypisane do:** {assignee}\n"
-                result += f"🔗 **Link:** [Otwórz w Azure DevOps]({work_item_url})\n"
-                
-                return [types.TextContent(type="text", text=result)]
-            else:
-                error_text = await response.text()
-                raise Exception(f"API Error {response.status}: {error_text}")
-    
-    async def query_work_items(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
-        query = args["query"]
-        project = args.get("project", self.project)
-        top = args.get("top", 20)
-        
-        # Sprawdź czy to WIQL query czy zwykły tekst
-        if not query.upper().startswith("SELECT"):
-            # Stwórz prosty WIQL query dla wyszukiwania tekstu
-            wiql_query = f"""
-            SELECT [System.Id], [System.Title], [System.State], [System.WorkItemType], [System.AssignedTo]
-            FROM WorkItems
-            WHERE [System.Title] CONTAINS '{query}'
-            {f"AND [System.TeamProject] = '{project}'" if project else ""}
-            ORDER BY [System.ChangedDate] DESC
-            """
-        else:
-            wiql_query = query
-        
-        url = f"{self.org_url}/_apis/wit/wiql?api-version=7.1"
-        
-        wiql_body = {"query": wiql_query}
-        
-        async with session.post(url, json=wiql_body, headers=self.headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                work_items = data.get('workItems', [])
-                
-                if not work_items:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"🔍 **Brak wyników dla zapytania:** '{query}'"
-                    )]
-                
-                # Pobierz szczegóły zadań (maksymalnie 'top' elementów)
-                ids = [str(wi['id']) for wi in work_items[:top]]
-                details_url = f"{self.org_url}/_apis/wit/workitems?ids={','.join(ids)}&$expand=fields&api-version=7.1"
-                
-                async with session.get(details_url, headers=self.headers) as details_response:
-                    if details_response.status == 200:
-                        details_data = await details_response.json()
-                        
-                        result = f"🔍 **Wyniki wyszukiwania:** '{query}'\n"
-                        result += f"📊 **Znaleziono:** {len(details_data['value'])} zadań\n\n"
-                        
-                        for item in details_data['value']:
-                            fields = item['fields']
-                            item_id = item['id']
-                            title = fields.get('System.Title', 'Brak tytułu')
-                            state = fields.get('System.State', 'Unknown')
-                            work_item_type = fields.get('System.WorkItemType', 'Unknown')
-                            assignee = fields.get('System.AssignedTo', {}).get('displayName', 'Nieprzypisane')
-                            
-                            state_icon = {
-                                'New': '🆕', 'Active': '🔄', 'Resolved': '✅', 
-                                'Closed': '✅', 'Removed': '🗑️'
-                            }.get(state, '📋')
-                            
-                            result += f"{state_icon} **#{item_id}** - {title}\n"
-                            result += f"   📂 **Typ:** {work_item_type} | 📊 **Status:** {state} | 👤 **Przypisane:** {assignee}\n\n"
-                        
-                        return [types.TextContent(type="text", text=result)]
-                    else:
-                        raise Exception(f"Error getting work item details: {details_response.status}")
-            else:
-                error_text = await response.text()
-                raise Exception(f"WIQL Query Error {response.status}: {error_text}")
-    
-    async def get_work_item(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
-        work_item_id = args["id"]
-        expand = args.get("expand", "fields")
-        
-        url = f"{self.org_url}/_apis/wit/workitems/{work_item_id}?$expand={expand}&api-version=7.1"
-        
-        async with session.get(url, headers=self.headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                fields = data['fields']
-                
-                title = fields.get('System.Title', 'Brak tytułu')
-                state = fields.get('System.State', 'Unknown')
-                work_item_type = fields.get('System.WorkItemType', 'Unknown')
-                created_date = fields.get('System.CreatedDate', '')
-                changed_date = fields.get('System.ChangedDate', '')
-                created_by = fields.get('System.CreatedBy', {}).get('displayName', 'Unknown')
-                assignee = fields.get('System.AssignedTo', {}).get('displayName', 'Nieprzypisane')
-                description = fields.get('System.Description', 'Brak opisu')
-                tags = fields.get('System.Tags', '')
-                
-                result = f"📋 **Szczegóły zadania #{work_item_id}**\n\n"
-                result += f"📝 **Tytuł:** {title}\n"
-                result += f"📂 **Typ:** {work_item_type}\n"
-                result += f"📊 **Status:** {state}\n"
-                result += f"👤 **Przypisane do:** {assignee}\n"
-                result += f"👨‍💻 **Utworzone przez:** {created_by}\n"
-                result += f"📅 **Data utworzenia:** {created_date[:10] if created_date else 'Unknown'}\n"
-                result += f"🔄 **Ostatnia zmiana:** {changed_date[:10] if changed_date else 'Unknown'}\n"
-                
-                if tags:
-                    result += f"🏷️ **Tagi:** {tags}\n"
-                
-                result += f"\n📄 **Opis:**\n{description}\n"
-                
-                if '_links' in data:
-                    html_link = data['_links'].get('html', {}).get('href', '')
-                    if html_link:
-                        result += f"\n🔗 **Link:** [Otwórz w Azure DevOps]({html_link})"
-                
-                return [types.TextContent(type="text", text=result)]
-            else:
-                error_text = await response.text()
-                raise Exception(f"Work Item Get Error {response.status}: {error_text}")
+        return operations
     
-    async def update_work_item(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
-        work_item_id = args["id"]
-        
-        url = f"{self.org_url}/_apis/wit/workitems/{work_item_id}?api-version=7.1"
-        
+    @staticmethod
+    def _update_operations(args: dict) -> List[Dict[str, Any]]:
+        """Operacje JSON Patch dla aktualizacji work item"""
         operations = []
         
         # Przygotuj operacje aktualizacji
@@ -650,12 +1425,229 @@ class AzureDevOpsMCPServer:
                 "value": args["comment"]
             })
         
+        return operations
+    
+    async def query_work_items(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        query = args["query"]
+        project = args.get("project", self.project)
+        top = max(1, min(int(args.get("top", 20)), QUERY_MAX_PAGE_SIZE))
+        
+        # Sprawdź czy to WIQL query czy zwykły tekst
+        if not query.upper().startswith("SELECT"):
+            # Stwórz prosty WIQL query dla wyszukiwania tekstu
+            wiql_query = f"""
+            SELECT [System.Id], [System.Title], [System.State], [System.WorkItemType], [System.AssignedTo]
+            FROM WorkItems
+            WHERE [System.Title] CONTAINS '{query}'
+            {f"AND [System.TeamProject] = '{project}'" if project else ""}
+            ORDER BY [System.ChangedDate] DESC
+            """
+        else:
+            wiql_query = query
+        
+        offset, source = self._decode_cursor(args.get("cursor"), wiql_query)
+        
+        # Wyszukiwanie tekstowe z lokalnej kopii (jeśli jest aktualna). Kolejne strony zawsze z tego samego
+        # źródła co pierwsza - kopia i WIQL dopasowują inaczej, więc zmiana źródła pomijałaby lub powtarzała zadania
+        if args.get("cursor"):
+            use_mirror = source == "mirror"
+            if use_mirror and (self.mirror is None or not project):
+                raise ValueError("Cursor pochodzi z lokalnej kopii, która jest niedostępna - zacznij od pierwszej strony")
+        else:
+            use_mirror = not query.upper().startswith("SELECT") and self._mirror_ready(project)
+        
+        if use_mirror:
+            total, items = await asyncio.to_thread(self.mirror.search, project, query, offset, top)
+            if not total:
+                return [types.TextContent(
+                    type="text",
+                    text=f"🔍 **Brak wyników dla zapytania:** '{query}'"
+                )]
+            rows = [self._format_work_item_row(item) for item in items]
+            return self._format_query_page(query, wiql_query, offset, total, rows, source="mirror")
+        
+        url = f"{self.org_url}/_apis/wit/wiql?api-version=7.1"
+        
+        wiql_body = {"query": wiql_query}
+        
+        async with self.scheduler.request(session, "POST", url, read=True, json=wiql_body, headers=self.headers) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"WIQL Query Error {response.status}: {error_text}")
+            data = await response.json()
+        
+        work_items = data.get('workItems', [])
+        
+        if not work_items:
+            return [types.TextContent(
+                type="text",
+                text=f"🔍 **Brak wyników dla zapytania:** '{query}'"
+            )]
+        
+        # Pobierz szczegóły tylko dla bieżącej strony
+        page_ids = [wi['id'] for wi in work_items[offset:offset + top]]
+        
+        rows = []
+        fields = args.get("fields") or QUERY_DEFAULT_FIELDS
+        async for items in self._iter_work_items_batched(session, page_ids, fields):
+            rows.extend(self._format_work_item_row(item) for item in items)
+        
+        return self._format_query_page(query, wiql_query, offset, len(work_items), rows)
+    
+    def _format_query_page(self, query: str, wiql_query: str, offset: int, total: int,
+                           rows: List[str], source: str = "wiql") -> List[types.TextContent]:
+        next_offset = offset + len(rows)
+        
+        result = f"🔍 **Wyniki wyszukiwania:** '{query}'\n"
+        result += f"📊 **Znaleziono:** {total} zadań"
+        if total > len(rows):
+            result += f" (pozycje {offset + 1}-{next_offset})"
+        result += "\n\n"
+        result += "".join(rows)
+        
+        if next_offset < total:
+            result += f"➡️ **Następna strona:** cursor=`{self._encode_cursor(next_offset, wiql_query, source)}`\n"
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    @staticmethod
+    def _query_fingerprint(wiql_query: str) -> str:
+        return hashlib.sha1(" ".join(wiql_query.split()).encode()).hexdigest()[:12]
+    
+    def _encode_cursor(self, offset: int, wiql_query: str, source: str = "wiql") -> str:
+        """Token kontynuacji: offset w wynikach, odcisk zapytania i źródło (wiql / mirror)"""
+        payload = json.dumps({"o": offset, "q": self._query_fingerprint(wiql_query), "s": source})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+    
+    def _decode_cursor(self, cursor: Optional[str], wiql_query: str) -> Tuple[int, str]:
+        if not cursor:
+            return 0, "wiql"
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            offset = int(payload["o"])
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Nieprawidłowy cursor")
+        if payload.get("q") != self._query_fingerprint(wiql_query):
+            raise ValueError("Cursor nie pasuje do zapytania")
+        return max(0, offset), payload.get("s", "wiql")
+    
+    async def _iter_work_items_batched(self, session: aiohttp.ClientSession, ids: List[int],
+                                       fields: Optional[List[str]] = None) -> AsyncIterator[List[dict]]:
+        """Pobiera work items paczkami po ≤200 ID (równolegle) i zwraca je w kolejności ID"""
+        semaphore = asyncio.Semaphore(max(1, self.batch_concurrency))
+        url = f"{self.org_url}/_apis/wit/workitemsbatch?api-version=7.1"
+        
+        async def fetch(chunk: List[int]) -> List[dict]:
+            body = {"ids": chunk, "errorPolicy": "omit"}
+            if fields:
+                body["fields"] = fields
+            else:
+                body["$expand"] = "fields"
+            async with semaphore:
+                async with self.scheduler.request(session, "POST", url, read=True, json=body, headers=self.headers) as response:
+                    if response.status != 200:
+                        raise AzureDevOpsAPIError("Error getting work item details", response.status, await response.text())
+                    data = await response.json()
+            # errorPolicy=omit zwraca null dla usuniętych / niedostępnych elementów
+            return [item for item in data.get('value', []) if item]
+        
+        tasks = [
+            asyncio.ensure_future(fetch(ids[i:i + WORK_ITEMS_BATCH_SIZE]))
+            for i in range(0, len(ids), WORK_ITEMS_BATCH_SIZE)
+        ]
+        try:
+            for task in tasks:
+                yield await task
+        finally:
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    task.exception()  # oznacz wyjątek jako odebrany
+                else:
+                    task.cancel()
+    
+    @staticmethod
+    def _format_work_item_row(item: dict) -> str:
+        fields = item['fields']
+        item_id = item['id']
+        title = fields.get('System.Title', 'Brak tytułu')
+        state = fields.get('System.State', 'Unknown')
+        work_item_type = fields.get('System.WorkItemType', 'Unknown')
+        assignee = fields.get('System.AssignedTo', {}).get('displayName', 'Nieprzypisane')
+        
+        state_icon = {
+            'New': '🆕', 'Active': '🔄', 'Resolved': '✅', 
+            'Closed': '✅', 'Removed': '🗑️'
+        }.get(state, '📋')
+        
+        row = f"{state_icon} **#{item_id}** - {title}\n"
+        row += f"   📂 **Typ:** {work_item_type} | 📊 **Status:** {state} | 👤 **Przypisane:** {assignee}\n\n"
+        return row
+    
+    async def get_work_item(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        work_item_id = args["id"]
+        expand = args.get("expand", "fields")
+        fields = args.get("fields")
+        
+        # REST API nie pozwala łączyć fields= z $expand - projekcja ma pierwszeństwo dla expand=fields/none
+        if fields or expand in ("fields", "none"):
+            projection = ",".join(fields or WORK_ITEM_DEFAULT_FIELDS)
+            url = f"{self.org_url}/_apis/wit/workitems/{work_item_id}?fields={quote(projection)}&api-version=7.1"
+        else:
+            url = f"{self.org_url}/_apis/wit/workitems/{work_item_id}?$expand={expand}&api-version=7.1"
+        
+        return await self._get_revalidated(
+            session, url,
+            lambda data: self._format_work_item(work_item_id, data),
+            "Work Item Get Error"
+        )
+    
+    def _format_work_item(self, work_item_id: int, data: dict) -> List[types.TextContent]:
+        fields = data['fields']
+        
+        title = fields.get('System.Title', 'Brak tytułu')
+        state = fields.get('System.State', 'Unknown')
+        work_item_type = fields.get('System.WorkItemType', 'Unknown')
+        created_date = fields.get('System.CreatedDate', '')
+        changed_date = fields.get('System.ChangedDate', '')
+        created_by = fields.get('System.CreatedBy', {}).get('displayName', 'Unknown')
+        assignee = fields.get('System.AssignedTo', {}).get('displayName', 'Nieprzypisane')
+        description = fields.get('System.Description', 'Brak opisu')
+        tags = fields.get('System.Tags', '')
+        
+        result = f"📋 **Szczegóły zadania #{work_item_id}**\n\n"
+        result += f"📝 **Tytuł:** {title}\n"
+        result += f"📂 **Typ:** {work_item_type}\n"
+        result += f"📊 **Status:** {state}\n"
+        result += f"👤 **Przypisane do:** {assignee}\n"
+        result += f"👨‍💻 **Utworzone przez:** {created_by}\n"
+        result += f"📅 **Data utworzenia:** {created_date[:10] if created_date else 'Unknown'}\n"
+        result += f"🔄 **Ostatnia zmiana:** {changed_date[:10] if changed_date else 'Unknown'}\n"
+        
+        if tags:
+            result += f"🏷️ **Tagi:** {tags}\n"
+        
+        result += f"\n📄 **Opis:**\n{description}\n"
+        
+        if '_links' in data:
+            html_link = data['_links'].get('html', {}).get('href', '')
+            if html_link:
+                result += f"\n🔗 **Link:** [Otwórz w Azure DevOps]({html_link})"
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def update_work_item(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        work_item_id = args["id"]
+        
+        url = f"{self.org_url}/_apis/wit/workitems/{work_item_id}?api-version=7.1"
+        
+        operations = self._update_operations(args)
+        
         if not operations:
             raise ValueError("Brak zmian do zastosowania")
         
         headers = {**self.headers, "Content-Type": "application/json-patch+json"}
         
-        async with session.patch(url, json=operations, headers=headers) as response:
+        async with self.scheduler.request(session, "PATCH", url, json=operations, headers=headers) as response:
             if response.status == 200:
                 data = await response.json()
                 
@@ -673,6 +1665,105 @@ class AzureDevOpsMCPServer:
                 error_text = await response.text()
                 raise Exception(f"Work Item Update Error {response.status}: {error_text}")
     
+    async def bulk_create_work_items(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        project = args.get("project", self.project)
+        if not project:
+            raise ValueError("Projekt nie jest skonfigurowany")
+        items = args.get("items", [])
+        if not items:
+            raise ValueError("Brak zadań do utworzenia")
+        
+        requests = [
+            {
+                "method": "PATCH",
+                "uri": f"/{quote(project)}/_apis/wit/workitems/${quote(item['type'])}?api-version=7.1",
+                "headers": {"Content-Type": "application/json-patch+json"},
+                "body": self._create_operations(item)
+            }
+            for item in items
+        ]
+        outcomes = await self._run_wit_batch(session, requests)
+        
+        created = sum(1 for ok, _ in outcomes if ok)
+        result = f"📦 **Utworzono {created}/{len(items)} zadań** (projekt: {project})\n\n"
+        for item, (ok, payload) in zip(items, outcomes):
+            if ok:
+                result += f"✅ **#{payload.get('id')}** - {item['title']}\n"
+            else:
+                result += f"❌ {item['title']}: {payload}\n"
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def bulk_update_work_items(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        items = args.get("items", [])
+        if not items:
+            raise ValueError("Brak zadań do aktualizacji")
+        
+        requests = []
+        for item in items:
+            if "id" not in item:
+                raise ValueError("Każde zadanie do aktualizacji wymaga pola id")
+            operations = self._update_operations(item)
+            if not operations:
+                raise ValueError(f"Brak zmian do zastosowania dla zadania #{item['id']}")
+            requests.append({
+                "method": "PATCH",
+                "uri": f"/_apis/wit/workitems/{item['id']}?api-version=7.1",
+                "headers": {"Content-Type": "application/json-patch+json"},
+                "body": operations
+            })
+        outcomes = await self._run_wit_batch(session, requests)
+        
+        updated = sum(1 for ok, _ in outcomes if ok)
+        result = f"📦 **Zaktualizowano {updated}/{len(items)} zadań**\n\n"
+        for item, (ok, payload) in zip(items, outcomes):
+            if ok:
+                state = payload.get('fields', {}).get('System.State', '')
+                result += f"✅ **#{item['id']}**" + (f" | 📊 **Status:** {state}" if state else "") + "\n"
+            else:
+                result += f"❌ **#{item['id']}**: {payload}\n"
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def _run_wit_batch(self, session: aiohttp.ClientSession,
+                             requests: List[Dict[str, Any]]) -> List[Tuple[bool, Any]]:
+        """Wyślij operacje przez _apis/wit/$batch w paczkach; zwraca (sukces, work item lub błąd) per operacja"""
+        url = f"{self.org_url}/_apis/wit/$batch?api-version=7.1"
+        semaphore = asyncio.Semaphore(max(1, self.batch_concurrency))
+        
+        async def send(chunk: List[Dict[str, Any]]) -> List[Tuple[bool, Any]]:
+            try:
+                async with semaphore:
+                    async with self.scheduler.request(session, "POST", url, json=chunk, headers=self.headers) as response:
+                        if response.status != 200:
+                            raise AzureDevOpsAPIError("Work Items Batch Error", response.status, await response.text())
+                        data = await response.json()
+            except Exception as e:
+                return [(False, str(e))] * len(chunk)
+            
+            outcomes = []
+            for entry in data.get("value", []):
+                body = entry.get("body")
+                if isinstance(body, str):
+                    try:
+                        body = json.loads(body)
+                    except ValueError:
+                        pass
+                if entry.get("code") in (200, 201):
+                    outcomes.append((True, body))
+                else:
+                    message = body
+                    if isinstance(body, dict):
+                        message = (body.get("value") or {}).get("Message") or body.get("message") or body
+                    outcomes.append((False, f"HTTP {entry.get('code')}: {message}"))
+            # Brakujące odpowiedzi traktujemy jako błędy, aby zachować zgodność indeksów
+            outcomes.extend([(False, "Brak odpowiedzi w $batch")] * (len(chunk) - len(outcomes)))
+            return outcomes
+        
+        chunks = [requests[i:i + self.bulk_chunk_size] for i in range(0, len(requests), self.bulk_chunk_size)]
+        results = await asyncio.gather(*(send(chunk) for chunk in chunks))
+        return [outcome for chunk_outcomes in results for outcome in chunk_outcomes]
+    
     # Pipelines implementation
     async def run_pipeline(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
         pipeline_id = args["pipeline_id"]
@@ -698,12 +1789,13 @@ class AzureDevOpsMCPServer:
         if parameters:
             body["templateParameters"] = parameters
         
-        async with session.post(url, json=body, headers=self.headers) as response:
+        async with self.scheduler.request(session, "POST", url, json=body, headers=self.headers) as response:
             if response.status in [200, 201]:
                 data = await response.json()
                 run_id = data['id']
                 pipeline_name = data['pipeline']['name']
                 run_url = data['_links']['web']['href']
+                self.watcher.watch(self.org_url, project, run_id)
                 
                 result = f"🚀 **Pipeline uruchomiony!**\n\n"
                 result += f"🆔 **Run ID:** {run_id}\n"
@@ -711,7 +1803,8 @@ class AzureDevOpsMCPServer:
                 result += f"🌿 **Branch:** {branch}\n"
                 result += f"👤 **Projekt:** {project}\n"
                 result += f"📊 **Status:** {data.get('state', 'Unknown')}\n"
-                result += f"🔗 **Link:** [Zobacz w Azure DevOps]({run_url})"
+                result += f"🔗 **Link:** [Zobacz w Azure DevOps]({run_url})\n"
+                result += f"🔔 **Obserwowany zasób:** {run_uri(run_id)} (lub użyj wait_for_run)"
                 
                 return [types.TextContent(type="text", text=result)]
             else:
@@ -740,43 +1833,88 @@ class AzureDevOpsMCPServer:
         
         url += "&".join(params)
         
-        async with session.get(url, headers=self.headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                runs = data.get('value', [])
-                
-                if not runs:
-                    return [types.TextContent(
-                        type="text",
-                        text="📊 **Brak uruchomień pipeline do wyświetlenia**"
-                    )]
-                
-                result = f"📊 **Pipeline Runs** ({'wszystkie' if not pipeline_id else f'pipeline {pipeline_id}'})\n\n"
-                
-                for run in runs:
-                    run_id = run.get('id', 'Unknown')
-                    pipeline_name = run.get('definition', {}).get('name', 'Unknown')
-                    status = run.get('status', run.get('state', 'Unknown'))
-                    result_status = run.get('result', 'Unknown')
-                    start_time = run.get('startTime', run.get('queueTime', ''))
-                    
-                    status_icon = {
-                        'inProgress': '🔄', 'completed': '✅', 'cancelling': '⏹️',
-                        'succeeded': '✅', 'failed': '❌', 'canceled': '⏹️'
-                    }.get(status.lower(), '📋')
-                    
-                    result += f"{status_icon} **#{run_id}** - {pipeline_name}\n"
-                    result += f"   📊 **Status:** {status}"
-                    if result_status != 'Unknown':
-                        result += f" | 🎯 **Result:** {result_status}"
-                    if start_time:
-                        result += f" | 🕐 **Start:** {start_time[:16]}"
-                    result += "\n\n"
-                
-                return [types.TextContent(type="text", text=result)]
-            else:
-                error_text = await response.text()
-                raise Exception(f"Pipeline Runs Error {response.status}: {error_text}")
+        return await self._get_revalidated(
+            session, url,
+            lambda data: self._format_pipeline_runs(pipeline_id, data),
+            "Pipeline Runs Error"
+        )
+    
+    def _format_pipeline_runs(self, pipeline_id: Optional[int], data: dict) -> List[types.TextContent]:
+        runs = data.get('value', [])
+        
+        if not runs:
+            return [types.TextContent(
+                type="text",
+                text="📊 **Brak uruchomień pipeline do wyświetlenia**"
+            )]
+        
+        result = f"📊 **Pipeline Runs** ({'wszystkie' if not pipeline_id else f'pipeline {pipeline_id}'})\n\n"
+        
+        for run in runs:
+            run_id = run.get('id', 'Unknown')
+            pipeline_name = run.get('definition', {}).get('name', 'Unknown')
+            status = run.get('status', run.get('state', 'Unknown'))
+            result_status = run.get('result', 'Unknown')
+            start_time = run.get('startTime', run.get('queueTime', ''))
+            
+            status_icon = {
+                'inProgress': '🔄', 'completed': '✅', 'cancelling': '⏹️',
+                'succeeded': '✅', 'failed': '❌', 'canceled': '⏹️'
+            }.get(status.lower(), '📋')
+            
+            result += f"{status_icon} **#{run_id}** - {pipeline_name}\n"
+            result += f"   📊 **Status:** {status}"
+            if result_status != 'Unknown':
+                result += f" | 🎯 **Result:** {result_status}"
+            if start_time:
+                result += f" | 🕐 **Start:** {start_time[:16]}"
+            result += "\n\n"
+        
+        return [types.TextContent(type="text", text=result)]
+    
+    async def wait_for_run(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
+        run_id = int(args["run_id"])
+        project = args.get("project", self.project)
+        timeout = max(0, min(float(args.get("timeout", 300)), self.max_wait_timeout))
+        
+        if not project:
+            raise ValueError("Projekt nie jest skonfigurowany")
+        
+        completed, run = await self.watcher.wait(self.org_url, project, run_id, timeout)
+        if run is None:
+            if completed:
+                return [types.TextContent(type="text", text=f"❌ **Nie znaleziono uruchomienia #{run_id}**")]
+            return [types.TextContent(type="text", text=f"⏳ **Uruchomienie #{run_id} nie zakończyło się w {int(timeout)}s**")]
+        
+        result = self._format_run(run)
+        if not completed:
+            result = f"⏳ **Uruchomienie nie zakończyło się w {int(timeout)}s**\n\n" + result
+        return [types.TextContent(type="text", text=result)]
+    
+    @staticmethod
+    def _format_run(run: dict) -> str:
+        status = run.get('status', 'Unknown')
+        result_status = run.get('result')
+        icon = {'succeeded': '✅', 'failed': '❌', 'canceled': '⏹️', 'partiallySucceeded': '⚠️'}.get(
+            result_status, '🔄' if status != 'completed' else '📋'
+        )
+        
+        result = f"{icon} **Run #{run.get('id')}** - {run.get('definition', {}).get('name', 'Unknown')}\n"
+        result += f"📊 **Status:** {status}"
+        if result_status:
+            result += f" | 🎯 **Result:** {result_status}"
+        result += "\n"
+        if run.get('sourceBranch'):
+            result += f"🌿 **Branch:** {run['sourceBranch'].replace('refs/heads/', '')}\n"
+        if run.get('startTime'):
+            result += f"🕐 **Start:** {run['startTime'][:16]}"
+            if run.get('finishTime'):
+                result += f" | 🏁 **Koniec:** {run['finishTime'][:16]}"
+            result += "\n"
+        web = run.get('_links', {}).get('web', {}).get('href')
+        if web:
+            result += f"🔗 **Link:** [Zobacz w Azure DevOps]({web})\n"
+        return result
     
     # Repositories implementation
     async def get_repositories(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
@@ -787,38 +1925,39 @@ class AzureDevOpsMCPServer:
         else:
             url = f"{self.org_url}/_apis/git/repositories?api-version=7.1"
         
-        async with session.get(url, headers=self.headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                repos = data.get('value', [])
-                
-                if not repos:
-                    return [types.TextContent(
-                        type="text",
-                        text="📂 **Brak repozytoriów do wyświetlenia**"
-                    )]
-                
-                result = f"📂 **Repozytoria Git** {f'(projekt: {project})' if project else '(wszystkie)'}\n\n"
-                
-                for repo in repos:
-                    name = repo.get('name', 'Unknown')
-                    repo_id = repo.get('id', 'Unknown')
-                    default_branch = repo.get('defaultBranch', 'refs/heads/main').replace('refs/heads/', '')
-                    web_url = repo.get('webUrl', '')
-                    size = repo.get('size', 0)
-                    
-                    result += f"📦 **{name}** (ID: {repo_id[:8]}...)\n"
-                    result += f"   🌿 **Default Branch:** {default_branch}\n"
-                    if size > 0:
-                        result += f"   📏 **Size:** {size} bytes\n"
-                    if web_url:
-                        result += f"   🔗 **URL:** [Otwórz repo]({web_url})\n"
-                    result += "\n"
-                
-                return [types.TextContent(type="text", text=result)]
-            else:
-                error_text = await response.text()
-                raise Exception(f"Repositories Error {response.status}: {error_text}")
+        return await self._get_revalidated(
+            session, url,
+            lambda data: self._format_repositories(project, data),
+            "Repositories Error"
+        )
+    
+    def _format_repositories(self, project: Optional[str], data: dict) -> List[types.TextContent]:
+        repos = data.get('value', [])
+        
+        if not repos:
+            return [types.TextContent(
+                type="text",
+                text="📂 **Brak repozytoriów do wyświetlenia**"
+            )]
+        
+        result = f"📂 **Repozytoria Git** {f'(projekt: {project})' if project else '(wszystkie)'}\n\n"
+        
+        for repo in repos:
+            name = repo.get('name', 'Unknown')
+            repo_id = repo.get('id', 'Unknown')
+            default_branch = repo.get('defaultBranch', 'refs/heads/main').replace('refs/heads/', '')
+            web_url = repo.get('webUrl', '')
+            size = repo.get('size', 0)
+            
+            result += f"📦 **{name}** (ID: {repo_id[:8]}...)\n"
+            result += f"   🌿 **Default Branch:** {default_branch}\n"
+            if size > 0:
+                result += f"   📏 **Size:** {size} bytes\n"
+            if web_url:
+                result += f"   🔗 **URL:** [Otwórz repo]({web_url})\n"
+            result += "\n"
+        
+        return [types.TextContent(type="text", text=result)]
     
     async def create_pull_request(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
         repository_id = args["repository_id"]
@@ -842,16 +1981,20 @@ class AzureDevOpsMCPServer:
         if reviewers:
             body["reviewers"] = [{"id": email} for email in reviewers]
         
-        async with session.post(url, json=body, headers=self.headers) as response:
+        # Zadania są łączone przy tworzeniu PR (workItemRefs) - API nie ma osobnego endpointu do linkowania
+        if work_items:
+            body["workItemRefs"] = [{"id": str(wi_id)} for wi_id in work_items]
+        
+        async with self.scheduler.request(session, "POST", url, json=body, headers=self.headers) as response:
             if response.status in [200, 201]:
                 data = await response.json()
                 pr_id = data['pullRequestId']
                 pr_url = data['_links']['web']['href']
                 
-                # Połącz z work items jeśli podano
+                # Sprawdź, które zadania faktycznie zostały połączone z PR
+                link_results = []
                 if work_items:
-                    for wi_id in work_items:
-                        await self._link_work_item_to_pr(session, repository_id, pr_id, wi_id)
+                    link_results = await self._check_pr_work_items(session, repository_id, pr_id, work_items)
                 
                 result = f"🔄 **Pull Request utworzony!**\n\n"
                 result += f"🆔 **PR ID:** #{pr_id}\n"
@@ -859,8 +2002,13 @@ class AzureDevOpsMCPServer:
                 result += f"🌿 **Branch:** {source_branch} → {target_branch}\n"
                 if reviewers:
                     result += f"👥 **Reviewers:** {', '.join(reviewers)}\n"
-                if work_items:
-                    result += f"📋 **Połączone zadania:** {', '.join(map(str, work_items))}\n"
+                if link_results:
+                    linked = [str(wi_id) for wi_id, ok, _ in link_results if ok]
+                    failed = [(wi_id, error) for wi_id, ok, error in link_results if not ok]
+                    if linked:
+                        result += f"📋 **Połączone zadania:** {', '.join(linked)}\n"
+                    for wi_id, error in failed:
+                        result += f"⚠️ **Nie połączono zadania #{wi_id}:** {error}\n"
                 result += f"🔗 **Link:** [Otwórz PR]({pr_url})"
                 
                 return [types.TextContent(type="text", text=result)]
@@ -868,13 +2016,30 @@ class AzureDevOpsMCPServer:
                 error_text = await response.text()
                 raise Exception(f"Pull Request Error {response.status}: {error_text}")
     
-    async def _link_work_item_to_pr(self, session: aiohttp.ClientSession, repo_id: str, pr_id: int, work_item_id: int):
-        """Pomocnicza metoda do łączenia work item z PR"""
-        url = f"{self.org_url}/_apis/git/repositories/{repo_id}/pullRequests/{pr_id}/workitems/{work_item_id}?api-version=7.1"
+    async def _check_pr_work_items(self, session: aiohttp.ClientSession, repo_id: str, pr_id: int,
+                                   work_items: List[int]) -> List[Tuple[int, bool, str]]:
+        """Pomocnicza metoda sprawdzająca połączenia PR z work items; zwraca listę (ID, sukces, opis błędu)"""
+        url = f"{self.org_url}/_apis/git/repositories/{repo_id}/pullRequests/{pr_id}/workitems?api-version=7.1"
+        
+        try:
+            async with self.scheduler.request(session, "GET", url, headers=self.headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    linked = {str(ref.get("id")) for ref in data.get("value", [])}
+                    results = []
+                    for wi_id in work_items:
+                        if str(wi_id) in linked:
+                            results.append((wi_id, True, ""))
+                        else:
+                            logger.warning(f"Work item {wi_id} nie został połączony z PR {pr_id}")
+                            results.append((wi_id, False, "zadanie nie zostało połączone z PR"))
+                    return results
+                error = f"HTTP {response.status}"
+        except Exception as e:
+            error = str(e)
         
-        async with session.patch(url, headers=self.headers) as response:
-            if response.status not in [200, 201]:
-                logger.warning(f"Nie udało się połączyć work item {work_item_id} z PR {pr_id}")
+        logger.warning(f"Nie udało się sprawdzić zadań połączonych z PR {pr_id}: {error}")
+        return [(wi_id, False, f"nie można potwierdzić połączenia ({error})") for wi_id in work_items]
     
     async def get_build_artifacts(self, session: aiohttp.ClientSession, args: dict) -> List[types.TextContent]:
         build_id = args["build_id"]
@@ -885,7 +2050,7 @@ class AzureDevOpsMCPServer:
         
         url = f"{self.org_url}/{project}/_apis/build/builds/{build_id}/artifacts?api-version=7.1"
         
-        async with session.get(url, headers=self.headers) as response:
+        async with self.scheduler.request(session, "GET", url, headers=self.headers) as response:
             if response.status == 200:
                 data = await response.json()
                 artifacts = data.get('value', [])
@@ -918,7 +2083,7 @@ class AzureDevOpsMCPServer:
         url = f"{self.org_url}/_apis/projects?api-version=7.1"
         
         try:
-            async with session.get(url, headers=self.headers) as response:
+            async with self.scheduler.request(session, "GET", url, headers=self.headers) as response:
                 if response.status == 200:
                     data = await response.json()
                     projects = [p["name"] for p in data.get("value", [])]
@@ -934,14 +2099,14 @@ class AzureDevOpsMCPServer:
         
         url = f"{self.org_url}/{self.project}/_apis/pipelines?api-version=7.1"
         
+        def render(data: dict) -> str:
+            pipelines = [f"#{p['id']} - {p['name']}" for p in data.get("value", [])]
+            return f"🚀 **Pipelines ({self.project}):**\n" + "\n".join([f"• {p}" for p in pipelines])
+        
         try:
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    pipelines = [f"#{p['id']} - {p['name']}" for p in data.get("value", [])]
-                    return f"🚀 **Pipelines ({self.project}):**\n" + "\n".join([f"• {p}" for p in pipelines])
-                else:
-                    return f"❌ Błąd pobierania pipeline: {response.status}"
+            return await self._get_revalidated(session, url, render, "Pipelines Error")
+        except AzureDevOpsAPIError as e:
+            return f"❌ Błąd pobierania pipeline: {e.status}"
         except Exception as e:
             return f"❌ Błąd połączenia: {str(e)}"
     
@@ -949,6 +2114,12 @@ class AzureDevOpsMCPServer:
         if not self.project:
             return "⚠️ Projekt nie jest skonfigurowany"
         
+        if self._mirror_ready(self.project):
+            ids = await asyncio.to_thread(self.mirror.active_ids, self.project, 10)
+            if ids:
+                return f"📋 **Aktywne zadania ({self.project}):**\n" + "\n".join([f"• #{item_id}" for item_id in ids])
+            return f"📋 **Brak aktywnych zadań w projekcie {self.project}**"
+        
         wiql_query = f"""
         SELECT [System.Id], [System.Title], [System.State], [System.WorkItemType]
         FROM WorkItems
@@ -960,7 +2131,7 @@ class AzureDevOpsMCPServer:
         url = f"{self.org_url}/_apis/wit/wiql?api-version=7.1"
         
         try:
-            async with session.post(url, json={"query": wiql_query}, headers=self.headers) as response:
+            async with self.scheduler.request(session, "POST", url, read=True, json={"query": wiql_query}, headers=self.headers) as response:
                 if response.status == 200:
                     data = await response.json()
                     work_items = data.get('workItems', [])
@@ -981,26 +2152,47 @@ class AzureDevOpsMCPServer:
         else:
             url = f"{self.org_url}/{self.project}/_apis/git/repositories?api-version=7.1"
         
+        def render(data: dict) -> str:
+            repos = [r["name"] for r in data.get("value", [])]
+            return f"📂 **Repozytoria Git:**\n" + "\n".join([f"• {r}" for r in repos])
+        
         try:
-            async with session.get(url, headers=self.headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    repos = [r["name"] for r in data.get("value", [])]
-                    return f"📂 **Repozytoria Git:**\n" + "\n".join([f"• {r}" for r in repos])
-                else:
-                    return f"❌ Błąd pobierania repozytoriów: {response.status}"
+            return await self._get_revalidated(session, url, render, "Repositories Error")
+        except AzureDevOpsAPIError as e:
+            return f"❌ Błąd pobierania repozytoriów: {e.status}"
         except Exception as e:
             return f"❌ Błąd połączenia: {str(e)}"
     
+    async def get_run_resource(self, session: aiohttp.ClientSession, run_id: int) -> str:
+        """Zasób azuredevops://runs/{id} - ostatni stan z obserwatora lub pojedynczy odczyt"""
+        if not self.project:
+            return "⚠️ Projekt nie jest skonfigurowany"
+        
+        run = self.watcher.get(self.project, run_id)
+        if run is None:
+            url = f"{self.org_url}/{self.project}/_apis/build/builds/{run_id}?api-version=7.1"
+            try:
+                run = await self._fetch_json(url)
+            except AzureDevOpsAPIError as e:
+                return f"❌ Błąd pobierania uruchomienia: {e.status}"
+        if run.get('status') != 'completed':
+            self.watcher.watch(self.org_url, self.project, run_id, run)
+        return self._format_run(run)
+    
     async def run(self):
         """Uruchom serwer MCP"""
         logger.info("Uruchamianie Azure DevOps MCP Server...")
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        if self.mirror is not None and self.project:
+            self._mirror_tasks["__loop__"] = asyncio.create_task(self._mirror_sync_loop())
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            await self.close()
 
 def main():
     """Główna funkcja"""
@@ -1011,6 +2203,30 @@ def main():
         print("  AZURE_DEVOPS_ORG - URL organizacji (np. https://dev.azure.com/yourorg)")
         print("  AZURE_DEVOPS_PAT - Personal Access Token")
         print("  AZURE_DEVOPS_PROJECT - Domyślny projekt (opcjonalnie)")
+        print("  API_TIMEOUT - Timeout requestów API w sekundach (domyślnie 30)")
+        print("  AZURE_DEVOPS_POOL_LIMIT - Maks. liczba połączeń w puli (domyślnie 100)")
+        print("  AZURE_DEVOPS_POOL_LIMIT_PER_HOST - Maks. liczba połączeń na host (domyślnie 20)")
+        print("  AZURE_DEVOPS_DNS_TTL - Czas cache DNS w sekundach (domyślnie 300)")
+        print("  AZURE_DEVOPS_KEEPALIVE_TIMEOUT - Keep-alive bezczynnych połączeń w sekundach (domyślnie 60)")
+        print("  AZURE_DEVOPS_BATCH_CONCURRENCY - Równoległe żądania workitemsbatch przy stronicowaniu (domyślnie 4)")
+        print("  AZURE_DEVOPS_RATE_LIMIT - Żądania na sekundę na organizację (domyślnie 20)")
+        print("  AZURE_DEVOPS_RATE_BURST - Rozmiar token bucket (domyślnie 40)")
+        print("  AZURE_DEVOPS_WRITE_RESERVE - Część tokenów zarezerwowana dla zapisów (domyślnie 0.25)")
+        print("  AZURE_DEVOPS_MAX_RETRIES - Ponowienia po 429/503 (zapisy tylko po 429, domyślnie 3)")
+        print("  AZURE_DEVOPS_BULK_CHUNK_SIZE - Operacje w jednym żądaniu $batch (domyślnie 50, maks. 200)")
+        print("  AZURE_DEVOPS_WATCH_MIN_INTERVAL - Min. interwał odpytywania obserwowanych uruchomień w sekundach (domyślnie 5)")
+        print("  AZURE_DEVOPS_WATCH_MAX_INTERVAL - Maks. interwał odpytywania bez zmian statusu (domyślnie 60)")
+        print("  AZURE_DEVOPS_MAX_WAIT_TIMEOUT - Górny limit timeout dla wait_for_run w sekundach (domyślnie 3600)")
+        print("  AZURE_DEVOPS_MIRROR_PATH - Plik SQLite lokalnej kopii work items (włącza mirror)")
+        print("  AZURE_DEVOPS_MIRROR_MAX_AGE - Maks. wiek kopii w sekundach, potem zapytania live (domyślnie 300)")
+        print("  AZURE_DEVOPS_MIRROR_SYNC_INTERVAL - Okres synchronizacji przyrostowej w sekundach (domyślnie 120)")
+        print("  AZURE_DEVOPS_CACHE_SIZE - Maks. liczba odpowiedzi w cache (domyślnie 512, 0 wyłącza)")
+        print("  AZURE_DEVOPS_ETAG_STORE_SIZE - Liczba odpowiedzi zapamiętanych do rewalidacji ETag (domyślnie 256)")
+        print("  AZURE_DEVOPS_CACHE_TTL_<NARZĘDZIE> - TTL cache w sekundach, np. AZURE_DEVOPS_CACHE_TTL_GET_WORK_ITEM")
+        print("  OTEL_TRACES_EXPORTER - Eksporter spanów: none, console, file, otlp lub moduł:fabryka (domyślnie none)")
+        print("  OTEL_TRACES_SAMPLER_ARG - Część próbkowanych śladów 0-1 (domyślnie 1.0, decyzja rodzica ma pierwszeństwo)")
+        print("  OTEL_EXPORTER_OTLP_ENDPOINT - Adres OTLP/HTTP (domyślnie http://localhost:4318)")
+        print("  AZURE_DEVOPS_TRACE_FILE - Plik JSON lines dla eksportera file")
         print("\nObsługiwane funkcje:")
         print("  • Zarządzanie Work Items (tworzenie, aktualizacja, wyszukiwanie)")
         print("  • Uruchamianie Pipeline CI/CD")
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Obserwator uruchomień pipeline dla Azure DevOps MCP Server
+Jedna pętla odpytywania na projekt z adaptacyjnym interwałem + powiadomienia o zmianach
+Warsztat: Copilot 365 MCP Integration
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger('AzureDevOpsMCP.Watcher')
+
+RUN_URI_PREFIX = "azuredevops://runs/"
+
+
+def run_uri(run_id: int) -> str:
+    return f"{RUN_URI_PREFIX}{run_id}"
+
+
+class RunWatcher:
+    """Śledzi uruchomienia pipeline (build) i powiadamia o zmianie statusu"""
+    
+    def __init__(self, fetch_json: Callable[[str], Awaitable[Dict[str, Any]]],
+                 notify: Callable[[str], Awaitable[None]],
+                 min_interval: float = 5.0, max_interval: float = 60.0, backoff: float = 1.5,
+                 retention: float = 3600.0):
+        self.fetch_json = fetch_json
+        self.notify = notify
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.retention = retention
+        # (projekt, run id) -> ostatni znany stan uruchomienia
+        self._runs: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._done: Dict[Tuple[str, int], asyncio.Event] = {}
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._completed_at: Dict[Tuple[str, int], float] = {}
+        self.polls = 0
+        self.notifications = 0
+    
+    def watch(self, org_url: str, project: str, run_id: int, run: Optional[Dict[str, Any]] = None):
+        """Dodaj uruchomienie do obserwacji (idempotentne)"""
+        key = (project, run_id)
+        if run is not None:
+            self._runs[key] = run
+        if key not in self._done:
+            self._done[key] = asyncio.Event()
+            if run is not None and self._is_complete(run):
+                self._mark_completed(key)
+        
+        wakeup = self._wakeups.setdefault(project, asyncio.Event())
+        wakeup.set()
+        loop = self._loops.get(project)
+        if loop is None or loop.done():
+            self._loops[project] = asyncio.create_task(self._poll_loop(org_url, project))
+    
+    def get(self, project: str, run_id: int) -> Optional[Dict[str, Any]]:
+        return self._runs.get((project, run_id))
+    
+    async def wait(self, org_url: str, project: str, run_id: int, timeout: float) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Czekaj na zakończenie uruchomienia; zwraca (zakończone, ostatni stan)"""
+        self.watch(org_url, project, run_id)
+        try:
+            await asyncio.wait_for(self._done[(project, run_id)].wait(), timeout)
+        except asyncio.TimeoutError:
+            return False, self.get(project, run_id)
+        return True, self.get(project, run_id)
+    
+    async def close(self):
+        for task in self._loops.values():
+            task.cancel()
+        await asyncio.gather(*self._loops.values(), return_exceptions=True)
+        self._loops.clear()
+    
+    @staticmethod
+    def _is_complete(run: Dict[str, Any]) -> bool:
+        # Build API używa "status", Pipelines API "state"
+        return (run.get("status") or run.get("state")) == "completed"
+    
+    def _mark_completed(self, key: Tuple[str, int]):
+        self._done[key].set()
+        self._completed_at[key] = time.monotonic()
+    
+    def _pending(self, project: str) -> list:
+        return [run_id for (p, run_id), done in self._done.items() if p == project and not done.is_set()]
+    
+    def _expire(self):
+        """Zapomnij zakończone uruchomienia starsze niż retention"""
+        now = time.monotonic()
+        for key, completed_at in list(self._completed_at.items()):
+            if now - completed_at > self.retention:
+                self._completed_at.pop(key, None)
+                self._runs.pop(key, None)
+                self._done.pop(key, None)
+    
+    async def _poll_loop(self, org_url: str, project: str):
+        """Wspólna pętla dla wszystkich obserwowanych uruchomień projektu"""
+        interval = self.min_interval
+        wakeup = self._wakeups[project]
+        while True:
+            wakeup.clear()
+            # Przy długo obserwowanym projekcie pętla może nie kończyć się godzinami - sprzątaj w każdym cyklu
+            self._expire()
+            pending = self._pending(project)
+            if not pending:
+                break
+            
+            changed = False
+            try:
+                changed = await self._poll(org_url, project, pending)
+            except Exception as e:
+                logger.warning(f"Odpytywanie uruchomień {project} nie powiodło się: {e}")
+            
+            # Zmiana statusu - odpytuj często; brak zmian - wydłużaj interwał
+            interval = self.min_interval if changed else min(interval * self.backoff, self.max_interval)
+            try:
+                await asyncio.wait_for(wakeup.wait(), interval)
+                interval = self.min_interval
+            except asyncio.TimeoutError:
+                pass
+        self._expire()
+    
+    async def _poll(self, org_url: str, project: str, run_ids: list) -> bool:
+        # ID uruchomienia pipeline == ID buildu, więc jedno żądanie obejmuje wszystkie uruchomienia
+        url = (
+            f"{org_url}/{project}/_apis/build/builds"
+            f"?buildIds={','.join(str(run_id) for run_id in run_ids)}&api-version=7.1"
+        )
+        data = await self.fetch_json(url)
+        self.polls += 1
+        
+        changed = False
+        runs = data.get("value", [])
+        # Uruchomienia, których API nie zwróciło (usunięte/nieistniejące), nie blokują oczekujących
+        returned = {run["id"] for run in runs}
+        for run_id in run_ids:
+            if run_id not in returned:
+                self._mark_completed((project, run_id))
+        
+        for run in runs:
+            key = (project, run["id"])
+            previous = self._runs.get(key)
+            self._runs[key] = run
+            if previous is not None and (
+                previous.get("status"), previous.get("result")
+            ) == (run.get("status"), run.get("result")):
+                continue
+            
+            changed = True
+            if self._is_complete(run) and key in self._done:
+                self._mark_completed(key)
+            self.notifications += 1
+            await self.notify(run_uri(run["id"]))
+        return changed
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watched": sum(1 for done in self._done.values() if not done.is_set()),
+            "projects": sum(1 for task in self._loops.values() if not task.done()),
+            "polls": self.polls,
+            "notifications": self.notifications
+        }
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Śledzenie rozproszone (spany) zgodne z W3C Trace Context i OpenTelemetry
+Propagacja traceparent, próbkowanie wg identyfikatora śladu i wymienne eksportery (konsola, plik, OTLP/HTTP)
+"""
+
+import importlib
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger('AzureDevOpsMCP.Tracing')
+
+# Rodzaje spanów jak w OTLP
+SPAN_KINDS = {"internal": 1, "server": 2, "client": 3}
+
+_current: ContextVar[Optional["Span"]] = ContextVar("azure_devops_mcp_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent_span_id, sampled) z nagłówka traceparent; None gdy brak lub niepoprawny"""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) < 4 or len(parts[0]) != 2 or parts[0] == "ff":
+        return None
+    trace_id, span_id, flags = parts[1], parts[2], parts[3]
+    if len(trace_id) != 32 or len(span_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        int(trace_id, 16), int(span_id, 16)
+        sampled = bool(int(flags, 16) & 1)
+    except ValueError:
+        return None
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, sampled
+
+
+class Span:
+    """Pojedynczy span; niepróbkowany span tylko przenosi kontekst do dzieci"""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "status", "status_message")
+    
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes: Dict[str, Any] = {}
+        self.status = "unset"
+        self.status_message = ""
+    
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+    
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled and value is not None:
+            self.attributes[key] = value
+    
+    def set_error(self, message: str):
+        self.status = "error"
+        self.status_message = message
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes
+        }
+
+
+class _NoopSpan:
+    """Span używany przy wyłączonym śledzeniu - brak kosztu poza wywołaniem metody"""
+    
+    sampled = False
+    traceparent = None
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def set_error(self, message: str):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Interfejs eksportera: export() wywoływane z wątku procesora paczek"""
+    
+    def export(self, spans: List[Span]):
+        raise NotImplementedError
+    
+    def shutdown(self):
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Spany jako JSON na stderr (stdout jest zajęty przez transport MCP stdio)"""
+    
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+    
+    def export(self, spans: List[Span]):
+        for span in spans:
+            self.stream.write(json.dumps(span.to_dict(), default=str) + "\n")
+        self.stream.flush()
+
+
+class FileSpanExporter(SpanExporter):
+    """Spany jako JSON lines dopisywane do pliku"""
+    
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+    
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """OTLP/HTTP z kodowaniem JSON (collector OpenTelemetry, Jaeger, Tempo, Azure Monitor przez collector)"""
+    
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[Dict[str, str]] = None,
+                 timeout: float = 10.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+    
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+    
+    def _span(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": SPAN_KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": self._value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.status_message} if span.status == "error" else {}
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+    
+    def export(self, spans: List[Span]):
+        body = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "azure-devops-mcp"}, "spans": [self._span(span) for span in spans]}]
+            }]
+        }
+        request = urllib.request.Request(
+            self.endpoint, data=json.dumps(body).encode(), headers=self.headers, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class BatchSpanProcessor:
+    """Kolejka zakończonych spanów eksportowana paczkami z wątku w tle - eksport nie blokuje żądań"""
+    
+    def __init__(self, exporter: SpanExporter, max_batch: int = 512, max_queue: int = 2048,
+                 interval: float = 5.0):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.interval = interval
+        self._queue: Deque[Span] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self.exported = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+    
+    def submit(self, span: Span):
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(span)
+            if len(self._queue) >= self.max_batch:
+                self._wakeup.set()
+    
+    def _drain(self) -> List[Span]:
+        with self._lock:
+            batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            if not self._queue:
+                self._wakeup.clear()
+            return batch
+    
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.warning(f"Eksport {len(batch)} spanów nie powiódł się: {e}")
+    
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.interval)
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                self._export(batch)
+    
+    def shutdown(self):
+        self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=self.interval + 5)
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._export(batch)
+        self.exporter.shutdown()
+
+
+class Tracer:
+    """Tworzenie spanów z propagacją kontekstu (contextvars) i próbkowaniem wg trace_id"""
+    
+    def __init__(self, service_name: str, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0):
+        self.service_name = service_name
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        # Jak TraceIdRatioBased w OpenTelemetry - decyzja zależy tylko od młodszych 64 bitów trace_id
+        self._bound = int(self.sample_rate * (1 << 64))
+        self.processor = BatchSpanProcessor(exporter) if exporter is not None else None
+        self.started = 0
+        self.sampled = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.processor is not None
+    
+    def _should_sample(self, trace_id: str) -> bool:
+        return int(trace_id[16:], 16) < self._bound
+    
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", traceparent: Optional[str] = None,
+             **attributes: Any) -> Iterator[Any]:
+        """Span potomny bieżącego (lub zdalnego z traceparent); wyjątek oznacza span jako błąd"""
+        if self.processor is None:
+            yield NOOP_SPAN
+            return
+        
+        remote = parse_traceparent(traceparent)
+        parent = _current.get()
+        if remote is not None:
+            trace_id, parent_id, sampled = remote
+        elif parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            trace_id = f"{random.getrandbits(128):032x}"
+            parent_id, sampled = None, self._should_sample(trace_id)
+        
+        span = Span(trace_id, parent_id, name, kind, sampled)
+        self.started += 1
+        if sampled:
+            span.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            if sampled:
+                self.sampled += 1
+                self.processor.submit(span)
+    
+    def current_traceparent(self) -> Optional[str]:
+        span = _current.get()
+        return span.traceparent if span is not None else None
+    
+    def shutdown(self):
+        if self.processor is not None:
+            self.processor.shutdown()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "started": self.started,
+            "sampled": self.sampled,
+            "exported": self.processor.exported if self.processor else 0,
+            "dropped": self.processor.dropped if self.processor else 0
+        }
+
+
+def _otlp_headers(value: str) -> Dict[str, str]:
+    """OTEL_EXPORTER_OTLP_HEADERS: klucz=wartość,klucz2=wartość2"""
+    headers = {}
+    for pair in value.split(","):
+        key, found, val = pair.partition("=")
+        if found and key.strip():
+            headers[key.strip()] = unquote(val.strip())
+    return headers
+
+
+def create_exporter(name: str, service_name: str) -> Optional[SpanExporter]:
+    """Eksporter wg OTEL_TRACES_EXPORTER: none | console | file | otlp | moduł:fabryka"""
+    name = (name or "none").strip()
+    if name in ("", "none"):
+        return None
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(os.getenv("AZURE_DEVOPS_TRACE_FILE", "azure-devops-mcp-traces.jsonl"))
+    if name == "otlp":
+        endpoint = os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+        if not endpoint:
+            endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/") + "/v1/traces"
+        headers = _otlp_headers(os.getenv("OTEL_EXPORTER_OTLP_TRACES_HEADERS", os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "")))
+        return OTLPHttpSpanExporter(endpoint, service_name, headers)
+    if ":" in name:
+        # Własny eksporter: funkcja/klasa przyjmująca service_name i zwracająca obiekt z export(spans)
+        module_name, _, factory_name = name.partition(":")
+        factory = getattr(importlib.import_module(module_name), factory_name)
+        return factory(service_name)
+    raise ValueError(f"Nieznany eksporter spanów: {name}")
+
+
+def tracer_from_env(default_service_name: str) -> Tracer:
+    """Tracer skonfigurowany standardowymi zmiennymi OpenTelemetry (OTEL_*)"""
+    service_name = os.getenv("OTEL_SERVICE_NAME", default_service_name)
+    sampler = os.getenv("OTEL_TRACES_SAMPLER", "parentbased_traceidratio")
+    if sampler.endswith("always_off"):
+        sample_rate = 0.0
+    elif sampler.endswith("always_on"):
+        sample_rate = 1.0
+    else:
+        try:
+            sample_rate = float(os.getenv("OTEL_TRACES_SAMPLER_ARG", "1.0"))
+        except ValueError:
+            logger.warning(f"Nieprawidłowe OTEL_TRACES_SAMPLER_ARG {os.getenv('OTEL_TRACES_SAMPLER_ARG')!r} - próbkowane wszystkie ślady")
+            sample_rate = 1.0
+    try:
+        exporter = create_exporter(os.getenv("OTEL_TRACES_EXPORTER", "none"), service_name)
+    except Exception as e:
+        logger.warning(f"Śledzenie wyłączone - nie można utworzyć eksportera: {e}")
+        exporter = None
+    return Tracer(service_name, exporter, sample_rate)
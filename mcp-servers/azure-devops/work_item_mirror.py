@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Lokalna kopia (mirror) work items w SQLite dla Azure DevOps MCP Server
+Synchronizacja przyrostowa przez API reporting/workitemrevisions + indeks pełnotekstowy
+Warsztat: Copilot 365 MCP Integration
+"""
+
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+logger = logging.getLogger('AzureDevOpsMCP.Mirror')
+
+# Pola pobierane do lokalnej kopii
+MIRROR_FIELDS = [
+    "System.Id", "System.Title", "System.State", "System.WorkItemType", "System.AssignedTo",
+    "System.Tags", "System.Description", "System.ChangedDate", "System.TeamProject", "System.IsDeleted"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work_items (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    rev INTEGER NOT NULL,
+    title TEXT,
+    state TEXT,
+    type TEXT,
+    assigned_to TEXT,
+    tags TEXT,
+    description TEXT,
+    changed_date TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_work_items_project_state ON work_items(project, state);
+CREATE INDEX IF NOT EXISTS idx_work_items_project_changed ON work_items(project, changed_date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    project TEXT PRIMARY KEY,
+    continuation_token TEXT,
+    last_sync REAL
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS work_items_fts USING fts5(
+    title, description, tags, content='work_items', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS work_items_ai AFTER INSERT ON work_items BEGIN
+    INSERT INTO work_items_fts(rowid, title, description, tags)
+    VALUES (new.id, new.title, new.description, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS work_items_ad AFTER DELETE ON work_items BEGIN
+    INSERT INTO work_items_fts(work_items_fts, rowid, title, description, tags)
+    VALUES ('delete', old.id, old.title, old.description, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS work_items_au AFTER UPDATE ON work_items BEGIN
+    INSERT INTO work_items_fts(work_items_fts, rowid, title, description, tags)
+    VALUES ('delete', old.id, old.title, old.description, old.tags);
+    INSERT INTO work_items_fts(rowid, title, description, tags)
+    VALUES (new.id, new.title, new.description, new.tags);
+END;
+"""
+
+
+class WorkItemMirror:
+    """Lokalna kopia work items projektu z indeksem pełnotekstowym"""
+    
+    def __init__(self, path: str, max_age: float = 300.0):
+        self.path = path
+        self.max_age = max_age
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._sync_locks: Dict[str, asyncio.Lock] = {}
+        self.syncs = 0
+        self.synced_revisions = 0
+        self.local_queries = 0
+        
+        with self._lock:
+            self._db.executescript(SCHEMA)
+            try:
+                self._db.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite bez FTS5 - wyszukiwanie przez LIKE
+                logger.warning("SQLite nie obsługuje FTS5, mirror użyje wyszukiwania LIKE")
+                self.fts = False
+            self._db.commit()
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+    
+    # Stan synchronizacji
+    def _sync_state(self, project: str) -> Tuple[Optional[str], Optional[float]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT continuation_token, last_sync FROM sync_state WHERE project = ?", (project,)
+            ).fetchone()
+        return (row["continuation_token"], row["last_sync"]) if row else (None, None)
+    
+    def mark_stale(self, project: str):
+        """Wymuś odpowiedzi live do czasu następnej synchronizacji (np. po zapisie)"""
+        with self._lock:
+            self._db.execute("UPDATE sync_state SET last_sync = 0 WHERE project = ?", (project,))
+            self._db.commit()
+    
+    def is_fresh(self, project: str) -> bool:
+        _, last_sync = self._sync_state(project)
+        return last_sync is not None and time.time() - last_sync <= self.max_age
+    
+    # Synchronizacja
+    async def sync(self, org_url: str, project: str,
+                   fetch_json: Callable[[str], Awaitable[Dict[str, Any]]]) -> int:
+        """Synchronizuj przyrostowo od ostatniego continuationToken; zwraca liczbę rewizji"""
+        lock = self._sync_locks.setdefault(project, asyncio.Lock())
+        async with lock:
+            token, _ = self._sync_state(project)
+            base_url = (
+                f"{org_url}/{quote(project)}/_apis/wit/reporting/workitemrevisions"
+                f"?fields={','.join(MIRROR_FIELDS)}&includeLatestOnly=true&includeDeleted=true"
+                f"&api-version=7.1"
+            )
+            total = 0
+            while True:
+                url = base_url + (f"&continuationToken={quote(token)}" if token else "")
+                data = await fetch_json(url)
+                revisions = data.get("values", [])
+                token = data.get("continuationToken", token)
+                await asyncio.to_thread(self._apply, project, revisions, token, data.get("isLastBatch", True))
+                total += len(revisions)
+                if data.get("isLastBatch", True) or not revisions:
+                    break
+            
+            self.syncs += 1
+            self.synced_revisions += total
+            logger.info(f"Mirror {project}: zsynchronizowano {total} rewizji")
+            return total
+    
+    def _apply(self, project: str, revisions: List[Dict[str, Any]], token: Optional[str], last_batch: bool):
+        with self._lock:
+            for revision in revisions:
+                fields = revision.get("fields", {})
+                item_id = revision.get("id") or fields.get("System.Id")
+                if fields.get("System.IsDeleted"):
+                    self._db.execute("DELETE FROM work_items WHERE id = ?", (item_id,))
+                    continue
+                assigned_to = fields.get("System.AssignedTo")
+                if isinstance(assigned_to, dict):
+                    assigned_to = assigned_to.get("displayName")
+                self._db.execute(
+                    """
+                    INSERT INTO work_items (id, project, rev, title, state, type, assigned_to, tags, description, changed_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        project = excluded.project, rev = excluded.rev, title = excluded.title,
+                        state = excluded.state, type = excluded.type, assigned_to = excluded.assigned_to,
+                        tags = excluded.tags, description = excluded.description,
+                        changed_date = excluded.changed_date
+                    WHERE excluded.rev >= work_items.rev
+                    """,
+                    (
+                        item_id, fields.get("System.TeamProject", project), revision.get("rev", 0),
+                        fields.get("System.Title"), fields.get("System.State"),
+                        fields.get("System.WorkItemType"), assigned_to, fields.get("System.Tags"),
+                        fields.get("System.Description"), fields.get("System.ChangedDate")
+                    )
+                )
+            self._db.execute(
+                """
+                INSERT INTO sync_state (project, continuation_token, last_sync) VALUES (?, ?, ?)
+                ON CONFLICT(project) DO UPDATE SET
+                    continuation_token = excluded.continuation_token,
+                    last_sync = COALESCE(excluded.last_sync, sync_state.last_sync)
+                """,
+                (project, token, time.time() if last_batch else None)
+            )
+            self._db.commit()
+    
+    # Zapytania lokalne
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """Zamień tekst na zapytanie FTS5: każde słowo jako prefiks, wszystkie wymagane"""
+        tokens = re.findall(r"\w+", text, flags=re.UNICODE)
+        return " ".join(f'"{token}"*' for token in tokens)
+    
+    def search(self, project: str, text: str, offset: int = 0, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """Wyszukaj po tytule/opisie/tagach; zwraca (liczba wszystkich trafień, strona wyników)"""
+        self.local_queries += 1
+        with self._lock:
+            if self.fts and self._fts_query(text):
+                where = "w.project = ? AND w.id IN (SELECT rowid FROM work_items_fts WHERE work_items_fts MATCH ?)"
+                params: Tuple[Any, ...] = (project, self._fts_query(text))
+            else:
+                pattern = f"%{text}%"
+                where = "w.project = ? AND (w.title LIKE ? OR w.description LIKE ? OR w.tags LIKE ?)"
+                params = (project, pattern, pattern, pattern)
+            total = self._db.execute(f"SELECT COUNT(*) FROM work_items w WHERE {where}", params).fetchone()[0]
+            rows = self._db.execute(
+                f"SELECT * FROM work_items w WHERE {where} ORDER BY w.changed_date DESC, w.id DESC LIMIT ? OFFSET ?",
+                params + (limit, offset)
+            ).fetchall()
+        return total, [self._to_work_item(row) for row in rows]
+    
+    def active_ids(self, project: str, limit: int = 10) -> List[int]:
+        self.local_queries += 1
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM work_items WHERE project = ? AND state IN ('New', 'Active') "
+                "ORDER BY changed_date DESC LIMIT ?",
+                (project, limit)
+            ).fetchall()
+        return [row["id"] for row in rows]
+    
+    @staticmethod
+    def _to_work_item(row: sqlite3.Row) -> Dict[str, Any]:
+        """Wiersz w kształcie odpowiedzi REST (id + fields)"""
+        columns = {
+            "System.Title": "title",
+            "System.State": "state",
+            "System.WorkItemType": "type",
+            "System.Tags": "tags",
+            "System.ChangedDate": "changed_date"
+        }
+        fields: Dict[str, Any] = {name: row[column] for name, column in columns.items() if row[column] is not None}
+        if row["assigned_to"]:
+            fields["System.AssignedTo"] = {"displayName": row["assigned_to"]}
+        return {"id": row["id"], "rev": row["rev"], "fields": fields}
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM work_items").fetchone()[0]
+        return {
+            "work_items": count,
+            "fts": self.fts,
+            "syncs": self.syncs,
+            "synced_revisions": self.synced_revisions,
+            "local_queries": self.local_queries
+        }
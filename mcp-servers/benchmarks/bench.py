@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Benchmark serwerów MCP Azure DevOps (stdio i Azure Function) bez dostępu do sieci
+Każde narzędzie przy rosnącej równoległości: p50/p95/p99, przepustowość, alokacje, szczytowe RSS
+Warsztat: Copilot 365 MCP Integration
+
+Użycie:
+    python bench.py --target all --concurrency 1,8,32 --requests 100
+    python bench.py --target stdio --throttle-rate 0.05 --json wyniki.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows - brak modułu resource, szczytowe RSS niedostępne
+    resource = None
+
+from fake_azure_devops import FakeAzureDevOps
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STDIO_SERVER = os.path.join(HERE, "..", "azure-devops", "azure-devops-mcp.py")
+FUNCTION_APP = os.path.join(HERE, "..", "azure-devops-function", "McpServer", "__init__.py")
+PROJECT = "bench"
+
+# Scenariusze: narzędzie -> argumenty dla i-tego wywołania
+STDIO_SCENARIOS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "query_work_items": lambda i: {"query": "Benchmark", "top": 50},
+    "get_work_item": lambda i: {"id": i % 200 + 1},
+    "create_work_item": lambda i: {"title": f"bench {i}", "type": "Task"},
+    "update_work_item": lambda i: {"id": i % 200 + 1, "state": "Active"},
+    "bulk_create_work_items": lambda i: {"items": [{"title": f"bulk {i}-{n}", "type": "Task"} for n in range(20)]},
+    "bulk_update_work_items": lambda i: {"items": [{"id": (i + n) % 200 + 1, "state": "Active"} for n in range(20)]},
+    "run_pipeline": lambda i: {"pipeline_id": 1},
+    "get_pipeline_runs": lambda i: {"top": 20},
+    "get_repositories": lambda i: {},
+    "create_pull_request": lambda i: {
+        "repository_id": "00000000-0000-0000-0000-000000000001", "title": f"bench {i}",
+        "source_branch": "feature/bench", "work_items": [1, 2, 3]
+    },
+    "get_build_artifacts": lambda i: {"build_id": 100 - i % 10}
+}
+
+FUNCTION_SCENARIOS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "list_work_items": lambda i: {"project": PROJECT, "limit": 50},
+    "get_work_item": lambda i: {"id": i % 200 + 1},
+    "create_work_item": lambda i: {"project": PROJECT, "type": "Task", "title": f"bench {i}"},
+    "update_work_item": lambda i: {"id": i % 200 + 1, "state": "Active"},
+    "bulk_create_work_items": lambda i: {
+        "project": PROJECT, "items": [{"type": "Task", "title": f"bulk {i}-{n}"} for n in range(20)]
+    },
+    "bulk_update_work_items": lambda i: {"items": [{"id": (i + n) % 200 + 1, "state": "Active"} for n in range(20)]},
+    "run_pipeline": lambda i: {"project": PROJECT, "pipeline_id": 1},
+    "get_pipeline_status": lambda i: {"project": PROJECT, "pipeline_id": 1}
+}
+
+
+def load_module(name: str, path: str):
+    """Załaduj serwer z pliku (nazwy plików nie są poprawnymi nazwami modułów)"""
+    sys.path.insert(0, os.path.dirname(path))
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Pakiet (McpServer) musi być w sys.modules dla importów względnych
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux podaje KB, macOS bajty
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# Wiersze oznaczające błąd całości lub części operacji (np. zadanie niepołączone z PR, nieudany element bulk)
+FAILURE_MARKERS = ("❌", "⚠️")
+
+
+def text_failed(text: str) -> bool:
+    return any(line.lstrip().startswith(FAILURE_MARKERS) for line in text.splitlines())
+
+
+def payload_failed(result: Dict[str, Any]) -> bool:
+    """Wynik Function jest błędem, jeśli isError albo raport bulk zawiera nieudane elementy"""
+    if result.get("isError", False):
+        return True
+    data = result.get("structuredContent")
+    if data is None:
+        try:
+            data = json.loads("".join(content.get("text", "") for content in result.get("content", [])))
+        except ValueError:
+            return False
+    return isinstance(data, dict) and bool(data.get("failed"))
+
+
+class StdioTarget:
+    """AzureDevOpsMCPServer wywoływany przez handlery MCP w tym samym procesie"""
+    
+    name = "stdio"
+    scenarios = STDIO_SCENARIOS
+    
+    def __init__(self):
+        self.module = load_module("azure_devops_mcp", STDIO_SERVER)
+        logging.getLogger("AzureDevOpsMCP").setLevel(logging.WARNING)
+        self.server = self.module.AzureDevOpsMCPServer()
+        self.types = self.module.types
+        self.handler = self.server.server.request_handlers[self.types.CallToolRequest]
+    
+    async def call(self, tool: str, arguments: Dict[str, Any]) -> bool:
+        request = self.types.CallToolRequest(
+            method="tools/call",
+            params=self.types.CallToolRequestParams(name=tool, arguments=arguments)
+        )
+        result = (await self.handler(request)).root
+        text = "".join(getattr(content, "text", "") for content in result.content)
+        return not result.isError and not text_failed(text)
+    
+    async def close(self):
+        await self.server.close()
+
+
+class FunctionTarget:
+    """main() Azure Function wywoływane z HttpRequest (JSON-RPC tools/call)"""
+    
+    name = "function"
+    scenarios = FUNCTION_SCENARIOS
+    
+    def __init__(self):
+        import azure.functions as func
+        self.func = func
+        self.module = load_module("McpServer", FUNCTION_APP)
+        logging.getLogger("McpServer").setLevel(logging.WARNING)
+        self.ids = 0
+    
+    async def call(self, tool: str, arguments: Dict[str, Any]) -> bool:
+        self.ids += 1
+        body = {"jsonrpc": "2.0", "id": self.ids, "method": "tools/call", "params": {"name": tool, "arguments": arguments}}
+        request = self.func.HttpRequest(
+            method="POST", url="http://localhost/api/McpServer",
+            headers={"Content-Type": "application/json"}, body=json.dumps(body).encode()
+        )
+        response = await self.module.main(request)
+        if response.status_code != 200:
+            return False
+        payload = json.loads(response.get_body())
+        return "error" not in payload and not payload_failed(payload.get("result", {}))
+    
+    async def close(self):
+        pass
+
+
+async def run_level(target, tool: str, concurrency: int, requests: int,
+                    trace_alloc: bool) -> Dict[str, Any]:
+    """Wywołaj narzędzie `requests` razy przy danej równoległości"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+    make_args = target.scenarios[tool]
+    
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                ok = await target.call(tool, make_args(i))
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += 0 if ok else 1
+    
+    if trace_alloc:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    allocated = None
+    if trace_alloc:
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    
+    return {
+        "target": target.name,
+        "tool": tool,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "throughput_rps": round(requests / elapsed, 1),
+        "peak_alloc_kb": round(allocated / 1024, 1) if allocated is not None else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def print_table(results: List[Dict[str, Any]]):
+    columns = [
+        ("target", 8), ("tool", 24), ("concurrency", 5), ("errors", 6), ("p50_ms", 9), ("p95_ms", 9),
+        ("p99_ms", 9), ("throughput_rps", 9), ("peak_alloc_kb", 11), ("peak_rss_mb", 8)
+    ]
+    headers = {"concurrency": "conc", "throughput_rps": "rps", "peak_alloc_kb": "alloc_kb", "peak_rss_mb": "rss_mb"}
+    print(" ".join(headers.get(name, name).ljust(width) for name, width in columns))
+    for row in results:
+        print(" ".join(str(row[name] if row[name] is not None else "-").ljust(width) for name, width in columns))
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark serwerów MCP Azure DevOps na lokalnym zamienniku API")
+    parser.add_argument("--target", choices=["stdio", "function", "all"], default="all")
+    parser.add_argument("--concurrency", default="1,8,32", help="Poziomy równoległości, np. 1,8,32")
+    parser.add_argument("--requests", type=int, default=100, help="Wywołań na narzędzie i poziom")
+    parser.add_argument("--tools", help="Tylko wybrane narzędzia (lista po przecinku)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Opóźnienie fałszywego API w sekundach")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Część odpowiedzi 429 (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After (całe sekundy, jak w Azure DevOps) dla odpowiedzi 429")
+    parser.add_argument("--work-items", type=int, default=500)
+    parser.add_argument("--payload-size", type=int, default=512, help="Długość opisu work item w znakach")
+    parser.add_argument("--rate-limit", type=float, help="AZURE_DEVOPS_RATE_LIMIT serwerów (domyślnie jak w produkcji)")
+    parser.add_argument("--no-cache", action="store_true", help="Wyłącz cache odpowiedzi serwera stdio")
+    parser.add_argument("--trace-alloc", action="store_true", help="Mierz szczytowe alokacje (tracemalloc, wolniej)")
+    parser.add_argument("--json", dest="json_path", help="Zapisz wyniki do pliku JSON")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    fake = FakeAzureDevOps(
+        work_items=args.work_items, payload_size=args.payload_size, latency=args.latency,
+        throttle_rate=args.throttle_rate, retry_after=args.retry_after
+    )
+    url = await fake.start()
+    
+    # Konfiguracja serwerów przez te same zmienne co w produkcji
+    os.environ.update({
+        "AZURE_DEVOPS_ORG": url,
+        "AZURE_DEVOPS_ORG_URL": url,
+        "AZURE_DEVOPS_PAT": "benchmark",
+        "AZURE_DEVOPS_PROJECT": PROJECT,
+        # Cache lokalizacji SDK poza katalogiem użytkownika
+        "AZURE_DEVOPS_CACHE_DIR": tempfile.mkdtemp(prefix="mcp-bench-")
+    })
+    if args.rate_limit:
+        os.environ["AZURE_DEVOPS_RATE_LIMIT"] = f"{args.rate_limit:g}"
+        os.environ["AZURE_DEVOPS_RATE_BURST"] = str(max(1, int(args.rate_limit * 2)))
+    if args.no_cache:
+        os.environ["AZURE_DEVOPS_CACHE_SIZE"] = "0"
+    
+    levels = [int(level) for level in args.concurrency.split(",")]
+    selected = set(args.tools.split(",")) if args.tools else None
+    targets = []
+    if args.target in ("stdio", "all"):
+        targets.append(StdioTarget)
+    if args.target in ("function", "all"):
+        targets.append(FunctionTarget)
+    
+    results = []
+    try:
+        for target_class in targets:
+            try:
+                target = target_class()
+            except ImportError as e:
+                print(f"⚠️ Pomijam {target_class.name}: brak zależności ({e})", file=sys.stderr)
+                continue
+            try:
+                for tool in target.scenarios:
+                    if selected and tool not in selected:
+                        continue
+                    for level in levels:
+                        results.append(await run_level(target, tool, level, args.requests, args.trace_alloc))
+            finally:
+                await target.close()
+    finally:
+        await fake.stop()
+    
+    print_table(results)
+    print(f"\nŻądania do API: {sum(fake.requests.values())} | wstrzyknięte 429: {fake.throttled} "
+          f"| szczytowe RSS: {peak_rss_mb() or '-'} MB")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "api_requests": dict(fake.requests), "throttled": fake.throttled}, f, indent=2)
+    return 1 if any(row["errors"] for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Lokalny zamiennik REST API Azure DevOps (dev.azure.com) do benchmarków
+Konfigurowalne opóźnienie, rozmiar odpowiedzi i wstrzykiwanie 429
+Warsztat: Copilot 365 MCP Integration
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+ORG = "benchorg"
+
+# Lokalizacje zasobów dla azure-devops SDK (OPTIONS {org}/_apis) - tylko te, których używa Function
+API_LOCATIONS = [
+    ("e81700f7-3be2-46de-8624-2eb35882fcaa", "Location", "resourceAreas", "_apis/{resource}/{areaId}"),
+    ("1a9c53f7-f243-4447-b110-35ef023636e4", "wit", "wiql", "{project}/{team}/_apis/wit/{resource}/{id}"),
+    ("72c7ddf8-2cdc-4f60-90cd-ab71c14a399b", "wit", "workItems", "{project}/_apis/wit/{resource}/{id}"),
+    ("62d3d110-0047-428c-ad3c-4fe872c91c74", "wit", "workItems", "{project}/_apis/wit/{resource}/${type}"),
+    ("0cd358e1-9217-4d94-8269-1c1ee6f93dcf", "build", "builds", "{project}/_apis/build/{resource}/{buildId}")
+]
+
+STATES = ["New", "Active", "Resolved", "Closed"]
+TYPES = ["Task", "Bug", "User Story"]
+
+
+class FakeAzureDevOps:
+    """Serwer aiohttp udający organizację Azure DevOps"""
+    
+    def __init__(self, work_items: int = 500, payload_size: int = 512, latency: float = 0.02,
+                 jitter: float = 0.25, throttle_rate: float = 0.0, retry_after: int = 1,
+                 seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.throttled = 0
+        self.next_id = work_items + 1
+        self.next_run = 1000
+        self.pull_requests: Dict[int, List[str]] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.url = ""
+        filler = ("lorem ipsum dolor sit amet " * (payload_size // 27 + 1))[:payload_size]
+        self.work_items: Dict[int, Dict[str, Any]] = {
+            item_id: self._work_item(item_id, f"Benchmark item {item_id}", filler, TYPES[item_id % len(TYPES)])
+            for item_id in range(1, work_items + 1)
+        }
+    
+    # Cykl życia
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_route("OPTIONS", f"/{ORG}/_apis", self.options)
+        app.router.add_route("OPTIONS", f"/{ORG}/_apis/", self.options)
+        app.router.add_get(f"/{ORG}/_apis/resourceAreas", self.resource_areas)
+        app.router.add_get(f"/{ORG}/_apis/projects", self.projects)
+        app.router.add_post(f"/{ORG}/_apis/wit/wiql", self.wiql)
+        app.router.add_post(f"/{ORG}/{{project}}/_apis/wit/wiql", self.wiql)
+        app.router.add_post(f"/{ORG}/{{project}}/{{team}}/_apis/wit/wiql", self.wiql)
+        app.router.add_post(f"/{ORG}/_apis/wit/workitemsbatch", self.work_items_batch)
+        app.router.add_post(f"/{ORG}/_apis/wit/$batch", self.wit_batch)
+        app.router.add_get(f"/{ORG}/_apis/wit/workitems", self.list_work_items)
+        app.router.add_get(f"/{ORG}/_apis/wit/workItems", self.list_work_items)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/wit/workItems", self.list_work_items)
+        app.router.add_get(f"/{ORG}/_apis/wit/workitems/{{id:\\d+}}", self.get_work_item)
+        app.router.add_get(f"/{ORG}/_apis/wit/workItems/{{id:\\d+}}", self.get_work_item)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/wit/workItems/{{id:\\d+}}", self.get_work_item)
+        app.router.add_patch(f"/{ORG}/_apis/wit/workitems/{{id:\\d+}}", self.update_work_item)
+        app.router.add_patch(f"/{ORG}/_apis/wit/workItems/{{id:\\d+}}", self.update_work_item)
+        app.router.add_patch(f"/{ORG}/{{project}}/_apis/wit/workItems/{{id:\\d+}}", self.update_work_item)
+        app.router.add_post(f"/{ORG}/{{project}}/_apis/wit/workitems/${{type}}", self.create_work_item)
+        app.router.add_post(f"/{ORG}/{{project}}/_apis/wit/workItems/${{type}}", self.create_work_item)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/wit/reporting/workitemrevisions", self.revisions)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/pipelines", self.pipelines)
+        app.router.add_post(f"/{ORG}/{{project}}/_apis/pipelines/{{pipeline}}/runs", self.run_pipeline)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/pipelines/{{pipeline}}/runs", self.builds)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/build/builds", self.builds)
+        app.router.add_post(f"/{ORG}/{{project}}/_apis/build/builds", self.queue_build)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/build/builds/{{id:\\d+}}", self.get_build)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/build/builds/{{id:\\d+}}/artifacts", self.artifacts)
+        app.router.add_get(f"/{ORG}/_apis/git/repositories", self.repositories)
+        app.router.add_get(f"/{ORG}/{{project}}/_apis/git/repositories", self.repositories)
+        app.router.add_post(f"/{ORG}/_apis/git/repositories/{{repo}}/pullrequests", self.create_pull_request)
+        app.router.add_get(f"/{ORG}/_apis/git/repositories/{{repo}}/pullRequests/{{pr:\\d+}}/workitems", self.pull_request_work_items)
+        
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}/{ORG}"
+        return self.url
+    
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+    
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.requests[f"{request.method} {route}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+        if self.throttle_rate and request.method != "OPTIONS" and self.random.random() < self.throttle_rate:
+            self.throttled += 1
+            return web.json_response(
+                {"message": "Request was blocked due to exceeding usage of resource"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after), "X-RateLimit-Resource": "Core"}
+            )
+        return await handler(request)
+    
+    # Dane
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+    
+    def _work_item(self, item_id: int, title: str, description: str,
+                   work_item_type: str = "Task", state: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "id": item_id,
+            "rev": 1,
+            "url": f"{self.url}/_apis/wit/workItems/{item_id}",
+            "fields": {
+                "System.Id": item_id,
+                "System.TeamProject": "bench",
+                "System.Title": title,
+                "System.State": state or STATES[item_id % len(STATES)],
+                "System.WorkItemType": work_item_type,
+                "System.AssignedTo": {"displayName": f"User {item_id % 7}", "uniqueName": f"user{item_id % 7}@bench"},
+                "System.CreatedDate": "2025-01-01T00:00:00Z",
+                "System.ChangedDate": "2025-01-01T00:00:00Z",
+                "System.Description": description,
+                "System.Tags": "bench; perf",
+                "Microsoft.VSTS.Common.Priority": item_id % 4 + 1
+            },
+            "_links": {"html": {"href": f"https://dev.azure.com/{ORG}/bench/_workitems/edit/{item_id}"}}
+        }
+    
+    @staticmethod
+    def _project(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        if not fields:
+            return item
+        return dict(item, fields={name: value for name, value in item["fields"].items() if name in fields})
+    
+    @staticmethod
+    def _etag(payload: Any) -> str:
+        return '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+    
+    def _conditional(self, request: web.Request, payload: Any) -> web.Response:
+        etag = self._etag(payload)
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.json_response(payload, headers={"ETag": etag})
+    
+    def _build(self, build_id: int) -> Dict[str, Any]:
+        completed = build_id % 3 != 0
+        return {
+            "id": build_id,
+            "buildNumber": f"2025.{build_id}",
+            "status": "completed" if completed else "inProgress",
+            "result": ("succeeded" if build_id % 5 else "failed") if completed else None,
+            "definition": {"id": 1, "name": "bench-ci"},
+            "sourceBranch": "refs/heads/main",
+            "queueTime": "2025-01-01T00:00:00Z",
+            "startTime": "2025-01-01T00:00:05Z",
+            "finishTime": "2025-01-01T00:05:00Z" if completed else None,
+            "url": f"{self.url}/bench/_apis/build/builds/{build_id}",
+            "_links": {"web": {"href": f"https://dev.azure.com/{ORG}/bench/_build/results?buildId={build_id}"}}
+        }
+    
+    # Lokalizacje (azure-devops SDK)
+    async def options(self, request: web.Request) -> web.Response:
+        locations = [
+            {
+                "id": location_id, "area": area, "resourceName": resource, "routeTemplate": template,
+                "resourceVersion": 1, "minVersion": "1.0", "maxVersion": "7.1", "releasedVersion": "7.0"
+            }
+            for location_id, area, resource, template in API_LOCATIONS
+        ]
+        return web.json_response({"count": len(locations), "value": locations})
+    
+    async def resource_areas(self, request: web.Request) -> web.Response:
+        # Pusta lista - SDK używa bazowego URL (jak serwer on-premises)
+        return web.json_response({"count": 0, "value": []})
+    
+    # Work items
+    async def projects(self, request: web.Request) -> web.Response:
+        return web.json_response({"count": 1, "value": [
+            {"id": "00000000-0000-0000-0000-000000000001", "name": "bench", "description": "Benchmark project"}
+        ]})
+    
+    async def wiql(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        query = body.get("query", "")
+        ids = sorted(self.work_items, reverse=True)
+        if "CONTAINS" in query:
+            ids = ids[: max(1, len(ids) // 4)]
+        top = request.query.get("$top")
+        if top:
+            ids = ids[: int(top)]
+        return web.json_response({
+            "queryType": "flat",
+            "asOf": self._now(),
+            "workItems": [{"id": item_id, "url": f"{self.url}/_apis/wit/workItems/{item_id}"} for item_id in ids]
+        })
+    
+    async def work_items_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        fields = body.get("fields")
+        items = [self._project(self.work_items[item_id], fields) for item_id in body.get("ids", []) if item_id in self.work_items]
+        return web.json_response({"count": len(items), "value": items})
+    
+    async def list_work_items(self, request: web.Request) -> web.Response:
+        ids = [int(item_id) for item_id in request.query.get("ids", "").split(",") if item_id]
+        fields = request.query.get("fields", "").split(",") if request.query.get("fields") else None
+        items = [self._project(self.work_items[item_id], fields) for item_id in ids if item_id in self.work_items]
+        return web.json_response({"count": len(items), "value": items})
+    
+    async def get_work_item(self, request: web.Request) -> web.Response:
+        item = self.work_items.get(int(request.match_info["id"]))
+        if item is None:
+            return web.json_response({"message": "Work item does not exist"}, status=404)
+        fields = request.query.get("fields", "").split(",") if request.query.get("fields") else None
+        return self._conditional(request, self._project(item, fields))
+    
+    def _apply_patch(self, item: Dict[str, Any], operations: List[Dict[str, Any]]):
+        for operation in operations:
+            path = operation.get("path", "")
+            if path.startswith("/fields/"):
+                item["fields"][path[len("/fields/"):]] = operation.get("value")
+        item["rev"] += 1
+        item["fields"]["System.ChangedDate"] = self._now()
+    
+    async def create_work_item(self, request: web.Request) -> web.Response:
+        item = self._work_item(self.next_id, "", "", request.match_info["type"], "New")
+        self.next_id += 1
+        self._apply_patch(item, await request.json())
+        self.work_items[item["id"]] = item
+        return web.json_response(item)
+    
+    async def update_work_item(self, request: web.Request) -> web.Response:
+        item = self.work_items.get(int(request.match_info["id"]))
+        if item is None:
+            return web.json_response({"message": "Work item does not exist"}, status=404)
+        self._apply_patch(item, await request.json())
+        return web.json_response(item)
+    
+    async def wit_batch(self, request: web.Request) -> web.Response:
+        responses = []
+        for operation in await request.json():
+            uri = operation.get("uri", "")
+            patch = operation.get("body", [])
+            if "$" in uri:
+                item = self._work_item(self.next_id, "", "", uri.rsplit("$", 1)[1].split("?")[0], "New")
+                self.next_id += 1
+                self.work_items[item["id"]] = item
+            else:
+                item = self.work_items.get(int(uri.split("/workitems/")[1].split("?")[0]))
+                if item is None:
+                    responses.append({"code": 404, "body": json.dumps({"message": "Work item does not exist"})})
+                    continue
+            self._apply_patch(item, patch)
+            responses.append({"code": 200, "body": json.dumps(item)})
+        return web.json_response({"count": len(responses), "value": responses})
+    
+    async def revisions(self, request: web.Request) -> web.Response:
+        values = [
+            {"id": item["id"], "rev": item["rev"], "fields": item["fields"]}
+            for item in self.work_items.values()
+        ]
+        return web.json_response({"values": values, "continuationToken": "done", "isLastBatch": True})
+    
+    # Pipelines / builds
+    async def pipelines(self, request: web.Request) -> web.Response:
+        return web.json_response({"count": 3, "value": [
+            {"id": pipeline_id, "name": f"bench-pipeline-{pipeline_id}", "folder": "\\\\"} for pipeline_id in (1, 2, 3)
+        ]})
+    
+    async def run_pipeline(self, request: web.Request) -> web.Response:
+        self.next_run += 1
+        pipeline_id = int(request.match_info["pipeline"])
+        return web.json_response({
+            "id": self.next_run,
+            "state": "inProgress",
+            "pipeline": {"id": pipeline_id, "name": f"bench-pipeline-{pipeline_id}"},
+            "_links": {"web": {"href": f"https://dev.azure.com/{ORG}/bench/_build/results?buildId={self.next_run}"}}
+        })
+    
+    async def queue_build(self, request: web.Request) -> web.Response:
+        self.next_run += 1
+        return web.json_response(self._build(self.next_run))
+    
+    async def builds(self, request: web.Request) -> web.Response:
+        build_ids = request.query.get("buildIds")
+        if build_ids:
+            ids = [int(build_id) for build_id in build_ids.split(",")]
+        else:
+            ids = list(range(100, 100 - int(request.query.get("$top", 10)), -1))
+        payload = {"count": len(ids), "value": [self._build(build_id) for build_id in ids]}
+        return self._conditional(request, payload)
+    
+    async def get_build(self, request: web.Request) -> web.Response:
+        return web.json_response(self._build(int(request.match_info["id"])))
+    
+    async def artifacts(self, request: web.Request) -> web.Response:
+        build_id = request.match_info["id"]
+        return web.json_response({"count": 2, "value": [
+            {"id": index, "name": name, "resource": {"type": "Container", "downloadUrl": f"{self.url}/artifacts/{build_id}/{name}"}}
+            for index, name in enumerate(("drop", "logs"))
+        ]})
+    
+    # Git
+    async def repositories(self, request: web.Request) -> web.Response:
+        payload = {"count": 5, "value": [
+            {
+                "id": f"00000000-0000-0000-0000-00000000000{index}",
+                "name": f"bench-repo-{index}",
+                "defaultBranch": "refs/heads/main",
+                "size": 1024 * index,
+                "webUrl": f"https://dev.azure.com/{ORG}/bench/_git/bench-repo-{index}",
+                "project": {"name": "bench"}
+            }
+            for index in range(5)
+        ]}
+        return self._conditional(request, payload)
+    
+    async def create_pull_request(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        # Jak w Azure DevOps: zadania łączy się przez workItemRefs w treści tworzenia PR
+        refs = [str(ref.get("id")) for ref in body.get("workItemRefs", [])]
+        unknown = [ref for ref in refs if not ref.isdigit() or int(ref) not in self.work_items]
+        if unknown:
+            return web.json_response({"message": f"Work item {unknown[0]} does not exist"}, status=400)
+        pr_id = self.random.randint(1, 10 ** 6)
+        self.pull_requests[pr_id] = refs
+        return web.json_response({
+            "pullRequestId": pr_id,
+            "title": body.get("title"),
+            "sourceRefName": body.get("sourceRefName"),
+            "targetRefName": body.get("targetRefName"),
+            "status": "active",
+            "repository": {"id": request.match_info["repo"], "name": "bench-repo"},
+            "_links": {"web": {"href": f"https://dev.azure.com/{ORG}/bench/_git/bench-repo/pullrequest/1"}}
+        })
+    
+    async def pull_request_work_items(self, request: web.Request) -> web.Response:
+        refs = self.pull_requests.get(int(request.match_info["pr"]))
+        if refs is None:
+            return web.json_response({"message": "Pull request not found"}, status=404)
+        value = [{"id": ref, "url": f"{self.url}/_apis/wit/workItems/{ref}"} for ref in refs]
+        return web.json_response({"count": len(value), "value": value})
+
+
+async def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Lokalny zamiennik Azure DevOps REST API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.02, help="Opóźnienie odpowiedzi w sekundach")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Część odpowiedzi 429 (0-1)")
+    parser.add_argument("--work-items", type=int, default=500)
+    parser.add_argument("--payload-size", type=int, default=512, help="Długość opisu work item w znakach")
+    args = parser.parse_args()
+    
+    fake = FakeAzureDevOps(work_items=args.work_items, payload_size=args.payload_size,
+                           latency=args.latency, throttle_rate=args.throttle_rate)
+    url = await fake.start(port=args.port)
+    print(f"Fake Azure DevOps: {url} (Ctrl+C kończy)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fake.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
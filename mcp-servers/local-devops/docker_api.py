@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Klient Docker Engine API dla lokalnego serwera MCP DevOps
+Bezpośrednio przez gniazdo demona (unix / npipe / tcp) zamiast CLI docker
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+logger = logging.getLogger('LocalDevOpsMCP.Docker')
+
+DEFAULT_DOCKER_HOST = "npipe:////./pipe/docker_engine" if sys.platform == "win32" else "unix:///var/run/docker.sock"
+
+# Strumienie w multipleksowanym wyjściu logów (kontenery bez TTY)
+LOG_STREAMS = {0: "stdin", 1: "stdout", 2: "stderr"}
+
+
+class DockerAPIError(Exception):
+    """Błąd odpowiedzi Docker Engine API"""
+    
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class DockerClient:
+    """Asynchroniczny klient Engine API ze współdzieloną pulą połączeń"""
+    
+    def __init__(self, host: Optional[str] = None, api_version: Optional[str] = None, timeout: float = 30.0):
+        self.host = host or os.getenv("DOCKER_HOST") or DEFAULT_DOCKER_HOST
+        # Bez prefiksu wersji demon używa najnowszej obsługiwanej wersji API
+        version = api_version or os.getenv("DOCKER_API_VERSION")
+        self.prefix = f"/v{version.lstrip('v')}" if version else ""
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _connector(self) -> Tuple[aiohttp.BaseConnector, str]:
+        """Konektor i bazowy URL dla DOCKER_HOST"""
+        if self.host.startswith("unix://"):
+            return aiohttp.UnixConnector(path=self.host[len("unix://"):]), "http://docker"
+        if self.host.startswith("npipe://"):
+            return aiohttp.NamedPipeConnector(path=self.host[len("npipe://"):].replace("/", "\\")), "http://docker"
+        if self.host.startswith("tcp://"):
+            return aiohttp.TCPConnector(), "http://" + self.host[len("tcp://"):]
+        raise ValueError(f"Nieobsługiwany DOCKER_HOST: {self.host}")
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector, self.base_url = self._connector()
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _request(self, path: str, params: Optional[Dict[str, Any]] = None,
+                       stream: bool = False) -> aiohttp.ClientResponse:
+        session = await self._get_session()
+        # Strumienie (logi, statystyki) mogą trwać dłużej niż timeout zwykłych żądań - limit całkowity nakłada wywołujący
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout) if stream else None
+        response = await session.get(f"{self.base_url}{self.prefix}{path}", params=params, timeout=timeout)
+        if response.status >= 400:
+            try:
+                message = (await response.json(content_type=None)).get("message", "")
+            except ValueError:
+                message = await response.text()
+            finally:
+                response.release()
+            raise DockerAPIError(response.status, message)
+        return response
+    
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        async with await self._request(path, params) as response:
+            return await response.json(content_type=None)
+    
+    async def containers(self, all: bool = False, filters: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Lista kontenerów; filtrowanie po stronie demona (status, label, name, ...)"""
+        params: Dict[str, Any] = {"all": "true" if all else "false"}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        return await self._get_json("/containers/json", params)
+    
+    async def logs(self, container: str, tail: Optional[int] = None, since: Optional[int] = None,
+                   timestamps: bool = False, follow: bool = False) -> AsyncIterator[Tuple[str, str]]:
+        """Logi kontenera jako kolejne fragmenty (strumień, tekst)"""
+        path = f"/containers/{quote(container, safe='')}"
+        info = await self._get_json(f"{path}/json")
+        tty = info.get("Config", {}).get("Tty", False)
+        params: Dict[str, Any] = {
+            "stdout": "true",
+            "stderr": "true",
+            "follow": "true" if follow else "false",
+            "timestamps": "true" if timestamps else "false",
+            "tail": str(tail) if tail is not None else "all"
+        }
+        if since is not None:
+            params["since"] = str(since)
+        
+        async with await self._request(f"{path}/logs", params, stream=True) as response:
+            if tty:
+                # Kontener z TTY - surowy strumień bez nagłówków
+                async for chunk in response.content.iter_any():
+                    yield "stdout", chunk.decode(errors="replace")
+                return
+            # Bez TTY - ramki: [strumień, 0, 0, 0, rozmiar uint32 BE] + dane
+            while True:
+                try:
+                    header = await response.content.readexactly(8)
+                except asyncio.IncompleteReadError:
+                    return
+                stream_type, size = struct.unpack(">BxxxL", header)
+                payload = await response.content.readexactly(size)
+                yield LOG_STREAMS.get(stream_type, "stdout"), payload.decode(errors="replace")
+    
+    async def stats(self, container: str, samples: int = 1) -> AsyncIterator[Dict[str, Any]]:
+        """Kolejne próbki statystyk kontenera (JSON rozdzielany znakami nowej linii)"""
+        params = {"stream": "true" if samples > 1 else "false"}
+        path = f"/containers/{quote(container, safe='')}/stats"
+        async with await self._request(path, params, stream=True) as response:
+            count = 0
+            while count < samples:
+                line = await response.content.readline()
+                if not line:
+                    return
+                if line.strip():
+                    count += 1
+                    yield json.loads(line)
+
+
+def summarize_container(container: Dict[str, Any]) -> Dict[str, Any]:
+    """Zwięzła postać wpisu z /containers/json"""
+    ports = [
+        f"{port.get('IP', '')}:{port['PublicPort']}->{port['PrivatePort']}/{port['Type']}"
+        if port.get("PublicPort") else f"{port['PrivatePort']}/{port['Type']}"
+        for port in container.get("Ports", [])
+    ]
+    return {
+        "id": container["Id"][:12],
+        "name": ",".join(name.lstrip("/") for name in container.get("Names", [])),
+        "image": container.get("Image"),
+        "state": container.get("State"),
+        "status": container.get("Status"),
+        "ports": ports,
+        "labels": container.get("Labels") or {},
+        "created": container.get("Created")
+    }
+
+
+def summarize_stats(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Procent CPU i pamięć jak w `docker stats`"""
+    cpu = stats.get("cpu_stats", {})
+    precpu = stats.get("precpu_stats", {})
+    cpu_delta = cpu.get("cpu_usage", {}).get("total_usage", 0) - precpu.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online_cpus = cpu.get("online_cpus") or len(cpu.get("cpu_usage", {}).get("percpu_usage") or []) or 1
+    cpu_percent = cpu_delta / system_delta * online_cpus * 100.0 if system_delta > 0 and cpu_delta > 0 else 0.0
+    
+    memory = stats.get("memory_stats", {})
+    # Jak docker CLI: bez pamięci podręcznej stron (cgroup v1: cache, v2: inactive_file)
+    cache = memory.get("stats", {}).get("inactive_file", memory.get("stats", {}).get("cache", 0))
+    usage = max(memory.get("usage", 0) - cache, 0)
+    limit = memory.get("limit", 0)
+    
+    networks = stats.get("networks", {}).values()
+    return {
+        "name": stats.get("name", "").lstrip("/"),
+        "read": stats.get("read"),
+        "cpu_percent": round(cpu_percent, 2),
+        "memory_usage": usage,
+        "memory_limit": limit,
+        "memory_percent": round(usage / limit * 100.0, 2) if limit else 0.0,
+        "net_rx": sum(network.get("rx_bytes", 0) for network in networks),
+        "net_tx": sum(network.get("tx_bytes", 0) for network in networks),
+        "pids": stats.get("pids_stats", {}).get("current")
+    }
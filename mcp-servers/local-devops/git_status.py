@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Strukturalny git status dla lokalnego serwera MCP DevOps
+Parser formatu --porcelain=v2 -z oraz cache wyników unieważniany przez obserwację systemu plików
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Obserwacja systemu plików (inotify / FSEvents / ReadDirectoryChangesW) - opcjonalna
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger('LocalDevOpsMCP.GitStatus')
+
+# Pliki w .git, których zmiana wpływa na wynik git status
+GIT_STATE_FILES = {"index", "HEAD", "packed-refs", "MERGE_HEAD", "CHERRY_PICK_HEAD", "REVERT_HEAD", "info"}
+# Zdarzenia zapisu - samo otwarcie/odczyt pliku (np. przez git status) nie unieważnia cache
+CHANGE_EVENTS = {"created", "deleted", "modified", "moved"}
+
+
+def parse_porcelain_v2(output: str) -> Dict[str, Any]:
+    """Zamień wynik `git status --porcelain=v2 --branch -z` na słownik"""
+    status: Dict[str, Any] = {
+        "branch": {},
+        "staged": [],
+        "unstaged": [],
+        "untracked": [],
+        "ignored": [],
+        "conflicts": []
+    }
+    records = output.split("\0")
+    index = 0
+    while index < len(records):
+        record = records[index]
+        index += 1
+        if not record:
+            continue
+        
+        kind = record[0]
+        if kind == "#":
+            key, _, value = record[2:].partition(" ")
+            if key == "branch.ab":
+                ahead, behind = value.split()
+                status["branch"]["ahead"] = int(ahead)
+                status["branch"]["behind"] = -int(behind)
+            else:
+                status["branch"][key.replace("branch.", "")] = value
+        elif kind in ("1", "2"):
+            # 1 XY sub mH mI mW hH hI path | 2 XY sub mH mI mW hH hI Xscore path\0origPath
+            parts = record.split(" ", 9 if kind == "2" else 8)
+            xy, path = parts[1], parts[-1]
+            entry: Dict[str, Any] = {"path": path}
+            if kind == "2":
+                if index >= len(records) or not records[index]:
+                    break  # origPath ucięty razem z wyjściem
+                entry["from"] = records[index]
+                entry["score"] = parts[8]
+                index += 1
+            if parts[2] != "N...":
+                entry["submodule"] = parts[2]
+            if xy[0] != ".":
+                status["staged"].append(dict(entry, status=xy[0]))
+            if xy[1] != ".":
+                status["unstaged"].append(dict(entry, status=xy[1]))
+        elif kind == "u":
+            parts = record.split(" ", 10)
+            status["conflicts"].append({"path": parts[-1], "status": parts[1]})
+        elif kind == "?":
+            status["untracked"].append(record[2:])
+        elif kind == "!":
+            status["ignored"].append(record[2:])
+    
+    status["clean"] = not any(status[key] for key in ("staged", "unstaged", "untracked", "conflicts"))
+    return status
+
+
+class _RepoEventHandler(FileSystemEventHandler):
+    """Podbija generację repozytorium przy każdej istotnej zmianie w drzewie roboczym"""
+    
+    def __init__(self, cache: "GitStatusCache", root: str, git_dir: str):
+        super().__init__()
+        self.cache = cache
+        self.root = root
+        self.git_dir = git_dir
+    
+    def _relevant(self, path: str) -> bool:
+        if not path:
+            return False
+        if path != self.git_dir and not path.startswith(self.git_dir + os.sep):
+            return True
+        relative = os.path.relpath(path, self.git_dir)
+        if relative.endswith(".lock"):
+            return False
+        first = relative.split(os.sep, 1)[0]
+        return first in GIT_STATE_FILES or first == "refs"
+    
+    def on_any_event(self, event):
+        if event.event_type not in CHANGE_EVENTS:
+            return
+        if self._relevant(event.src_path) or self._relevant(getattr(event, "dest_path", "")):
+            self.cache.bump(self.root)
+
+
+class GitStatusCache:
+    """Ostatni wynik git status per ścieżka; ważny, dopóki obserwator nie zgłosi zmiany w repozytorium"""
+    
+    def __init__(self, max_repos: int = 8):
+        self.max_repos = max_repos
+        self._lock = threading.Lock()
+        self._generations: Dict[str, int] = {}
+        self._observers: "OrderedDict[str, Any]" = OrderedDict()
+        self._entries: Dict[Tuple[str, ...], Tuple[str, int, Any]] = {}
+        # Ścieżka -> (katalog główny repozytorium, katalog .git)
+        self.repos: Dict[str, Tuple[str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return Observer is not None and self.max_repos > 0
+    
+    def bump(self, root: str):
+        with self._lock:
+            self._generations[root] = self._generations.get(root, 0) + 1
+    
+    def generation(self, root: str, git_dir: str) -> Optional[int]:
+        """Bieżąca generacja repozytorium (zaczyna obserwację); None gdy obserwacja niemożliwa"""
+        with self._lock:
+            if root in self._observers:
+                self._observers.move_to_end(root)
+                return self._generations.get(root, 0)
+        
+        try:
+            observer = Observer()
+            handler = _RepoEventHandler(self, root, git_dir)
+            observer.schedule(handler, root, recursive=True)
+            # Worktree/submoduł - katalog .git poza drzewem roboczym
+            if not git_dir.startswith(root + os.sep):
+                observer.schedule(handler, git_dir, recursive=True)
+            observer.daemon = True
+            observer.start()
+        except Exception as e:
+            # np. wyczerpany limit inotify (fs.inotify.max_user_watches)
+            logger.warning(f"Nie można obserwować {root}: {e}")
+            return None
+        
+        evicted = []
+        with self._lock:
+            self._observers[root] = observer
+            self._generations.setdefault(root, 0)
+            while len(self._observers) > self.max_repos:
+                old_root, old_observer = self._observers.popitem(last=False)
+                self._generations.pop(old_root, None)
+                self._entries = {key: value for key, value in self._entries.items() if value[0] != old_root}
+                evicted.append(old_observer)
+            generation = self._generations[root]
+        for old_observer in evicted:
+            old_observer.stop()
+        return generation
+    
+    def get(self, key: Tuple[str, ...]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._generations.get(entry[0]) == entry[1]:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            return None
+    
+    def put(self, key: Tuple[str, ...], root: str, generation: int, result: Any):
+        with self._lock:
+            self._entries[key] = (root, generation, result)
+    
+    def close(self):
+        with self._lock:
+            observers = list(self._observers.values())
+            self._observers.clear()
+        for observer in observers:
+            observer.stop()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "watched_repos": len(self._observers),
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
@@ -5,14 +5,25 @@ Serwer obsługuje lokalne narzędzia DevOps jak Docker, kubectl, helm itp.
 """
 
 import asyncio
+import codecs
+import hashlib
 import os
-import subprocess
+import shutil
 import json
 import logging
+import time
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional
 import sys
 
+import aiohttp
+
+from docker_api import DockerAPIError, DockerClient, summarize_container, summarize_stats
+from git_status import GitStatusCache, parse_porcelain_v2
+from metrics import MetricsRegistry
+from shell_pool import SHELLS, ShellPool, one_off_command
+
 # Dodaj ścieżkę do MCP SDK (może wymagać instalacji: pip install mcp)
 try:
     from mcp.server import Server
@@ -30,118 +41,573 @@ logging.basicConfig(
 )
 logger = logging.getLogger('LocalDevOpsMCP')
 
+# Sondy dostępności narzędzi: nazwa -> komenda
+TOOL_PROBES = {
+    'docker': ['docker', '--version'],
+    'kubectl': ['kubectl', 'version', '--client'],
+    'helm': ['helm', 'version'],
+    'git': ['git', '--version'],
+    'azure-cli': ['az', '--version'],
+    'terraform': ['terraform', 'version'],
+    'powershell': ['powershell', '-Command', 'Get-Host']
+}
+
+METRICS_URI = "localdevops://metrics"
+
+class CommandResult(NamedTuple):
+    """Wynik komendy (odpowiednik subprocess.CompletedProcess)"""
+    returncode: int
+    stdout: str
+    stderr: str
+    truncated: bool = False
+
+class CommandTimeout(Exception):
+    """Komenda przekroczyła limit czasu i została zabita"""
+
+class OutputBuffer:
+    """Ograniczony bufor wyjścia - zachowuje początek i koniec, środek zastępuje znacznikiem (tail_limit=0: tylko początek)"""
+    
+    def __init__(self, head_limit: int, tail_limit: int):
+        self.head_limit = head_limit
+        self.tail_limit = tail_limit
+        self._head: List[str] = []
+        self._head_size = 0
+        self._tail: deque = deque()
+        self._tail_size = 0
+        self.dropped = 0
+    
+    def append(self, text: str):
+        if self._head_size < self.head_limit:
+            taken = text[:self.head_limit - self._head_size]
+            self._head.append(taken)
+            self._head_size += len(taken)
+            text = text[len(taken):]
+            if not text:
+                return
+        
+        if not self.tail_limit:
+            self.dropped += len(text)
+            return
+        self._tail.append(text)
+        self._tail_size += len(text)
+        while self._tail_size > self.tail_limit:
+            excess = self._tail_size - self.tail_limit
+            first = self._tail[0]
+            if len(first) <= excess:
+                self._tail.popleft()
+                excess = len(first)
+            else:
+                self._tail[0] = first[excess:]
+            self._tail_size -= excess
+            self.dropped += excess
+    
+    @property
+    def truncated(self) -> bool:
+        return self.dropped > 0
+    
+    def render(self) -> str:
+        head = "".join(self._head)
+        if not self.tail_limit:
+            return head
+        tail = "".join(self._tail)
+        if self.dropped:
+            return f"{head}\n... [pominięto {self.dropped} znaków] ...\n{tail}"
+        return head + tail
+
+class ProgressReporter:
+    """Wysyła przyrostowe wyjście komendy jako powiadomienia MCP o postępie"""
+    
+    def __init__(self, session, token, interval: float, max_message: int = 4096):
+        self.session = session
+        self.token = token
+        self.interval = interval
+        self.max_message = max_message
+        self.received = 0
+        self._pending: List[str] = []
+        self._last_sent = 0.0
+    
+    async def output(self, stream: str, text: str):
+        self.received += len(text)
+        self._pending.append(text if stream == "stdout" else f"[stderr] {text}")
+        # Łączenie fragmentów - co najwyżej jedno powiadomienie na interwał
+        if time.monotonic() - self._last_sent >= self.interval:
+            await self.flush()
+    
+    async def flush(self):
+        if not self._pending:
+            return
+        message = "".join(self._pending)[-self.max_message:]
+        self._pending.clear()
+        self._last_sent = time.monotonic()
+        try:
+            await self.session.send_progress_notification(
+                self.token, progress=float(self.received), message=message
+            )
+        except Exception as e:
+            logger.debug(f"Nie udało się wysłać powiadomienia o postępie: {e}")
+
+
+# Katalog narzędzi budowany raz przy imporcie - tools/list nie tworzy obiektów przy każdym wywołaniu
+TOOLS: List[types.Tool] = [
+    types.Tool(
+        name="docker_ps",
+        description="Lista uruchomionych kontenerów Docker",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "all": {
+                    "type": "boolean",
+                    "description": "Pokaż wszystkie kontenery (również zatrzymane)",
+                    "default": False
+                },
+                "status": {
+                    "type": "string",
+                    "description": "Filtr statusu (created, running, paused, restarting, exited, dead)"
+                },
+                "label": {
+                    "type": "string",
+                    "description": "Filtr etykiety (klucz lub klucz=wartość)"
+                },
+                "name": {
+                    "type": "string",
+                    "description": "Filtr nazwy kontenera"
+                }
+            }
+        }
+    ),
+    types.Tool(
+        name="docker_logs",
+        description="Logi kontenera Docker (przyrostowo jako powiadomienia o postępie)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "container": {
+                    "type": "string",
+                    "description": "ID lub nazwa kontenera"
+                },
+                "tail": {
+                    "type": "integer",
+                    "description": "Liczba ostatnich linii",
+                    "default": 200
+                },
+                "since": {
+                    "type": "integer",
+                    "description": "Tylko logi od tego czasu (unix timestamp)"
+                },
+                "timestamps": {
+                    "type": "boolean",
+                    "description": "Dołącz znaczniki czasu",
+                    "default": False
+                },
+                "follow": {
+                    "type": "boolean",
+                    "description": "Śledź nowe logi przez czas duration",
+                    "default": False
+                },
+                "duration": {
+                    "type": "integer",
+                    "description": "Czas śledzenia w sekundach (dla follow)",
+                    "default": 10
+                }
+            },
+            "required": ["container"]
+        }
+    ),
+    types.Tool(
+        name="docker_stats",
+        description="Statystyki zasobów kontenera Docker (CPU, pamięć, sieć)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "container": {
+                    "type": "string",
+                    "description": "ID lub nazwa kontenera"
+                },
+                "samples": {
+                    "type": "integer",
+                    "description": "Liczba próbek (co ok. 1 s)",
+                    "default": 1
+                }
+            },
+            "required": ["container"]
+        }
+    ),
+    types.Tool(
+        name="git_status",
+        description="Status repozytorium Git",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {
+                    "type": "string",
+                    "description": "Ścieżka do repozytorium",
+                    "default": "."
+                },
+                "format": {
+                    "type": "string",
+                    "enum": ["short", "structured"],
+                    "description": "short - tekst jak git status --short; structured - JSON z porcelain v2 (cache)",
+                    "default": "short"
+                },
+                "fsmonitor": {
+                    "type": "boolean",
+                    "description": "Użyj core.fsmonitor i core.untrackedCache (duże repozytoria)",
+                    "default": False
+                }
+            }
+        }
+    ),
+    types.Tool(
+        name="run_command",
+        description="Wykonaj komendę systemową",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "command": {
+                    "type": "string",
+                    "description": "Komenda do wykonania"
+                },
+                "session": {
+                    "type": "string",
+                    "enum": list(SHELLS),
+                    "description": (
+                        "Wykonaj w trwałej sesji powłoki (stan i załadowane moduły zachowane między wywołaniami). "
+                        "Wymaga LOCAL_DEVOPS_SHELL_SESSIONS=1; komenda jest interpretowana przez powłokę "
+                        "(;, |, $(), >, &&), więc lista zablokowanych komend jej nie obejmuje"
+                    )
+                },
+                "cwd": {
+                    "type": "string",
+                    "description": "Katalog roboczy",
+                    "default": "."
+                }
+            },
+            "required": ["command"]
+        }
+    )
+]
+
+
 class LocalDevOpsMCPServer:
     """Lokalny serwer MCP dla narzędzi DevOps"""
     
     def __init__(self):
         self.server = Server("local-devops-mcp")
+        
+        # Limit czasu i równoległość wykonywanych komend
+        self.command_timeout = float(os.getenv("LOCAL_DEVOPS_COMMAND_TIMEOUT", "30"))
+        self.max_concurrency = int(os.getenv("LOCAL_DEVOPS_MAX_CONCURRENCY", "4"))
+        self._command_slots = asyncio.Semaphore(self.max_concurrency)
+        
+        # Bufor wyjścia (początek + koniec) i częstotliwość powiadomień o postępie
+        self.output_head = int(os.getenv("LOCAL_DEVOPS_OUTPUT_HEAD", "16384"))
+        self.output_tail = int(os.getenv("LOCAL_DEVOPS_OUTPUT_TAIL", "65536"))
+        self.progress_interval = float(os.getenv("LOCAL_DEVOPS_PROGRESS_INTERVAL", "0.5"))
+        
         self.setup_handlers()
         
-        # Sprawdź dostępność narzędzi
-        self.available_tools = self._check_available_tools()
-        logger.info(f"Dostępne narzędzia: {list(self.available_tools.keys())}")
+        # Sesje powłoki (argument session) są domyślnie wyłączone: powłoka interpretuje ;, |, $(), > i &&,
+        # więc lista zablokowanych komend w run_command nie chroni komend wykonywanych w sesji
+        self.shell_sessions = os.getenv("LOCAL_DEVOPS_SHELL_SESSIONS", "0").lower() in ("1", "true", "yes")
+        if self.shell_sessions:
+            logger.warning("⚠️ Sesje powłoki włączone - komendy z argumentem session omijają listę zablokowanych komend")
+        
+        # Pula trwałych sesji (LOCAL_DEVOPS_SHELL_POOL_SIZE=0 - każda komenda sesji w jednorazowym procesie powłoki)
+        self.shell_pool = ShellPool(
+            max_size=int(os.getenv("LOCAL_DEVOPS_SHELL_POOL_SIZE", "4")),
+            idle_timeout=float(os.getenv("LOCAL_DEVOPS_SHELL_IDLE_TIMEOUT", "300"))
+        )
+        
+        # Docker Engine API przez gniazdo demona (DOCKER_HOST), CLI tylko jako zapas
+        self.docker = DockerClient(timeout=self.command_timeout)
+        
+        # Cache strukturalnego git status unieważniany przez obserwację repozytoriów (0 wyłącza)
+        self.git_status_cache = GitStatusCache(max_repos=int(os.getenv("LOCAL_DEVOPS_GIT_WATCH_MAX", "8")))
+        self.git_status_max_output = int(os.getenv("LOCAL_DEVOPS_GIT_STATUS_MAX_OUTPUT", str(16 * 1024 * 1024)))
+        
+        # Dostępność narzędzi sprawdzana w tle (cache na dysku z TTL)
+        self.available_tools: Dict[str, bool] = {}
+        self.tool_cache_path = os.path.expanduser(
+            os.getenv("LOCAL_DEVOPS_TOOL_CACHE", "~/.cache/local-devops-mcp/tools.json")
+        )
+        self.tool_cache_ttl = float(os.getenv("LOCAL_DEVOPS_TOOL_CACHE_TTL", "86400"))
+        self._discovery: Optional[asyncio.Task] = None
+        
+        # Metryki narzędzi (zasób localdevops://metrics)
+        self.metrics = MetricsRegistry("local_devops_mcp")
+        self.tool_duration = self.metrics.histogram(
+            "tool_duration_seconds", "Czas wykonania narzędzia MCP", ("tool", "outcome")
+        )
+        self.tools_in_flight = self.metrics.gauge("tools_in_flight", "Wywołania narzędzi w toku", ("tool",))
+        self.tool_bytes_in = self.metrics.counter("tool_request_bytes_total", "Rozmiar argumentów narzędzi (JSON)", ("tool",))
+        self.tool_bytes_out = self.metrics.counter("tool_response_bytes_total", "Rozmiar odpowiedzi narzędzi", ("tool",))
+        self.metrics.register_stats("shell_pool", self.shell_pool.stats)
+        self.metrics.register_stats("git_status", self.git_status_cache.stats)
     
-    def _check_available_tools(self) -> Dict[str, bool]:
+    async def get_available_tools(self) -> Dict[str, bool]:
+        """Wynik wykrywania narzędzi (uruchamia je leniwie przy pierwszym użyciu)"""
+        if self._discovery is None:
+            self._discovery = asyncio.create_task(self._check_available_tools())
+        return await asyncio.shield(self._discovery)
+    
+    async def _check_available_tools(self) -> Dict[str, bool]:
         """Sprawdź które narzędzia są dostępne w systemie"""
-        tools_to_check = {
-            'docker': 'docker --version',
-            'kubectl': 'kubectl version --client',
-            'helm': 'helm version',
-            'git': 'git --version',
-            'azure-cli': 'az --version',
-            'terraform': 'terraform version',
-            'powershell': 'powershell -Command "Get-Host"'
-        }
+        binaries = {tool: shutil.which(command[0]) for tool, command in TOOL_PROBES.items()}
+        fingerprint = self._tool_fingerprint(binaries)
         
-        available = {}
-        for tool, command in tools_to_check.items():
-            try:
-                result = subprocess.run(
-                    command.split(), 
-                    capture_output=True, 
-                    text=True, 
-                    timeout=5
-                )
-                available[tool] = result.returncode == 0
-            except (subprocess.TimeoutExpired, FileNotFoundError):
-                available[tool] = False
+        available = self._load_tool_cache(fingerprint)
+        if available is None:
+            # Sondy równolegle; brak pliku wykonywalnego w PATH = narzędzie niedostępne
+            results = await asyncio.gather(*[
+                self._probe_tool([path] + TOOL_PROBES[tool][1:]) if path else self._unavailable()
+                for tool, path in binaries.items()
+            ])
+            available = dict(zip(binaries, results))
+            self._save_tool_cache(fingerprint, available)
         
+        self.available_tools = available
+        logger.info(f"Dostępne narzędzia: {[tool for tool, ok in available.items() if ok]}")
         return available
     
+    @staticmethod
+    async def _unavailable() -> bool:
+        return False
+    
+    @staticmethod
+    async def _probe_tool(cmd: List[str], timeout: float = 5) -> bool:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            return False
+        try:
+            return await asyncio.wait_for(process.wait(), timeout) == 0
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return False
+    
+    @staticmethod
+    def _tool_fingerprint(binaries: Dict[str, Optional[str]]) -> str:
+        """Klucz cache: PATH oraz ścieżki i czasy modyfikacji plików wykonywalnych"""
+        digest = hashlib.sha256(os.environ.get("PATH", "").encode())
+        for tool, path in sorted(binaries.items()):
+            mtime = None
+            if path:
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    pass
+            digest.update(f"\0{tool}={path}@{mtime}".encode())
+        return digest.hexdigest()
+    
+    def _load_tool_cache(self, fingerprint: str) -> Optional[Dict[str, bool]]:
+        try:
+            with open(self.tool_cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("fingerprint") != fingerprint or time.time() - cached.get("checked_at", 0) > self.tool_cache_ttl:
+            return None
+        return cached.get("tools")
+    
+    def _save_tool_cache(self, fingerprint: str, available: Dict[str, bool]):
+        try:
+            os.makedirs(os.path.dirname(self.tool_cache_path), exist_ok=True)
+            temp_path = f"{self.tool_cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "checked_at": time.time(), "tools": available}, f)
+            os.replace(temp_path, self.tool_cache_path)
+        except OSError as e:
+            logger.warning(f"Nie udało się zapisać cache narzędzi: {e}")
+    
+    async def _exec(self, cmd: List[str], cwd: Optional[str] = None, timeout: Optional[float] = None,
+                    progress: Optional[ProgressReporter] = None, max_output: Optional[int] = None) -> CommandResult:
+        """Uruchom komendę bez blokowania pętli zdarzeń (z limitem czasu i równoległości)"""
+        timeout = self.command_timeout if timeout is None else timeout
+        # max_output - wyjście maszynowe: zachowaj tylko początek (bez znacznika), obcięcie w CommandResult.truncated
+        if max_output is None:
+            stdout = OutputBuffer(self.output_head, self.output_tail)
+        else:
+            stdout = OutputBuffer(max_output, 0)
+        stderr = OutputBuffer(self.output_head, self.output_tail)
+        
+        async def pump(reader: asyncio.StreamReader, buffer: OutputBuffer, name: str):
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                chunk = await reader.read(65536)
+                text = decoder.decode(chunk, final=not chunk)
+                if text:
+                    buffer.append(text)
+                    if progress is not None:
+                        await progress.output(name, text)
+                if not chunk:
+                    break
+        
+        async with self._command_slots:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=cwd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                await asyncio.wait_for(asyncio.gather(
+                    pump(process.stdout, stdout, "stdout"),
+                    pump(process.stderr, stderr, "stderr"),
+                    process.wait()
+                ), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise CommandTimeout(f"Komenda przekroczyła limit czasu ({timeout:g}s): {' '.join(cmd)}")
+            except asyncio.CancelledError:
+                # Anulowane wywołanie narzędzia nie może zostawić procesu
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        
+        if progress is not None:
+            await progress.flush()
+        return CommandResult(process.returncode, stdout.render(), stderr.render(), stdout.truncated)
+    
+    async def _exec_in_session(self, kind: str, command: str, cwd: str,
+                               progress: Optional[ProgressReporter] = None) -> CommandResult:
+        """Wykonaj komendę w trwałej sesji z puli (stderr dołączony do stdout)"""
+        if kind not in SHELLS:
+            raise ValueError(f"Nieznany rodzaj sesji: {kind}")
+        if not self.shell_pool.enabled:
+            return await self._exec(one_off_command(kind, command), cwd=cwd, progress=progress)
+        
+        output = OutputBuffer(self.output_head, self.output_tail)
+        
+        async def on_output(text: str):
+            output.append(text)
+            if progress is not None:
+                await progress.output("stdout", text)
+        
+        async with self._command_slots:
+            try:
+                returncode = await self.shell_pool.run(kind, cwd, command, self.command_timeout, on_output)
+            except asyncio.TimeoutError:
+                raise CommandTimeout(f"Komenda przekroczyła limit czasu ({self.command_timeout:g}s): {command}")
+        if returncode is None:
+            # Wszystkie sesje zajęte - jednorazowy proces z tą samą semantyką powłoki
+            return await self._exec(one_off_command(kind, command), cwd=cwd, progress=progress)
+        
+        if progress is not None:
+            await progress.flush()
+        return CommandResult(returncode, output.render(), "")
+    
+    def _progress_reporter(self) -> Optional[ProgressReporter]:
+        """Reporter postępu, jeśli klient przekazał progressToken w wywołaniu narzędzia"""
+        try:
+            context = self.server.request_context
+        except LookupError:
+            return None
+        token = context.meta.progressToken if context.meta else None
+        if token is None:
+            return None
+        return ProgressReporter(context.session, token, self.progress_interval)
+    
     def setup_handlers(self):
         """Konfiguracja handlerów MCP"""
         
         @self.server.list_tools()
         async def handle_list_tools() -> List[types.Tool]:
-            return [
-                types.Tool(
-                    name="docker_ps",
-                    description="Lista uruchomionych kontenerów Docker",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "all": {
-                                "type": "boolean",
-                                "description": "Pokaż wszystkie kontenery (również zatrzymane)",
-                                "default": False
-                            }
-                        }
-                    }
-                ),
-                types.Tool(
-                    name="git_status",
-                    description="Status repozytorium Git",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "path": {
-                                "type": "string",
-                                "description": "Ścieżka do repozytorium",
-                                "default": "."
-                            }
-                        }
-                    }
-                ),
-                types.Tool(
-                    name="run_command",
-                    description="Wykonaj komendę systemową",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "command": {
-                                "type": "string",
-                                "description": "Komenda do wykonania"
-                            }
-                        },
-                        "required": ["command"]
-                    }
-                )
-            ]
+            return TOOLS
         
         @self.server.call_tool()
         async def handle_call_tool(name: str, arguments: dict) -> List[types.TextContent]:
+            started = time.perf_counter()
+            result: List[types.TextContent] = []
+            self.tool_bytes_in.inc(len(json.dumps(arguments, default=str)), tool=name)
             try:
-                if name == "docker_ps":
-                    return await self._docker_ps(arguments)
-                elif name == "git_status":
-                    return await self._git_status(arguments)
-                elif name == "run_command":
-                    return await self._run_command(arguments)
-                else:
-                    raise ValueError(f"Nieznane narzędzie: {name}")
-            except Exception as e:
+                with self.tools_in_flight.track(tool=name):
+                    result = await self._call_tool(name, arguments)
+                return result
+            finally:
+                # Narzędzia zgłaszają błędy tekstem odpowiedzi, a nie wyjątkiem
+                failed = not result or result[0].text.startswith(("❌", "Błąd"))
+                self.tool_duration.observe(time.perf_counter() - started, tool=name, outcome="error" if failed else "ok")
+                self.tool_bytes_out.inc(sum(len(content.text.encode()) for content in result), tool=name)
+        
+        @self.server.list_resources()
+        async def handle_list_resources() -> List[types.Resource]:
+            return [
+                types.Resource(
+                    uri=METRICS_URI,
+                    name="Server Metrics",
+                    description="Metryki serwera w formacie Prometheus (narzędzia, sesje powłoki, cache git status)",
+                    mimeType="text/plain"
+                )
+            ]
+        
+        @self.server.read_resource()
+        async def handle_read_resource(uri: str) -> str:
+            if str(uri) == METRICS_URI:
+                return self.metrics.render()
+            raise ValueError(f"Nieznany zasób: {uri}")
+    
+    async def _call_tool(self, name: str, arguments: dict) -> List[types.TextContent]:
+        try:
+            progress = self._progress_reporter()
+            if name == "docker_ps":
+                return await self._docker_ps(arguments, progress)
+            elif name == "docker_logs":
+                return await self._docker_logs(arguments, progress)
+            elif name == "docker_stats":
+                return await self._docker_stats(arguments, progress)
+            elif name == "git_status":
+                return await self._git_status(arguments)
+            elif name == "run_command":
+                return await self._run_command(arguments, progress)
+            else:
+                raise ValueError(f"Nieznane narzędzie: {name}")
+        except Exception as e:
+            return [types.TextContent(
+                type="text",
+                text=f"❌ Błąd: {str(e)}"
+            )]
+    
+    async def _docker_ps(self, args: dict, progress: Optional[ProgressReporter] = None) -> List[types.TextContent]:
+        filters = {key: [args[key]] for key in ("status", "label", "name") if args.get(key)}
+        try:
+            containers = await self.docker.containers(all=args.get("all", False), filters=filters)
+        except DockerAPIError as e:
+            return [types.TextContent(type="text", text=f"Błąd Docker: {e.message}")]
+        except (aiohttp.ClientConnectionError, OSError) as e:
+            logger.info(f"Docker Engine API niedostępne ({e}), użycie CLI")
+            return await self._docker_ps_cli(args, filters, progress)
+        
+        summary = [summarize_container(container) for container in containers]
+        return [types.TextContent(
+            type="text",
+            text=json.dumps({"count": len(summary), "containers": summary}, ensure_ascii=False, indent=2)
+        )]
+    
+    async def _docker_ps_cli(self, args: dict, filters: Dict[str, List[str]],
+                             progress: Optional[ProgressReporter] = None) -> List[types.TextContent]:
+        try:
+            if not (await self.get_available_tools()).get("docker", True):
                 return [types.TextContent(
                     type="text",
-                    text=f"❌ Błąd: {str(e)}"
+                    text="❌ Docker nie jest dostępny w tym systemie"
                 )]
-    
-    async def _docker_ps(self, args: dict) -> List[types.TextContent]:
-        try:
+            
             cmd = ["docker", "ps"]
             if args.get("all", False):
                 cmd.append("-a")
+            for key, values in filters.items():
+                cmd += ["--filter", f"{key}={values[0]}"]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = await self._exec(cmd, progress=progress)
             
             if result.returncode == 0:
                 return [types.TextContent(
@@ -159,15 +625,92 @@ class LocalDevOpsMCPServer:
                 text=f"Błąd wykonania: {str(e)}"
             )]
     
+    async def _docker_logs(self, args: dict, progress: Optional[ProgressReporter] = None) -> List[types.TextContent]:
+        container = args["container"]
+        follow = bool(args.get("follow", False))
+        output = OutputBuffer(self.output_head, self.output_tail)
+        
+        async def consume():
+            logs = self.docker.logs(
+                container, tail=args.get("tail", 200), since=args.get("since"),
+                timestamps=bool(args.get("timestamps", False)), follow=follow
+            )
+            try:
+                async for stream, text in logs:
+                    output.append(text if stream == "stdout" else f"[stderr] {text}")
+                    if progress is not None:
+                        await progress.output(stream, text)
+            finally:
+                # Po anulowaniu przez wait_for zamknij strumień HTTP od razu, a nie dopiero przy GC
+                await logs.aclose()
+        
+        try:
+            await asyncio.wait_for(consume(), float(args.get("duration", 10)) if follow else self.command_timeout)
+        except asyncio.TimeoutError:
+            if not follow:
+                partial = output.render()
+                text = f"❌ Pobieranie logów kontenera {container} przekroczyło limit czasu ({self.command_timeout:g}s)"
+                if partial:
+                    text += f"\n\nCzęściowe logi:\n```\n{partial}\n```"
+                return [types.TextContent(type="text", text=text)]
+            # Koniec okna śledzenia (follow) - zwróć zebrane logi
+        except DockerAPIError as e:
+            return [types.TextContent(type="text", text=f"Błąd Docker: {e.message}")]
+        except (aiohttp.ClientConnectionError, OSError) as e:
+            return [types.TextContent(type="text", text=f"❌ Docker Engine API niedostępne: {e}")]
+        
+        if progress is not None:
+            await progress.flush()
+        logs = output.render()
+        return [types.TextContent(
+            type="text",
+            text=f"Logi kontenera {container}:\n```\n{logs}\n```" if logs else f"Brak logów kontenera {container}"
+        )]
+    
+    async def _docker_stats(self, args: dict, progress: Optional[ProgressReporter] = None) -> List[types.TextContent]:
+        container = args["container"]
+        samples = max(1, min(int(args.get("samples", 1)), 60))
+        results = []
+        
+        async def consume():
+            stream = self.docker.stats(container, samples)
+            try:
+                async for stats in stream:
+                    sample = summarize_stats(stats)
+                    results.append(sample)
+                    if progress is not None:
+                        await progress.output("stdout", json.dumps(sample) + "\n")
+            finally:
+                await stream.aclose()
+        
+        # Demon wysyła próbkę co ~1s - zawieszony strumień nie może blokować narzędzia bez końca
+        deadline = self.command_timeout + samples
+        try:
+            await asyncio.wait_for(consume(), deadline)
+        except asyncio.TimeoutError:
+            text = f"❌ Pobieranie statystyk kontenera {container} przekroczyło limit czasu ({deadline:g}s)"
+            if results:
+                text += f"\n\nZebrane próbki:\n```\n{json.dumps(results, ensure_ascii=False, indent=2)}\n```"
+            return [types.TextContent(type="text", text=text)]
+        except DockerAPIError as e:
+            return [types.TextContent(type="text", text=f"Błąd Docker: {e.message}")]
+        except (aiohttp.ClientConnectionError, OSError) as e:
+            return [types.TextContent(type="text", text=f"❌ Docker Engine API niedostępne: {e}")]
+        
+        if progress is not None:
+            await progress.flush()
+        return [types.TextContent(
+            type="text",
+            text=json.dumps(results[0] if samples == 1 and results else results, ensure_ascii=False, indent=2)
+        )]
+    
     async def _git_status(self, args: dict) -> List[types.TextContent]:
         try:
             path = args.get("path", ".")
-            result = subprocess.run(
-                ["git", "status", "--short"], 
-                cwd=path, 
-                capture_output=True, 
-                text=True
-            )
+            if args.get("format", "short") == "structured":
+                return await self._git_status_structured(os.path.abspath(path), bool(args.get("fsmonitor", False)))
+            
+            result = await self._exec(["git", "status", "--short"], cwd=path)
             
             if result.returncode == 0:
                 if result.stdout.strip():
@@ -191,7 +734,45 @@ class LocalDevOpsMCPServer:
                 text=f"Błąd wykonania: {str(e)}"
             )]
     
-    async def _run_command(self, args: dict) -> List[types.TextContent]:
+    async def _git_status_structured(self, path: str, fsmonitor: bool) -> List[types.TextContent]:
+        """git status --porcelain=v2 -z jako JSON; wynik ważny do zmiany w repozytorium"""
+        key = (path, str(fsmonitor))
+        cache = self.git_status_cache
+        status = cache.get(key) if cache.enabled else None
+        
+        if status is None:
+            repo = cache.repos.get(path)
+            if repo is None:
+                result = await self._exec(["git", "rev-parse", "--show-toplevel", "--absolute-git-dir"], cwd=path)
+                if result.returncode != 0:
+                    return [types.TextContent(type="text", text=f"Błąd Git: {result.stderr}")]
+                root, git_dir = result.stdout.splitlines()[:2]
+                repo = cache.repos[path] = (os.path.normpath(root), os.path.normpath(git_dir))
+            
+            # Obserwacja startuje przed git status - zmiana w trakcie od razu unieważni wynik
+            generation = await asyncio.to_thread(cache.generation, *repo) if cache.enabled else None
+            
+            cmd = ["git"]
+            if fsmonitor:
+                cmd += ["-c", "core.fsmonitor=true", "-c", "core.untrackedCache=true"]
+            cmd += ["status", "--porcelain=v2", "--branch", "-z"]
+            result = await self._exec(cmd, cwd=path, max_output=self.git_status_max_output)
+            if result.returncode != 0:
+                return [types.TextContent(type="text", text=f"Błąd Git: {result.stderr}")]
+            
+            output = result.stdout
+            if result.truncated:
+                # Odrzuć ostatni, ucięty rekord - parsujemy tylko kompletne wpisy
+                output = output[:output.rfind("\0") + 1]
+            status = parse_porcelain_v2(output)
+            if result.truncated:
+                status["truncated"] = True
+            if generation is not None:
+                cache.put(key, repo[0], generation, status)
+        
+        return [types.TextContent(type="text", text=json.dumps(status, ensure_ascii=False, indent=2))]
+    
+    async def _run_command(self, args: dict, progress: Optional[ProgressReporter] = None) -> List[types.TextContent]:
         try:
             command = args["command"]
             
@@ -203,12 +784,16 @@ class LocalDevOpsMCPServer:
                     text="❌ Komenda odrzucona ze względów bezpieczeństwa"
                 )]
             
-            result = subprocess.run(
-                command.split(), 
-                capture_output=True, 
-                text=True,
-                timeout=30
-            )
+            cwd = os.path.abspath(args.get("cwd", "."))
+            if args.get("session"):
+                if not self.shell_sessions:
+                    return [types.TextContent(
+                        type="text",
+                        text="❌ Sesje powłoki są wyłączone (włącz przez LOCAL_DEVOPS_SHELL_SESSIONS=1)"
+                    )]
+                result = await self._exec_in_session(args["session"], command, cwd, progress)
+            else:
+                result = await self._exec(command.split(), cwd=cwd, progress=progress)
             
             output = f"Komenda: {command}\nKod powrotu: {result.returncode}\n"
             if result.stdout:
@@ -217,7 +802,7 @@ class LocalDevOpsMCPServer:
                 output += f"\nStderr:\n{result.stderr}"
             
             return [types.TextContent(type="text", text=output)]
-            
+        
         except Exception as e:
             return [types.TextContent(
                 type="text",
@@ -227,12 +812,19 @@ class LocalDevOpsMCPServer:
     async def run(self):
         """Uruchom serwer MCP"""
         logger.info("Uruchamianie lokalnego serwera MCP DevOps...")
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                self.server.create_initialization_options()
-            )
+        # Wykrywanie narzędzi poza ścieżką startu - serwer odpowiada od razu
+        self._discovery = asyncio.create_task(self._check_available_tools())
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            await self.shell_pool.close()
+            await self.docker.close()
+            self.git_status_cache.close()
 
 def main():
     """Główna funkcja"""
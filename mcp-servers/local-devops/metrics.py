@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Metryki lokalnego serwera MCP DevOps w formacie tekstowym Prometheus
+Liczniki, wskaźniki i histogramy narzędzi oraz eksport płaskich statystyk komponentów (pula sesji, cache git status)
+"""
+
+import bisect
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+logger = logging.getLogger('LocalDevOpsMCP.Metrics')
+
+# Granice kubełków histogramów opóźnień (sekundy)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+NAME_INVALID = re.compile(r"[^a-zA-Z0-9_]")
+
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Family:
+    """Rodzina szeregów o tej samej nazwie i zestawie etykiet"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], Any] = {}
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def _labels(self, key: Tuple[str, ...], *extra: Tuple[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key)) + extra
+    
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            series = list(self._series.items())
+        for key, value in series:
+            yield "", self._labels(key), value
+
+
+class Counter(_Family):
+    kind = "counter"
+    
+    def inc(self, value: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+    
+    def dec(self, value: float = 1.0, **labels: Any):
+        self.inc(-value, **labels)
+    
+    @contextmanager
+    def track(self, **labels: Any):
+        """Zwiększ na czas bloku (np. liczba wywołań w toku)"""
+        self.inc(1, **labels)
+        try:
+            yield
+        finally:
+            self.dec(1, **labels)
+
+
+class Histogram(_Family):
+    kind = "histogram"
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [liczniki per kubełek (ostatni = powyżej największej granicy), suma, liczba]
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            series = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                yield "_bucket", self._labels(key, ("le", _format_value(bound))), cumulative
+            yield "_sum", self._labels(key), total
+            yield "_count", self._labels(key), count
+
+
+class MetricsRegistry:
+    """Rejestr metryk z eksportem w formacie tekstowym Prometheus"""
+    
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._families: Dict[str, _Family] = {}
+        self._collectors: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+    
+    def _register(self, family: _Family) -> Any:
+        existing = self._families.get(family.name)
+        if existing is not None:
+            return existing
+        self._families[family.name] = family
+        return family
+    
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+    
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+    
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+    
+    def register_stats(self, subsystem: str, collect: Callable[[], Dict[str, Any]]):
+        """Eksportuj liczby ze słownika stats() komponentu jako <namespace>_<subsystem>_<klucz>"""
+        self._collectors.append((subsystem, collect))
+    
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            full_name = f"{self.namespace}_{family.name}"
+            lines.append(f"# HELP {full_name} {family.help}")
+            lines.append(f"# TYPE {full_name} {family.kind}")
+            for suffix, labels, value in family.samples():
+                lines.append(f"{full_name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        
+        for subsystem, collect in self._collectors:
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.warning(f"Nie udało się zebrać statystyk {subsystem}: {e}")
+                continue
+            for key, value in stats.items():
+                if not isinstance(value, (bool, int, float)):
+                    continue
+                full_name = f"{self.namespace}_{subsystem}_{NAME_INVALID.sub('_', key)}"
+                lines.append(f"# TYPE {full_name} untyped")
+                lines.append(f"{full_name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Pula trwałych sesji powłoki dla lokalnego serwera MCP DevOps
+Komendy wysyłane przez stdin, koniec wyjścia rozpoznawany po znaczniku (sentinel)
+"""
+
+import asyncio
+import codecs
+import logging
+import shutil
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('LocalDevOpsMCP.ShellPool')
+
+# Rodzaj sesji -> (kandydaci na plik wykonywalny, argumenty startowe)
+SHELLS = {
+    'bash': (['bash'], ['--noprofile', '--norc']),
+    'pwsh': (['pwsh', 'powershell'], ['-NoLogo', '-NoProfile', '-NonInteractive', '-Command', '-'])
+}
+
+
+def find_shell(kind: str) -> Optional[str]:
+    candidates, _ = SHELLS[kind]
+    return next((path for path in map(shutil.which, candidates) if path), None)
+
+
+def one_off_command(kind: str, command: str) -> List[str]:
+    """Ta sama komenda jako jednorazowy proces (gdy pula nie ma wolnej sesji)"""
+    executable = find_shell(kind) or SHELLS[kind][0][0]
+    if kind == 'pwsh':
+        return [executable, '-NoLogo', '-NoProfile', '-NonInteractive', '-Command', command]
+    return [executable, '--noprofile', '--norc', '-c', command]
+
+
+class ShellSession:
+    """Pojedynczy długo żyjący proces powłoki"""
+    
+    def __init__(self, kind: str, cwd: str):
+        self.kind = kind
+        self.cwd = cwd
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.commands = 0
+    
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+    
+    async def start(self):
+        executable = find_shell(self.kind)
+        if executable is None:
+            raise FileNotFoundError(f"Powłoka {self.kind} nie jest dostępna w PATH")
+        self.process = await asyncio.create_subprocess_exec(
+            executable, *SHELLS[self.kind][1],
+            cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+    
+    def _script(self, command: str, sentinel: str) -> str:
+        """Komenda opakowana tak, by na końcu wypisać znacznik i kod wyjścia"""
+        if self.kind == 'pwsh':
+            return (
+                f"$global:LASTEXITCODE = 0; & {{ {command} }} *>&1 | Out-String -Stream; "
+                f"[Console]::Out.Write(\"`n{sentinel}:$([int]$LASTEXITCODE)`n\")\n"
+            )
+        # stdin komendy odcięty - inaczej mogłaby przeczytać kolejne komendy sesji
+        return f"{{ {command}\n}} < /dev/null 2>&1; printf '\\n{sentinel}:%d\\n' \"$?\"\n"
+    
+    async def run(self, command: str, on_output: Callable[[str], Awaitable[None]]) -> int:
+        """Wykonaj komendę w sesji; wyjście przekazywane przyrostowo do on_output"""
+        sentinel = f"__MCP_DONE_{uuid.uuid4().hex}__"
+        marker = f"\n{sentinel}:"
+        self.process.stdin.write(self._script(command, sentinel).encode())
+        await self.process.stdin.drain()
+        
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        while True:
+            chunk = await self.process.stdout.read(65536)
+            if not chunk:
+                raise ConnectionError(f"Sesja {self.kind} zakończyła się nieoczekiwanie")
+            pending += decoder.decode(chunk)
+            
+            index = pending.find(marker)
+            if index >= 0 and "\n" in pending[index + len(marker):]:
+                if index:
+                    await on_output(pending[:index])
+                code = pending[index + len(marker):].split("\n", 1)[0]
+                self.commands += 1
+                self.last_used = time.monotonic()
+                return int(code.strip() or 0)
+            
+            # Wyemituj wszystko poza końcówką, która może być początkiem znacznika
+            safe = len(pending) - len(marker) - 16 if index < 0 else index
+            if safe > 0:
+                await on_output(pending[:safe])
+                pending = pending[safe:]
+    
+    async def close(self):
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+
+
+class ShellPool:
+    """Pula sesji kluczowana (powłoka, katalog roboczy) z limitem rozmiaru i wygaszaniem bezczynnych"""
+    
+    def __init__(self, max_size: int = 4, idle_timeout: float = 300.0):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._sessions: Dict[Tuple[str, str], ShellSession] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.started = 0
+        self.reused = 0
+        self.evicted = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+    
+    async def _acquire(self, kind: str, cwd: str) -> Optional[ShellSession]:
+        """Sesja dla klucza; None gdy pula jest pełna i wszystkie sesje są zajęte"""
+        async with self._lock:
+            return await self._get_or_start(kind, cwd)
+    
+    async def _get_or_start(self, kind: str, cwd: str) -> Optional[ShellSession]:
+        key = (kind, cwd)
+        session = self._sessions.get(key)
+        if session is not None and session.alive:
+            self.reused += 1
+            return session
+        self._sessions.pop(key, None)
+        
+        if len(self._sessions) >= self.max_size:
+            idle = [s for s in self._sessions.values() if not s.lock.locked()]
+            if not idle:
+                return None
+            await self._evict(min(idle, key=lambda s: s.last_used))
+        
+        session = ShellSession(kind, cwd)
+        await session.start()
+        self._sessions[key] = session
+        self.started += 1
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle())
+        return session
+    
+    async def _evict(self, session: ShellSession):
+        self._sessions.pop((session.kind, session.cwd), None)
+        self.evicted += 1
+        await session.close()
+    
+    async def run(self, kind: str, cwd: str, command: str, timeout: float,
+                  on_output: Callable[[str], Awaitable[None]]) -> Optional[int]:
+        """Kod wyjścia komendy albo None, gdy brak wolnej sesji (wywołujący uruchamia proces jednorazowy)"""
+        session = await self._acquire(kind, cwd)
+        if session is None:
+            return None
+        
+        async with session.lock:
+            try:
+                return await asyncio.wait_for(session.run(command, on_output), timeout)
+            except BaseException:
+                # Przerwana komenda zostawia sesję w nieznanym stanie - zamknij ją
+                await self._evict(session)
+                raise
+    
+    async def _reap_idle(self):
+        while self._sessions:
+            await asyncio.sleep(min(30.0, self.idle_timeout))
+            now = time.monotonic()
+            for session in list(self._sessions.values()):
+                if not session.lock.locked() and now - session.last_used > self.idle_timeout:
+                    logger.info(f"Zamykanie bezczynnej sesji {session.kind} ({session.cwd})")
+                    await self._evict(session)
+    
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for session in list(self._sessions.values()):
+            await self._evict(session)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "started": self.started,
+            "reused": self.reused,
+            "evicted": self.evicted
+        }